@@ -0,0 +1,34 @@
+"""Add daily_training_state table
+
+Revision ID: 003_add_daily_training_state
+Revises: 002_add_profile_picture
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_add_daily_training_state'
+down_revision = '002_add_profile_picture'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user, per-day materialized CTL/ATL/TSB (primary key doubles as the lookup index)
+    op.create_table(
+        'daily_training_state',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('daily_load', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('ctl', sa.Float(), nullable=False),
+        sa.Column('atl', sa.Float(), nullable=False),
+        sa.Column('tsb', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('daily_training_state')
@@ -0,0 +1,35 @@
+"""Add metrics_snapshots table
+
+Revision ID: 004_add_metrics_snapshots
+Revises: 003_add_daily_training_state
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_metrics_snapshots'
+down_revision = '003_add_daily_training_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nightly per-user metrics written by the batch recompute
+    op.create_table(
+        'metrics_snapshots',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('ctl', sa.Float(), nullable=False),
+        sa.Column('atl', sa.Float(), nullable=False),
+        sa.Column('tsb', sa.Float(), nullable=False),
+        sa.Column('recovery_score', sa.Float(), nullable=False),
+        sa.Column('weekly_training_load', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('metrics_snapshots')
@@ -0,0 +1,25 @@
+"""Add load_model column to users
+
+Revision ID: 005_add_user_load_model
+Revises: 004_add_metrics_snapshots
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_user_load_model'
+down_revision = '004_add_metrics_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user training load model (NULL = heuristic)
+    op.add_column('users', sa.Column('load_model', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('users', 'load_model')
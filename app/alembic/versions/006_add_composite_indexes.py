@@ -0,0 +1,49 @@
+"""Add composite (user_id, date) indexes for the per-user range queries
+
+Revision ID: 006_add_composite_indexes
+Revises: 005_add_user_load_model
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_composite_indexes'
+down_revision = '005_add_user_load_model'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns, included columns, single-column index it replaces)
+INDEXES = [
+    ('ix_workouts_user_id_date', 'workouts', ['user_id', 'date'],
+     ['training_load_score', 'duration', 'workout_type'], 'ix_workouts_user_id'),
+    ('ix_sleep_logs_user_id_date', 'sleep_logs', ['user_id', 'date'],
+     ['hours', 'quality_score'], 'ix_sleep_logs_user_id'),
+    ('ix_nutrition_logs_user_id_date', 'nutrition_logs', ['user_id', 'date'],
+     None, 'ix_nutrition_logs_user_id'),
+    ('ix_recommendations_user_id_created_at', 'recommendations', ['user_id', 'created_at'],
+     None, 'ix_recommendations_user_id'),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, include, replaces in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+            # The composite index leads with user_id, so the old one only costs writes
+            op.drop_index(replaces, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, include, replaces in INDEXES:
+            op.create_index(replaces, table, ['user_id'], postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,78 @@
+"""Add daily_user_summary rollup table
+
+Revision ID: 007_add_daily_user_summary
+Revises: 006_add_composite_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_daily_user_summary'
+down_revision = '006_add_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user, per-day totals maintained on every log write (primary key doubles as the range index)
+    op.create_table(
+        'daily_user_summary',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('workout_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('workout_duration', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('workout_distance', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('training_load', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('workout_types', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sleep_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sleep_hours', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('sleep_quality', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('nutrition_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('calories', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('protein', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('carbs', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('fats', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    # Backfill from the existing logs (bits match daily_summary.WORKOUT_TYPE_BITS)
+    op.execute("""
+        INSERT INTO daily_user_summary
+            (user_id, date, workout_count, workout_duration, workout_distance, training_load, workout_types)
+        SELECT user_id, date, count(*), sum(duration), sum(coalesce(distance, 0)),
+               sum(coalesce(training_load_score, 0)),
+               bit_or(CASE lower(workout_type)
+                   WHEN 'easy' THEN 1 WHEN 'tempo' THEN 2 WHEN 'interval' THEN 4
+                   WHEN 'long' THEN 8 WHEN 'race' THEN 16 ELSE 32 END)
+        FROM workouts
+        GROUP BY user_id, date
+    """)
+    op.execute("""
+        INSERT INTO daily_user_summary (user_id, date, sleep_count, sleep_hours, sleep_quality)
+        SELECT user_id, date, count(*), sum(hours), sum(quality_score)
+        FROM sleep_logs
+        GROUP BY user_id, date
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            sleep_count = EXCLUDED.sleep_count,
+            sleep_hours = EXCLUDED.sleep_hours,
+            sleep_quality = EXCLUDED.sleep_quality
+    """)
+    op.execute("""
+        INSERT INTO daily_user_summary (user_id, date, nutrition_count, calories, protein, carbs, fats)
+        SELECT user_id, date, count(*), sum(calories), sum(protein), sum(carbs), sum(fats)
+        FROM nutrition_logs
+        GROUP BY user_id, date
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            nutrition_count = EXCLUDED.nutrition_count,
+            calories = EXCLUDED.calories,
+            protein = EXCLUDED.protein,
+            carbs = EXCLUDED.carbs,
+            fats = EXCLUDED.fats
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_user_summary')
@@ -0,0 +1,25 @@
+"""Add token_version column to users
+
+Revision ID: 008_add_user_token_version
+Revises: 007_add_daily_user_summary
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_user_token_version'
+down_revision = '007_add_daily_user_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Stamped into access tokens ("ver" claim); bumping it revokes older tokens
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'token_version')
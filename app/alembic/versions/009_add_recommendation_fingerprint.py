@@ -0,0 +1,41 @@
+"""Add input_fingerprint and validation columns to recommendations
+
+Revision ID: 009_add_recommendation_fingerprint
+Revises: 008_add_user_token_version
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_recommendation_fingerprint'
+down_revision = '008_add_user_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # sha256 of the workflow inputs (profile, rounded metrics, date); NULL for older rows
+    op.add_column('recommendations', sa.Column('input_fingerprint', sa.String(64), nullable=True))
+    # The validator's verdict, so a reused recommendation returns the same body
+    op.add_column('recommendations', sa.Column('validation', sa.Text(), nullable=True))
+    # CONCURRENTLY keeps the table writable while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_recommendations_user_id_input_fingerprint', 'recommendations', ['user_id', 'input_fingerprint'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_recommendations_user_id_input_fingerprint', table_name='recommendations',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.drop_column('recommendations', 'validation')
+    op.drop_column('recommendations', 'input_fingerprint')
@@ -0,0 +1,25 @@
+"""Add metrics_version column to users
+
+Revision ID: 010_add_user_metrics_version
+Revises: 009_add_recommendation_fingerprint
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_user_metrics_version'
+down_revision = '009_add_recommendation_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bumped by every write to a user's training data; cached metrics of another version are stale
+    op.add_column('users', sa.Column('metrics_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'metrics_version')
@@ -0,0 +1,39 @@
+"""Add other_workout_types column to daily_user_summary
+
+Revision ID: 011_add_other_workout_types
+Revises: 010_add_user_metrics_version
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_add_other_workout_types'
+down_revision = '010_add_user_metrics_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Names behind the "other" bit of workout_types, newline-separated (daily_summary.OTHER_TYPES_SEPARATOR)
+    op.add_column('daily_user_summary',
+                  sa.Column('other_workout_types', sa.Text(), nullable=False, server_default=''))
+
+    # Backfill from the existing logs
+    op.execute("""
+        UPDATE daily_user_summary s
+        SET other_workout_types = o.names
+        FROM (
+            SELECT user_id, date, string_agg(DISTINCT workout_type, E'\\n' ORDER BY workout_type) AS names
+            FROM workouts
+            WHERE lower(workout_type) NOT IN ('easy', 'tempo', 'interval', 'long', 'race')
+            GROUP BY user_id, date
+        ) o
+        WHERE s.user_id = o.user_id AND s.date = o.date
+    """)
+
+
+def downgrade():
+    op.drop_column('daily_user_summary', 'other_workout_types')
@@ -3,11 +3,69 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.routes.config import settings
+from app.services.pool_monitor import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+
+def pool_options(url: str, async_engine: bool = False) -> dict:
+    """Pool settings from Settings; SQLite keeps SQLAlchemy's default pool."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
+pool_monitors = {}
+if not settings.DATABASE_URL.startswith("sqlite"):
+    pool_monitors["sync"] = instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine (settings.DB_ASYNC), created on first use so the sync
+# deployment does not need the async driver installed
+_async_engine = None
+_async_session_factory = None
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap a sync driver in a database URL for its async counterpart."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_session_factory():
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(url, **pool_options(url, async_engine=True))
+        if not url.startswith("sqlite"):
+            pool_monitors["async"] = instrument_engine(_async_engine)
+        # expire_on_commit=False: attribute access after commit must not trigger implicit IO
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+
+def pool_stats() -> dict:
+    """PoolMonitor stats for every engine created in this process."""
+    pools = {"sync": engine.pool}
+    if _async_engine is not None:
+        pools["async"] = _async_engine.sync_engine.pool
+    return {name: monitor.stats(pools[name]) for name, monitor in pool_monitors.items()}
+
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +73,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
@@ -4,7 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.database import Base, engine
 #supa base pass - Rss6Y5CbzC5EOHRe
 # Import models so Alembic / create_all can detect them
-from app.models import user, workout, sleep_log, nutrition_log, recommendation  # noqa: F401
+from app.models import user, workout, sleep_log, nutrition_log, recommendation, training_state, metrics_snapshot, daily_summary  # noqa: F401
 
 app = FastAPI(title="Endurance Sports Coach API", version="1.0.0")
 
@@ -17,11 +17,35 @@ app.add_middleware(
 )
 
 # Register routers (added progressively each phase)
-from app.routes import auth, user as user_route, logs  # noqa: E402
+from app.routes.config import settings  # noqa: E402
+from app.routes import history, imports, export, internal  # noqa: E402
+from app.services.password_pool import password_hasher  # noqa: E402
+from app.services.ai_coach import get_recommendation_workflow  # noqa: E402
+
+# DB_ASYNC switches the API to async handlers on the async engine (same paths)
+if settings.DB_ASYNC:
+    from app.routes import auth_async as auth, user_async as user_route, logs_async as logs  # noqa: E402
+else:
+    from app.routes import auth, user as user_route, logs  # noqa: E402
 
 app.include_router(auth.router, tags=["Auth"])
 app.include_router(user_route.router, tags=["User"])
 app.include_router(logs.router, tags=["Logs"])
+app.include_router(history.router, tags=["History"])
+app.include_router(imports.router, tags=["Import"])
+app.include_router(export.router, tags=["Export"])
+app.include_router(internal.router, tags=["Internal"])
+
+
+@app.on_event("startup")
+def compile_recommendation_workflow():
+    # Compile the LangGraph workflow once per process, before the first /recommend
+    get_recommendation_workflow()
+
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_hasher.shutdown()
 
 
 @app.get("/health")
@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Date, Text
+from app.database import Base
+
+
+class DailyUserSummary(Base):
+    """
+    Per-user, per-day totals of workouts, sleep and nutrition.
+
+    Upserted in the same transaction as every log write, so aggregate reads
+    (weekly activity, daily loads, dashboard) touch one row per day instead
+    of every raw log. Days without any log have no row.
+    """
+    __tablename__ = "daily_user_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    workout_count = Column(Integer, nullable=False, default=0)
+    workout_duration = Column(Float, nullable=False, default=0.0)   # minutes
+    workout_distance = Column(Float, nullable=False, default=0.0)   # km
+    training_load = Column(Float, nullable=False, default=0.0)      # sum of training_load_score
+    workout_types = Column(Integer, nullable=False, default=0)      # bitmap, see daily_summary.WORKOUT_TYPE_BITS
+    other_workout_types = Column(Text, nullable=False, default="", server_default="")  # names behind the "other" bit
+    sleep_count = Column(Integer, nullable=False, default=0)
+    sleep_hours = Column(Float, nullable=False, default=0.0)        # summed over the day's sleep logs
+    sleep_quality = Column(Float, nullable=False, default=0.0)      # summed quality scores
+    nutrition_count = Column(Integer, nullable=False, default=0)
+    calories = Column(Float, nullable=False, default=0.0)
+    protein = Column(Float, nullable=False, default=0.0)  # grams
+    carbs = Column(Float, nullable=False, default=0.0)    # grams
+    fats = Column(Float, nullable=False, default=0.0)     # grams
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
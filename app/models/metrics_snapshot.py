@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Date
+from app.database import Base
+
+
+class MetricsSnapshot(Base):
+    """Per-user training metrics as of a day, written by the nightly batch recompute."""
+    __tablename__ = "metrics_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    ctl = Column(Float, nullable=False)             # fitness
+    atl = Column(Float, nullable=False)             # fatigue
+    tsb = Column(Float, nullable=False)             # form
+    recovery_score = Column(Float, nullable=False)  # 0-100
+    weekly_training_load = Column(Float, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
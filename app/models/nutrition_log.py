@@ -1,13 +1,17 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Date
+from sqlalchemy import Index, Column, Integer, Float, DateTime, ForeignKey, Date
 from app.database import Base
 
 
 class NutritionLog(Base):
     __tablename__ = "nutrition_logs"
+    # Hot path: one user's nutrition over a date range, newest first
+    __table_args__ = (
+        Index("ix_nutrition_logs_user_id_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
     calories = Column(Float, nullable=False)
     protein = Column(Float, nullable=False)  # grams
@@ -1,15 +1,23 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Date
+from sqlalchemy import Index, Column, Integer, String, Text, DateTime, ForeignKey, Date
 from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
+    # Hot path: a user's latest recommendation
+    __table_args__ = (
+        Index("ix_recommendations_user_id_created_at", "user_id", "created_at"),
+        # Reuse lookup: a user's stored recommendation for identical inputs
+        Index("ix_recommendations_user_id_input_fingerprint", "user_id", "input_fingerprint"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
     recommendation_json = Column(JSONB, nullable=False)  # structured LLM output
     reasoning_summary = Column(Text, nullable=True)
+    validation = Column(Text, nullable=True)
+    input_fingerprint = Column(String(64), nullable=True)  # see services/recommendation_reuse.py
     created_at = Column(DateTime, default=datetime.utcnow)
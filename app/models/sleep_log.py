@@ -1,13 +1,17 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Date
+from sqlalchemy import Index, Column, Integer, Float, DateTime, ForeignKey, Date
 from app.database import Base
 
 
 class SleepLog(Base):
     __tablename__ = "sleep_logs"
+    # Hot path: one user's sleep over a date range, newest first
+    __table_args__ = (
+        Index("ix_sleep_logs_user_id_date", "user_id", "date", postgresql_include=["hours", "quality_score"]),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
     hours = Column(Float, nullable=False)          # total sleep hours
     quality_score = Column(Integer, nullable=False) # 1–10 subjective score
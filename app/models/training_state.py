@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Date
+from app.database import Base
+
+
+class DailyTrainingState(Base):
+    """
+    Materialized PMC state, one row per user per day with training load.
+
+    ctl/atl/tsb hold the state at the end of `date` (after that day's load).
+    Rest days are not stored: the state decays in closed form between rows.
+    """
+    __tablename__ = "daily_training_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    daily_load = Column(Float, nullable=False, default=0.0)  # sum of training_load_score
+    ctl = Column(Float, nullable=False)  # fitness
+    atl = Column(Float, nullable=False)  # fatigue
+    tsb = Column(Float, nullable=False)  # form
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -17,4 +17,7 @@ class User(Base):
     experience_level = Column(String, nullable=True)  # beginner / intermediate / advanced
     goal = Column(String, nullable=True)    # e.g. "marathon", "weight loss", "base fitness"
     profile_picture = Column(String, nullable=True)  # URL or base64 encoded image
+    load_model = Column(String, nullable=True)  # training load model (see load_models.py), NULL = heuristic
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped to revoke issued tokens
+    metrics_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped on writes to training data (metrics_cache.py)
     created_at = Column(DateTime, default=datetime.utcnow)
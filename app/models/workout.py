@@ -1,13 +1,21 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Date
+from sqlalchemy import Index, Column, Integer, Float, String, DateTime, ForeignKey, Date
 from app.database import Base
 
 
 class Workout(Base):
     __tablename__ = "workouts"
+    # Hot path: one user's workouts over a date range, ordered by date;
+    # the included columns let load/activity aggregates run index-only
+    __table_args__ = (
+        Index(
+            "ix_workouts_user_id_date", "user_id", "date",
+            postgresql_include=["training_load_score", "duration", "workout_type"]
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
     distance = Column(Float, nullable=True)       # km
     duration = Column(Float, nullable=False)      # minutes
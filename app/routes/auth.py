@@ -1,16 +1,9 @@
-from datetime import datetime, timedelta
-from typing import Optional
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.routes.config import settings
 from app.database import get_db
 from app.routes.schemas import UserCreate, LoginRequest, TokenOut
-from app.routes.auth_utils import hash_password, verify_password, create_access_token
+from app.routes.auth_utils import hash_password, verify_and_update_password, create_user_token
 from app.models.user import User
 
 router = APIRouter()
@@ -53,10 +46,16 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    verified, new_hash = verify_and_update_password(credentials.password, user.hashed_password)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Hashed with an older bcrypt cost: store the re-hash
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    
     # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_user_token(user)
     
     return {"access_token": access_token, "token_type": "bearer"}
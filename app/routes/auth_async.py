@@ -0,0 +1,67 @@
+"""
+Async variants of the auth routes (settings.DB_ASYNC).
+
+Same paths and responses as auth.py; bcrypt runs in the password hashing
+pool so hashing never blocks the event loop.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.routes.schemas import UserCreate, LoginRequest, TokenOut
+from app.routes.auth_utils import hash_password_async, verify_and_update_password_async, create_user_token
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.post("/signup", status_code=status.HTTP_201_CREATED)
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new user account"""
+    # Check if email already exists
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
+    # Create new user
+    new_user = User(
+        email=user_data.email,
+        hashed_password=await hash_password_async(user_data.password),
+        name=user_data.name,
+        age=user_data.age,
+        height=user_data.height,
+        weight=user_data.weight,
+        sport=user_data.sport,
+        experience_level=user_data.experience_level,
+        goal=user_data.goal
+    )
+    
+    db.add(new_user)
+    await db.commit()
+    
+    return {"message": "User created successfully", "user_id": new_user.id}
+
+
+@router.post("/login", response_model=TokenOut)
+async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    """Authenticate user and return JWT token"""
+    # Find user by email
+    user = await db.scalar(select(User).where(User.email == credentials.email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    
+    # Verify password
+    verified, new_hash = await verify_and_update_password_async(credentials.password, user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    
+    # Hashed with an older bcrypt cost: store the re-hash
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    # Create access token
+    access_token = create_user_token(user)
+    
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -1,25 +1,63 @@
+import hmac
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.routes.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.services.principal_cache import Principal, get_principal, get_principal_async
+from app.services.password_pool import HashingOverloaded, password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 
+def _hashing_unavailable(error: HashingOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, try again shortly",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    try:
+        return password_hasher.hash(password)
+    except HashingOverloaded as e:
+        raise _hashing_unavailable(e)
+
+
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(verified, replacement hash or None); store the replacement when set."""
+    try:
+        return password_hasher.verify_and_update(plain, hashed)
+    except HashingOverloaded as e:
+        raise _hashing_unavailable(e)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return verify_and_update_password(plain, hashed)[0]
+
+
+async def hash_password_async(password: str) -> str:
+    try:
+        return await password_hasher.hash_async(password)
+    except HashingOverloaded as e:
+        raise _hashing_unavailable(e)
+
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return await password_hasher.verify_and_update_async(plain, hashed)
+    except HashingOverloaded as e:
+        raise _hashing_unavailable(e)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return (await verify_and_update_password_async(plain, hashed))[0]
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -36,13 +74,72 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    from app.models.user import User
+def create_user_token(user) -> str:
+    """Access token for a user, stamped with their current token_version."""
+    return create_access_token(data={"sub": str(user.id), "ver": user.token_version or 0})
+
+
+def token_claims(token: str) -> tuple:
+    """(user id, token version) from a bearer token. Tokens without "ver" predate versioning: 0."""
     payload = decode_token(token)
-    user_id: int = payload.get("sub")
+    user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token payload")
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
+    return int(user_id), payload.get("ver", 0)
+
+
+def check_token_version(user, token_version: int) -> None:
+    if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    if (user.token_version or 0) != token_version:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    The authenticated user's Principal, from the principal cache when possible.
+
+    For handlers that only read; use get_current_user where the handler
+    changes or returns the full profile.
+    """
+    user_id, token_version = token_claims(token)
+    principal = get_principal(db, user_id, token_version)
+    check_token_version(principal, token_version)
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """The authenticated user as a full ORM row (profile reads and updates)."""
+    from app.models.user import User
+    user_id, token_version = token_claims(token)
+    user = db.get(User, user_id)
+    check_token_version(user, token_version)
     return user
+
+
+async def get_current_principal_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)) -> Principal:
+    user_id, token_version = token_claims(token)
+    principal = await get_principal_async(db, user_id, token_version)
+    check_token_version(principal, token_version)
+    return principal
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    from app.models.user import User
+    user_id, token_version = token_claims(token)
+    user = await db.get(User, user_id)
+    check_token_version(user, token_version)
+    return user
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(default=None)) -> None:
+    """
+    Guard for the /internal operational endpoints.
+
+    They answer only requests carrying X-Internal-Token equal to
+    INTERNAL_API_TOKEN; with no token configured they do not exist (404).
+    """
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token")
@@ -10,6 +10,30 @@ class Settings(BaseSettings):
     FIREWORKS_API_KEY: str = ""
     FIREWORKS_BASE_URL: str = "https://api.fireworks.ai/inference/v1"
     FIREWORKS_MODEL: str = "accounts/fireworks/models/gpt-oss-120b"
+    LLM_BACKEND: str = "fireworks"  # fireworks, or stub for load tests without network
+    LLM_MAX_CONCURRENCY: int = 16  # in-flight LLM calls per worker process (also the HTTP pool size)
+    LLM_TIMEOUT: float = 30.0  # seconds per call attempt
+    LLM_MAX_RETRIES: int = 2  # retries on timeouts, connection errors, 429 and 5xx
+    LLM_STUB_LATENCY: float = 0.0  # seconds the stub backend waits per call
+    METRICS_CACHE_SIZE: int = 10000  # users per worker process
+    METRICS_VERSION_CHECK_SECONDS: float = 5.0  # cache hits re-read users.metrics_version at most this often (0 = every hit)
+    PRINCIPAL_CACHE_SIZE: int = 10000  # authenticated users per worker process
+    PRINCIPAL_CACHE_TTL: float = 60.0  # seconds; bounds how long other workers serve a revoked token
+    RECOMMENDATION_CACHE_SIZE: int = 5000  # shared recommendations per worker process (0 disables)
+    RECOMMENDATION_CACHE_TTL: float = 6 * 3600.0  # seconds a shared recommendation is served
+    RECOMMENDATION_CACHE_GRANULARITY: float = 1.0  # scales the metric buckets; larger = coarser, more sharing
+    DB_POOL_SIZE: int = 5  # persistent connections per engine (per worker process)
+    DB_MAX_OVERFLOW: int = 10  # extra connections opened under burst load
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; keep below the pooler's idle timeout
+    DB_POOL_PRE_PING: bool = True  # test connections on checkout (dropped pooler connections)
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes passwords on their next login
+    PASSWORD_HASH_WORKERS: int = 2  # hashing processes per worker process (0 = hash in the request thread)
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32  # operations allowed to wait for a hashing process before 503
+    PASSWORD_HASH_RETRY_AFTER: int = 2  # seconds, Retry-After on a 503
+    INTERNAL_API_TOKEN: str = ""  # required in X-Internal-Token for /internal/*; empty = endpoints disabled
+    DB_ASYNC: bool = False  # serve the API from async routes on an async engine
+    ASYNC_DATABASE_URL: str = ""  # default: DATABASE_URL with the asyncpg driver
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.routes.auth_utils import get_current_principal
+from app.services.principal_cache import Principal
+from app.services.history_export import EXPORT_FORMATS, check_export, stream_export
+
+router = APIRouter()
+
+
+@router.get("/export/{kind}")
+def export_history(
+    kind: str,
+    request: Request,
+    format: str = "ndjson",
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Stream the user's full history as a file download.
+    
+    - kind: workouts, sleep, nutrition or recommendations
+    - format: ndjson (default) or csv
+    
+    Rows are streamed oldest first from a server-side cursor; the body is
+    gzip-compressed on the fly when the client sends Accept-Encoding: gzip.
+    """
+    try:
+        check_export(kind, format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        stream_export(current_user.id, kind, format, compress=compress),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
@@ -0,0 +1,71 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.routes.schemas import WorkoutPage, SleepLogPage, NutritionLogPage
+from app.routes.auth_utils import get_current_principal
+from app.services.principal_cache import Principal
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.nutrition_log import NutritionLog
+from app.services.pagination import DEFAULT_PAGE_SIZE, paginate
+
+router = APIRouter(prefix="/history")
+
+
+def _page(db: Session, model, user_id: int, **kwargs):
+    try:
+        return paginate(db, model, user_id, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/workouts", response_model=WorkoutPage)
+def list_workouts(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    workout_type: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Page through workouts, newest first.
+    
+    - limit: page size (max 200)
+    - cursor: next_cursor from the previous page
+    - start / end: optional inclusive date range
+    - workout_type: optional filter (easy / tempo / interval / long / race)
+    """
+    filters = [Workout.workout_type == workout_type] if workout_type else []
+    return _page(db, Workout, current_user.id, limit=limit, cursor=cursor, start=start, end=end, filters=filters)
+
+
+@router.get("/sleep", response_model=SleepLogPage)
+def list_sleep_logs(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Page through sleep logs, newest first (same parameters as /history/workouts)"""
+    return _page(db, SleepLog, current_user.id, limit=limit, cursor=cursor, start=start, end=end)
+
+
+@router.get("/nutrition", response_model=NutritionLogPage)
+def list_nutrition_logs(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Page through nutrition logs, newest first (same parameters as /history/workouts)"""
+    return _page(db, NutritionLog, current_user.id, limit=limit, cursor=cursor, start=start, end=end)
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.routes.auth_utils import get_current_principal
+from app.services.principal_cache import Principal
+from app.services.history_import import detect_format, import_history
+from app.services.metrics_cache import invalidate_training_metrics
+
+router = APIRouter()
+
+
+@router.post("/import/{kind}")
+def import_history_file(
+    kind: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import past workouts, sleep or nutrition from a CSV or NDJSON file.
+    
+    - kind: workouts, sleep or nutrition
+    - format: csv or ndjson (default: from the file extension)
+    - Columns / keys match the /log-workout, /log-sleep and /log-nutrition bodies
+    
+    Valid rows are imported in one transaction; invalid rows are skipped
+    and reported with their line number. Rows the user already has (same
+    date and values, e.g. date, type and duration for a workout) are
+    skipped and counted as duplicates, so re-uploading a file is safe.
+    A CSV that cannot be parsed is rejected with 400. Workouts are scored
+    with the user's training load model.
+    """
+    try:
+        fmt = format or detect_format(file.filename, file.content_type)
+        result = import_history(db, current_user, kind, file.file, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    invalidate_training_metrics(current_user.id)
+    
+    return result
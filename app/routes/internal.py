@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+
+from app.database import pool_stats
+from app.routes.auth_utils import require_internal_token
+from app.services.metrics_cache import metrics_cache
+from app.services.principal_cache import principal_cache
+from app.services.recommendation_cache import recommendation_cache
+from app.services.password_pool import password_hasher
+from app.services.llm_gateway import llm_gateway
+from app.services.recommendation_reuse import reuse_stats
+
+# Operational counters: X-Internal-Token required (see require_internal_token)
+router = APIRouter(prefix="/internal", dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """Hit/miss/eviction counters for the in-process caches (per worker process)"""
+    return {
+        "metrics": metrics_cache.stats(),
+        "principals": principal_cache.stats(),
+        "recommendations": recommendation_cache.stats()
+    }
+
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """
+    Connection pool health for this worker process: checkout wait
+    percentiles, connections in use / peak / overflow, timeouts and
+    invalidations per engine (sync, and async once DB_ASYNC has used it).
+    """
+    return {"engines": pool_stats()}
+
+
+@router.get("/password-hashing")
+def get_password_hashing_stats():
+    """
+    Password hashing pool for this worker process: operations in flight and
+    at peak, 503 rejections, login re-hashes and latency percentiles
+    (queue wait + hashing) for hash and verify.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/llm")
+def get_llm_stats():
+    """
+    LLM gateway for this worker process: backend, calls in flight and at
+    peak, and per workflow node the calls, retries, errors, tokens and
+    latency percentiles. "reuse" counts /recommend requests answered from
+    a stored recommendation with identical inputs, and the LLM calls saved.
+    """
+    return {**llm_gateway.stats(), "reuse": reuse_stats.stats()}
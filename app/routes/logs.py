@@ -1,19 +1,34 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
+from typing import Optional
 
 from app.database import get_db
 from app.routes.schemas import (
     WorkoutCreate, WorkoutOut,
     SleepLogCreate, SleepLogOut,
     NutritionLogCreate, NutritionLogOut,
-    DashboardOut, RecommendationOut
+    DashboardOut, RecommendationOut,
+    PlanSimulationRequest
 )
-from app.routes.auth_utils import get_current_user
+from app.routes.auth_utils import get_current_principal, get_current_user
 from app.models.user import User
+from app.services.principal_cache import Principal
 from app.models.workout import Workout
 from app.models.sleep_log import SleepLog
 from app.models.nutrition_log import NutritionLog
+from app.services.training_state import apply_workout_load
+from app.services.metrics_cache import bump_metrics_version, get_cached_training_metrics, invalidate_training_metrics
+from app.services.daily_summary import (
+    get_daily_summaries,
+    nutrition_totals,
+    sleep_totals,
+    summary_to_dict,
+    upsert_daily_totals,
+    workout_totals,
+)
+from app.services.load_models import DEFAULT_LOAD_MODEL, HeartRateProfile, get_load_model, get_user_load_model
 
 router = APIRouter()
 
@@ -21,53 +36,29 @@ router = APIRouter()
 def calculate_training_load(duration: float, workout_type: str, avg_hr: int = None) -> float:
     """
     Calculate training load score based on duration, workout type, and heart rate.
-    This is a simplified calculation for Phase 4.
+    Uses the default "heuristic" model from app/services/load_models.py.
     Formula: duration * intensity_factor * (hr_factor if available)
     """
-    # Intensity factors by workout type
-    intensity_map = {
-        "easy": 1.0,
-        "tempo": 1.5,
-        "interval": 2.0,
-        "long": 1.2,
-        "race": 2.5
-    }
-    
-    intensity_factor = intensity_map.get(workout_type.lower(), 1.0)
-    
-    # Base score: duration * intensity
-    base_score = duration * intensity_factor
-    
-    # Heart rate adjustment (if provided)
-    if avg_hr:
-        # Simplified HR zones: <130 (easy), 130-150 (moderate), 150-170 (hard), >170 (max)
-        if avg_hr < 130:
-            hr_factor = 1.0
-        elif avg_hr < 150:
-            hr_factor = 1.2
-        elif avg_hr < 170:
-            hr_factor = 1.5
-        else:
-            hr_factor = 1.8
-        
-        base_score *= hr_factor
-    
-    return round(base_score, 2)
+    return get_load_model(DEFAULT_LOAD_MODEL).score(duration, workout_type, avg_hr)
 
 
 @router.post("/log-workout", response_model=WorkoutOut, status_code=status.HTTP_201_CREATED)
 def log_workout(
     workout_data: WorkoutCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Log a workout and calculate training load score"""
+    """Log a workout and calculate training load score with the user's load model"""
+    
+    # Lock the users row first; the load model and age come from it, not the cached principal
+    scoring = bump_metrics_version(db, [current_user.id])[0]
     
     # Calculate training load
-    training_load = calculate_training_load(
+    training_load = get_user_load_model(scoring).score(
         duration=workout_data.duration,
         workout_type=workout_data.workout_type,
-        avg_hr=workout_data.avg_hr
+        avg_hr=workout_data.avg_hr,
+        profile=HeartRateProfile.from_user(scoring)
     )
     
     # Create workout record
@@ -83,16 +74,23 @@ def log_workout(
     )
     
     db.add(workout)
+    
+    # Advance the materialized CTL/ATL/TSB and the daily rollup in the same transaction
+    apply_workout_load(db, current_user.id, workout.date, training_load)
+    upsert_daily_totals(db, current_user.id, [(workout.date, workout_totals(workout))])
+    
     db.commit()
     db.refresh(workout)
     
+    invalidate_training_metrics(current_user.id)
+    
     return workout
 
 
 @router.post("/log-sleep", response_model=SleepLogOut, status_code=status.HTTP_201_CREATED)
 def log_sleep(
     sleep_data: SleepLogCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Log sleep data"""
@@ -105,16 +103,20 @@ def log_sleep(
     )
     
     db.add(sleep_log)
+    bump_metrics_version(db, [current_user.id])
+    upsert_daily_totals(db, current_user.id, [(sleep_log.date, sleep_totals(sleep_log))])
     db.commit()
     db.refresh(sleep_log)
     
+    invalidate_training_metrics(current_user.id)
+    
     return sleep_log
 
 
 @router.post("/log-nutrition", response_model=NutritionLogOut, status_code=status.HTTP_201_CREATED)
 def log_nutrition(
     nutrition_data: NutritionLogCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Log daily nutrition data"""
@@ -129,6 +131,7 @@ def log_nutrition(
     )
     
     db.add(nutrition_log)
+    upsert_daily_totals(db, current_user.id, [(nutrition_log.date, nutrition_totals(nutrition_log))])
     db.commit()
     db.refresh(nutrition_log)
     
@@ -137,7 +140,7 @@ def log_nutrition(
 
 @router.get("/metrics")
 def get_metrics(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -148,16 +151,62 @@ def get_metrics(
     - Recovery Score
     - Weekly Training Load
     """
-    from app.services.training_engine import get_training_metrics
-    
-    metrics = get_training_metrics(db, current_user.id)
+    metrics = get_cached_training_metrics(db, current_user.id)
     return metrics
 
 
-@router.post("/recommend")
-def get_ai_recommendation(
-    current_user: User = Depends(get_current_user),
+@router.get("/metrics/history")
+def get_metrics_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: str = "auto",
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
+):
+    """
+    Get the CTL/ATL/TSB time series for a date range (PMC chart).
+    
+    - start / end: inclusive range (default: last 90 days)
+    - resolution: auto, day, week or month - long ranges are aggregated
+      server-side (end-of-bucket CTL/ATL/TSB, summed training load)
+    """
+    from app.services.training_state import get_metrics_history as load_history
+    
+    end = end or date.today()
+    start = start or end - timedelta(days=89)
+    
+    try:
+        return load_history(db, current_user.id, start, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/simulate")
+def simulate_plans(
+    request: PlanSimulationRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Project CTL/ATL/TSB forward for candidate training plans (what-if).
+    
+    Each plan is a list of future workouts (day 1 = tomorrow) scored with
+    the user's training load model. All plans are projected together from the current state
+    over a horizon of up to 16 weeks, so taper variants can be compared
+    side by side.
+    """
+    from app.services.plan_simulator import simulate_training_plans
+    
+    try:
+        return simulate_training_plans(db, current_user, request.plans, request.days)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/recommend")
+async def get_ai_recommendation(
+    force: bool = False,
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Get AI-powered workout recommendation using LangGraph and Fireworks AI.
@@ -169,11 +218,44 @@ def get_ai_recommendation(
     - Recent training history
     
     Returns personalized workout with reasoning and safety validation.
+    Async: the workflow awaits the LLM on the event loop, so in-flight
+    recommendations do not occupy threadpool workers.
+    
+    If nothing the workflow reads has changed since today's last
+    recommendation, that one is returned without calling the LLM
+    ("reused": true). Otherwise a recommendation generated for another
+    athlete with the same sport, experience, goal and training-state
+    buckets may be served with this athlete's name ("shared": true).
+    force=true always generates a new one.
     """
     from app.services.ai_coach import generate_workout_recommendation
     
-    recommendation = generate_workout_recommendation(db, current_user)
-    return recommendation
+    return await generate_workout_recommendation(current_user, force=force)
+
+
+@router.post("/recommend/stream")
+async def stream_ai_recommendation(
+    force: bool = False,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Streaming variant of /recommend, as Server-Sent Events (text/event-stream).
+    
+    Emits node_start/node_end markers for each workflow step, the analysis
+    tokens as they are generated, the parsed recommendation as soon as the
+    coach step finishes, the validation verdict, and finally a done event
+    with the same body /recommend returns. The recommendation is saved
+    before done is sent; failures arrive as an error event. Reuse and
+    force=true work as for /recommend.
+    """
+    from app.services.ai_coach import stream_workout_recommendation
+    
+    return StreamingResponse(
+        stream_workout_recommendation(current_user, force=force),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/dashboard", response_model=DashboardOut)
@@ -191,8 +273,8 @@ def get_dashboard(
     - Recent nutrition logs (last 30 days)
     - Current training metrics (CTL, ATL, TSB, recovery)
     - Latest AI recommendation
+    - Per-day totals for the last 30 days (daily rollup)
     """
-    from app.services.training_engine import get_training_metrics
     from app.models.recommendation import Recommendation
     
     # Calculate date range for recent data (last 30 days)
@@ -218,7 +300,10 @@ def get_dashboard(
     ).order_by(NutritionLog.date.desc()).all()
     
     # Get current training metrics
-    metrics = get_training_metrics(db, current_user.id)
+    metrics = get_cached_training_metrics(db, current_user.id)
+    
+    # Per-day totals from the rollup (no aggregation over the raw logs)
+    daily_summary = [summary_to_dict(row) for row in get_daily_summaries(db, current_user.id, thirty_days_ago, today)]
     
     # Get latest recommendation (most recent)
     latest_recommendation = db.query(Recommendation).filter(
@@ -231,5 +316,6 @@ def get_dashboard(
         recent_sleep=recent_sleep,
         recent_nutrition=recent_nutrition,
         metrics=metrics,
-        latest_recommendation=latest_recommendation
+        latest_recommendation=latest_recommendation,
+        daily_summary=daily_summary
     )
@@ -0,0 +1,269 @@
+"""
+Async variants of the log/metrics routes (settings.DB_ASYNC).
+
+Same paths and responses as logs.py. Reads await the async session
+directly; write paths that reuse the sync training-state services run
+them through AsyncSession.run_sync, which keeps the driver IO async.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.routes.schemas import (
+    WorkoutCreate, WorkoutOut,
+    SleepLogCreate, SleepLogOut,
+    NutritionLogCreate, NutritionLogOut,
+    DashboardOut,
+    PlanSimulationRequest
+)
+from app.routes.auth_utils import get_current_principal_async, get_current_user_async
+from app.models.user import User
+from app.services.principal_cache import Principal
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.nutrition_log import NutritionLog
+from app.services.training_state import apply_workout_load
+from app.services.metrics_cache import (
+    bump_metrics_version_async,
+    get_cached_training_metrics_async,
+    invalidate_training_metrics,
+)
+from app.services.daily_summary import (
+    get_daily_summaries,
+    nutrition_totals,
+    sleep_totals,
+    summary_to_dict,
+    upsert_daily_totals,
+    workout_totals,
+)
+from app.services.load_models import HeartRateProfile, get_user_load_model
+
+router = APIRouter()
+
+
+@router.post("/log-workout", response_model=WorkoutOut, status_code=status.HTTP_201_CREATED)
+async def log_workout(
+    workout_data: WorkoutCreate,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Log a workout and calculate training load score with the user's load model"""
+    
+    # Lock the users row first; the load model and age come from it, not the cached principal
+    scoring = (await bump_metrics_version_async(db, [current_user.id]))[0]
+    
+    # Calculate training load
+    training_load = get_user_load_model(scoring).score(
+        duration=workout_data.duration,
+        workout_type=workout_data.workout_type,
+        avg_hr=workout_data.avg_hr,
+        profile=HeartRateProfile.from_user(scoring)
+    )
+    
+    # Create workout record
+    workout = Workout(
+        user_id=current_user.id,
+        date=workout_data.date,
+        distance=workout_data.distance,
+        duration=workout_data.duration,
+        avg_hr=workout_data.avg_hr,
+        workout_type=workout_data.workout_type,
+        notes=workout_data.notes,
+        training_load_score=training_load
+    )
+    
+    db.add(workout)
+    
+    # Advance the materialized CTL/ATL/TSB and the daily rollup in the same transaction
+    await db.run_sync(lambda session: apply_workout_load(session, current_user.id, workout.date, training_load))
+    await db.run_sync(lambda session: upsert_daily_totals(
+        session, current_user.id, [(workout.date, workout_totals(workout))]
+    ))
+    
+    await db.commit()
+    await db.refresh(workout)
+    
+    invalidate_training_metrics(current_user.id)
+    
+    return workout
+
+
+@router.post("/log-sleep", response_model=SleepLogOut, status_code=status.HTTP_201_CREATED)
+async def log_sleep(
+    sleep_data: SleepLogCreate,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Log sleep data"""
+    
+    sleep_log = SleepLog(
+        user_id=current_user.id,
+        date=sleep_data.date,
+        hours=sleep_data.hours,
+        quality_score=sleep_data.quality_score
+    )
+    
+    db.add(sleep_log)
+    await bump_metrics_version_async(db, [current_user.id])
+    await db.run_sync(lambda session: upsert_daily_totals(
+        session, current_user.id, [(sleep_log.date, sleep_totals(sleep_log))]
+    ))
+    await db.commit()
+    await db.refresh(sleep_log)
+    
+    invalidate_training_metrics(current_user.id)
+    
+    return sleep_log
+
+
+@router.post("/log-nutrition", response_model=NutritionLogOut, status_code=status.HTTP_201_CREATED)
+async def log_nutrition(
+    nutrition_data: NutritionLogCreate,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Log daily nutrition data"""
+    
+    nutrition_log = NutritionLog(
+        user_id=current_user.id,
+        date=nutrition_data.date,
+        calories=nutrition_data.calories,
+        protein=nutrition_data.protein,
+        carbs=nutrition_data.carbs,
+        fats=nutrition_data.fats
+    )
+    
+    db.add(nutrition_log)
+    await db.run_sync(lambda session: upsert_daily_totals(
+        session, current_user.id, [(nutrition_log.date, nutrition_totals(nutrition_log))]
+    ))
+    await db.commit()
+    await db.refresh(nutrition_log)
+    
+    return nutrition_log
+
+
+@router.get("/metrics")
+async def get_metrics(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get comprehensive training metrics (see logs.get_metrics)"""
+    return await get_cached_training_metrics_async(db, current_user.id)
+
+
+@router.get("/metrics/history")
+async def get_metrics_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: str = "auto",
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the CTL/ATL/TSB time series for a date range (see logs.get_metrics_history)"""
+    from app.services.training_state import get_metrics_history as load_history
+    
+    end = end or date.today()
+    start = start or end - timedelta(days=89)
+    
+    try:
+        return await db.run_sync(lambda session: load_history(session, current_user.id, start, end, resolution))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/simulate")
+async def simulate_plans(
+    request: PlanSimulationRequest,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Project CTL/ATL/TSB forward for candidate training plans (see logs.simulate_plans)"""
+    from app.services.plan_simulator import simulate_training_plans
+    
+    try:
+        return await db.run_sync(
+            lambda session: simulate_training_plans(session, current_user, request.plans, request.days)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/recommend")
+async def get_ai_recommendation(
+    force: bool = False,
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get AI-powered workout recommendation (see logs.get_ai_recommendation)."""
+    from app.services.ai_coach import generate_workout_recommendation
+    
+    return await generate_workout_recommendation(current_user, force=force)
+
+
+@router.post("/recommend/stream")
+async def stream_ai_recommendation(
+    force: bool = False,
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Streaming variant of /recommend (see logs.stream_ai_recommendation)."""
+    from app.services.ai_coach import stream_workout_recommendation
+    
+    return StreamingResponse(
+        stream_workout_recommendation(current_user, force=force),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/dashboard", response_model=DashboardOut)
+async def get_dashboard(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get complete dashboard data for the frontend (see logs.get_dashboard)"""
+    from app.models.recommendation import Recommendation
+    
+    # Calculate date range for recent data (last 30 days)
+    today = date.today()
+    thirty_days_ago = today - timedelta(days=30)
+    
+    recent_workouts = (await db.scalars(select(Workout).where(
+        Workout.user_id == current_user.id,
+        Workout.date >= thirty_days_ago
+    ).order_by(Workout.date.desc()))).all()
+    
+    recent_sleep = (await db.scalars(select(SleepLog).where(
+        SleepLog.user_id == current_user.id,
+        SleepLog.date >= thirty_days_ago
+    ).order_by(SleepLog.date.desc()))).all()
+    
+    recent_nutrition = (await db.scalars(select(NutritionLog).where(
+        NutritionLog.user_id == current_user.id,
+        NutritionLog.date >= thirty_days_ago
+    ).order_by(NutritionLog.date.desc()))).all()
+    
+    metrics = await get_cached_training_metrics_async(db, current_user.id)
+    
+    summaries = await db.run_sync(
+        lambda session: get_daily_summaries(session, current_user.id, thirty_days_ago, today)
+    )
+    
+    latest_recommendation = await db.scalar(select(Recommendation).where(
+        Recommendation.user_id == current_user.id
+    ).order_by(Recommendation.created_at.desc()).limit(1))
+    
+    return DashboardOut(
+        user=current_user,
+        recent_workouts=recent_workouts,
+        recent_sleep=recent_sleep,
+        recent_nutrition=recent_nutrition,
+        metrics=metrics,
+        latest_recommendation=latest_recommendation,
+        daily_summary=[summary_to_dict(row) for row in summaries]
+    )
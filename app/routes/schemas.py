@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class UserCreate(BaseModel):
@@ -24,6 +24,7 @@ class UserUpdate(BaseModel):
     experience_level: Optional[str] = None
     goal: Optional[str] = None
     profile_picture: Optional[str] = None
+    load_model: Optional[str] = None  # heuristic / trimp / hrtss
 
 
 class UserOut(BaseModel):
@@ -37,6 +38,7 @@ class UserOut(BaseModel):
     experience_level: Optional[str]
     goal: Optional[str]
     profile_picture: Optional[str]
+    load_model: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -127,6 +129,22 @@ class NutritionLogOut(BaseModel):
         from_attributes = True
 
 
+# History Page Schemas (keyset pagination)
+class WorkoutPage(BaseModel):
+    items: List[WorkoutOut]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+
+class SleepLogPage(BaseModel):
+    items: List[SleepLogOut]
+    next_cursor: Optional[str] = None
+
+
+class NutritionLogPage(BaseModel):
+    items: List[NutritionLogOut]
+    next_cursor: Optional[str] = None
+
+
 # Dashboard Schema
 class RecommendationOut(BaseModel):
     """Schema for AI recommendation output"""
@@ -135,12 +153,47 @@ class RecommendationOut(BaseModel):
     date: date
     recommendation_json: Dict[str, Any]
     reasoning_summary: Optional[str]
+    validation: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class DailySummaryOut(BaseModel):
+    """One day of the daily rollup (totals across that day's logs)"""
+    date: date
+    workout_count: int
+    workout_duration: float
+    workout_distance: float
+    training_load: float
+    workout_types: List[str]
+    sleep_hours: Optional[float]
+    sleep_quality: Optional[float]  # average of the day's quality scores
+    calories: Optional[float]
+    protein: Optional[float]
+    carbs: Optional[float]
+    fats: Optional[float]
+
+
+class ActivityBucketOut(BaseModel):
+    """Workout totals for one day, week or month of the activity calendar"""
+    period_start: date
+    workout_count: int
+    active_days: int  # days in the bucket with at least one workout
+    duration: float
+    distance: float
+    training_load: float
+    workout_types: List[str]
+
+
+class ActivityOut(BaseModel):
+    start: date
+    end: date
+    bucket: str
+    activity: List[ActivityBucketOut]
+
+
 class DashboardOut(BaseModel):
     """
     Complete dashboard data for frontend.
@@ -152,4 +205,27 @@ class DashboardOut(BaseModel):
     recent_nutrition: List[NutritionLogOut]
     metrics: Dict[str, Any]
     latest_recommendation: Optional[RecommendationOut]
+    daily_summary: List[DailySummaryOut] = []  # last 30 days, days with logs only
+
+
+
+# Training plan simulation schemas
+from app.services.plan_simulator import MAX_PROJECTION_DAYS
+
+
+class PlannedWorkout(BaseModel):
+    day: int = Field(ge=1, le=MAX_PROJECTION_DAYS)  # days from today (1 = tomorrow)
+    workout_type: str  # easy / tempo / interval / long / race
+    duration: float = Field(ge=0, le=24 * 60)  # minutes
+    avg_hr: Optional[int] = Field(default=None, ge=30, le=250)  # bpm
+
+
+class TrainingPlan(BaseModel):
+    name: Optional[str] = None
+    workouts: List[PlannedWorkout]
+
 
+class PlanSimulationRequest(BaseModel):
+    """Candidate plans to project forward from the athlete's current state"""
+    plans: List[TrainingPlan]
+    days: int = 28  # projection horizon, up to 16 weeks
@@ -1,16 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 
 from app.database import get_db
-from app.routes.schemas import UserOut, UserUpdate, PasswordChange
-from app.routes.auth_utils import get_current_user, hash_password, verify_password
+from app.routes.schemas import UserOut, UserUpdate, PasswordChange, ActivityOut
+from app.routes.auth_utils import create_user_token, get_current_principal, get_current_user, hash_password, verify_password
 from app.models.user import User
-from app.models.workout import Workout
+from app.services.principal_cache import Principal, invalidate_principal
+from app.services.metrics_cache import bump_metrics_version, invalidate_training_metrics
+from app.services.load_models import LOAD_MODELS
+from app.services.daily_summary import get_daily_summaries, types_from_bitmap
+from app.services.activity import get_activity
+from app.services.rescore import SCORING_FIELDS, rescore_user
 
 router = APIRouter()
 
 
+def check_profile_update(update_data: dict) -> None:
+    """Reject profile updates that name an unknown training load model."""
+    if update_data.get("load_model") is not None and update_data["load_model"] not in LOAD_MODELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown training load model. Available: {', '.join(LOAD_MODELS)}"
+        )
+
+
+def scoring_changed(user: User, update_data: dict) -> bool:
+    """True if the update changes a field the training load model reads."""
+    return any(field in update_data and update_data[field] != getattr(user, field) for field in SCORING_FIELDS)
+
+
 @router.get("/me", response_model=UserOut)
 def get_current_user_profile(
     current_user: User = Depends(get_current_user)
@@ -25,15 +45,29 @@ def update_user_profile(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update the authenticated user's profile"""
+    """
+    Update the authenticated user's profile.
+    
+    Changing the load model or age re-scores the user's logged workouts and
+    rebuilds their training state in the same transaction.
+    """
     # Update only provided fields
     update_data = user_update.dict(exclude_unset=True)
+    check_profile_update(update_data)
+    rescore = scoring_changed(current_user, update_data)
     for field, value in update_data.items():
         setattr(current_user, field, value)
+    # Age and load model feed the metrics
+    bump_metrics_version(db, [current_user.id])
+    if rescore:
+        rescore_user(db, current_user.id)
     
     db.commit()
     db.refresh(current_user)
     
+    invalidate_training_metrics(current_user.id)
+    invalidate_principal(current_user.id)
+    
     return current_user
 
 
@@ -43,7 +77,12 @@ def change_password(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Change the authenticated user's password"""
+    """
+    Change the authenticated user's password.
+    
+    Tokens issued before the change stop working; the response carries a
+    replacement token for this session.
+    """
     # Verify current password
     if not verify_password(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
@@ -51,64 +90,76 @@ def change_password(
             detail="Current password is incorrect"
         )
     
-    # Update to new password
+    # Update to new password; bumping the version revokes every token issued before
     current_user.hashed_password = hash_password(password_data.new_password)
+    current_user.token_version = (current_user.token_version or 0) + 1
     db.commit()
     
-    return {"message": "Password changed successfully"}
+    invalidate_principal(current_user.id)
+    
+    return {
+        "message": "Password changed successfully",
+        "access_token": create_user_token(current_user),
+        "token_type": "bearer"
+    }
+
+
+def summarize_weekly_activity(summaries, week_ago) -> list:
+    """Per-day duration, load, count and workout types for the 7 days from `week_ago`."""
+    by_date = {summary.date: summary for summary in summaries}
+    result = []
+    for i in range(7):
+        day = week_ago + timedelta(days=i)
+        summary = by_date.get(day)
+        result.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "day": day.strftime("%a"),  # Mon, Tue, etc.
+            "duration": round(summary.workout_duration, 1) if summary else 0,
+            "training_load": round(summary.training_load, 1) if summary else 0,
+            "workout_count": summary.workout_count if summary else 0,
+            "workout_types": types_from_bitmap(summary.workout_types, summary.other_workout_types) if summary else []
+        })
+    return result
 
 
 @router.get("/weekly-activity")
 def get_weekly_activity(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get weekly activity data for the last 7 days"""
+    """Get weekly activity data for the last 7 days (from the daily rollup)"""
     today = datetime.now().date()
     week_ago = today - timedelta(days=6)  # Last 7 days including today
     
-    # Get workouts for the last 7 days
-    workouts = db.query(Workout).filter(
-        Workout.user_id == current_user.id,
-        Workout.date >= week_ago,
-        Workout.date <= today
-    ).order_by(Workout.date).all()
-    
-    # Create a dict with all 7 days
-    activity_data = {}
-    for i in range(7):
-        day = week_ago + timedelta(days=i)
-        activity_data[day.strftime("%Y-%m-%d")] = {
-            "date": day.strftime("%Y-%m-%d"),
-            "day": day.strftime("%a"),  # Mon, Tue, etc.
-            "duration": 0,
-            "training_load": 0,
-            "workout_count": 0,
-            "workout_types": []
-        }
-    
-    # Aggregate workout data by date
-    for workout in workouts:
-        date_key = workout.date.strftime("%Y-%m-%d")
-        if date_key in activity_data:
-            activity_data[date_key]["duration"] += workout.duration
-            activity_data[date_key]["training_load"] += workout.training_load_score or 0
-            activity_data[date_key]["workout_count"] += 1
-            activity_data[date_key]["workout_types"].append(workout.workout_type)
-    
-    # Convert to list and round values
-    result = []
-    for date_key in sorted(activity_data.keys()):
-        data = activity_data[date_key]
-        result.append({
-            "date": data["date"],
-            "day": data["day"],
-            "duration": round(data["duration"], 1),
-            "training_load": round(data["training_load"], 1),
-            "workout_count": data["workout_count"],
-            "workout_types": list(set(data["workout_types"]))  # Unique types
-        })
+    summaries = get_daily_summaries(db, current_user.id, week_ago, today)
     
-    return {"weekly_activity": result}
+    return {"weekly_activity": summarize_weekly_activity(summaries, week_ago)}
+
+
+def activity_range(start: Optional[date], end: Optional[date]) -> tuple:
+    """Default an /activity range to the year ending today."""
+    end = end or datetime.now().date()
+    return start or end - timedelta(days=364), end
 
 
+@router.get("/activity", response_model=ActivityOut)
+def get_activity_calendar(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Activity totals per day, week or month for a calendar / heatmap.
+    
+    - start, end: inclusive range (default: the last 365 days, max 5 years)
+    - bucket: day, week or month
+    """
+    start, end = activity_range(start, end)
+    try:
+        activity = get_activity(db, current_user.id, start, end, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {"start": start, "end": end, "bucket": bucket, "activity": activity}
@@ -0,0 +1,127 @@
+"""
+Async variants of the user routes (settings.DB_ASYNC).
+
+Same paths and responses as user.py.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.routes.schemas import UserOut, UserUpdate, PasswordChange, ActivityOut
+from app.routes.auth_utils import create_user_token, get_current_principal_async, get_current_user_async, hash_password_async, verify_password_async
+from app.services.principal_cache import Principal, invalidate_principal
+from app.routes.user import activity_range, check_profile_update, scoring_changed, summarize_weekly_activity
+from app.models.user import User
+from app.services.metrics_cache import bump_metrics_version_async, invalidate_training_metrics
+from app.services.daily_summary import get_daily_summaries
+from app.services.activity import get_activity
+from app.services.rescore import rescore_user
+
+router = APIRouter()
+
+
+@router.get("/me", response_model=UserOut)
+async def get_current_user_profile(
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get the authenticated user's profile"""
+    return current_user
+
+
+@router.put("/me", response_model=UserOut)
+async def update_user_profile(
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update the authenticated user's profile"""
+    # Update only provided fields
+    update_data = user_update.dict(exclude_unset=True)
+    check_profile_update(update_data)
+    rescore = scoring_changed(current_user, update_data)
+    for field, value in update_data.items():
+        setattr(current_user, field, value)
+    # Age and load model feed the metrics
+    await bump_metrics_version_async(db, [current_user.id])
+    if rescore:
+        await db.run_sync(lambda session: rescore_user(session, current_user.id))
+    
+    await db.commit()
+    
+    invalidate_training_metrics(current_user.id)
+    invalidate_principal(current_user.id)
+    
+    return current_user
+
+
+@router.post("/change-password")
+async def change_password(
+    password_data: PasswordChange,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Change the authenticated user's password.
+    
+    Tokens issued before the change stop working; the response carries a
+    replacement token for this session.
+    """
+    # Verify current password
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
+        )
+    
+    # Update to new password; bumping the version revokes every token issued before
+    current_user.hashed_password = await hash_password_async(password_data.new_password)
+    current_user.token_version = (current_user.token_version or 0) + 1
+    await db.commit()
+    
+    invalidate_principal(current_user.id)
+    
+    return {
+        "message": "Password changed successfully",
+        "access_token": create_user_token(current_user),
+        "token_type": "bearer"
+    }
+
+
+@router.get("/weekly-activity")
+async def get_weekly_activity(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get weekly activity data for the last 7 days (from the daily rollup)"""
+    today = datetime.now().date()
+    week_ago = today - timedelta(days=6)  # Last 7 days including today
+    
+    summaries = await db.run_sync(lambda session: get_daily_summaries(session, current_user.id, week_ago, today))
+    
+    return {"weekly_activity": summarize_weekly_activity(summaries, week_ago)}
+
+
+@router.get("/activity", response_model=ActivityOut)
+async def get_activity_calendar(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Activity totals per day, week or month for a calendar / heatmap.
+    
+    - start, end: inclusive range (default: the last 365 days, max 5 years)
+    - bucket: day, week or month
+    """
+    start, end = activity_range(start, end)
+    try:
+        activity = await db.run_sync(lambda session: get_activity(session, current_user.id, start, end, bucket))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {"start": start, "end": end, "bucket": bucket, "activity": activity}
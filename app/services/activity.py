@@ -0,0 +1,149 @@
+"""
+Activity Calendar - Day / week / month activity buckets over any date range
+
+Backs calendar and heatmap views of up to several years of history:
+- Reads the daily_user_summary rollup (one row per active day), never the
+  raw workouts
+- Bucketing and summation run in the database: date_trunc + GROUP BY and
+  bit_or over the workout-type bitmaps on Postgres, equivalent date()
+  expressions and per-bit MAX on SQLite; non-standard type names are
+  concatenated (string_agg / group_concat) and de-duplicated in Python
+- One query per request; Python only fills in empty buckets
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import DateTime, Integer, case, cast, func, select, Date
+from sqlalchemy.orm import Session
+
+from app.models.daily_summary import DailyUserSummary
+from app.services.daily_summary import (
+    OTHER_TYPES_SEPARATOR,
+    OTHER_WORKOUT_BIT,
+    WORKOUT_TYPE_BITS,
+    types_from_bitmap,
+)
+
+ACTIVITY_BUCKETS = ("day", "week", "month")
+MAX_ACTIVITY_DAYS = 5 * 366  # longest range one request may cover
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the bucket containing `day` (weeks start on Monday)."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _bucket_expression(dialect: str, bucket: str):
+    column = DailyUserSummary.date
+    if dialect == "postgresql":
+        if bucket == "day":
+            return column
+        return cast(func.date_trunc(bucket, cast(column, DateTime)), Date)
+    # SQLite: date() modifiers give the same bucket starts as ISO strings
+    if bucket == "week":
+        weekday = (cast(func.strftime("%w", column), Integer) + 6) % 7  # Monday = 0
+        return func.date(column, func.printf("-%d days", weekday))
+    if bucket == "month":
+        return func.date(column, "start of month")
+    return func.date(column)
+
+
+def _types_expression(dialect: str):
+    if dialect == "postgresql":
+        return func.bit_or(DailyUserSummary.workout_types)
+    # No bit_or outside Postgres: OR the bits back together from one MAX per bit
+    bits = list(WORKOUT_TYPE_BITS.values()) + [OTHER_WORKOUT_BIT]
+    return sum(func.max(DailyUserSummary.workout_types.op("&")(bit)) for bit in bits)
+
+
+def _other_types_expression(dialect: str):
+    names = func.nullif(DailyUserSummary.other_workout_types, "")
+    if dialect == "postgresql":
+        return func.string_agg(names, OTHER_TYPES_SEPARATOR)
+    return func.group_concat(names, OTHER_TYPES_SEPARATOR)
+
+
+def activity_statement(dialect: str, user_id: int, start: date, end: date, bucket: str):
+    """The single GROUP BY query behind get_activity."""
+    period = _bucket_expression(dialect, bucket).label("period")
+    return select(
+        period,
+        func.sum(DailyUserSummary.workout_count),
+        func.sum(DailyUserSummary.workout_duration),
+        func.sum(DailyUserSummary.workout_distance),
+        func.sum(DailyUserSummary.training_load),
+        func.sum(case((DailyUserSummary.workout_count > 0, 1), else_=0)),
+        _types_expression(dialect),
+        _other_types_expression(dialect),
+    ).where(
+        DailyUserSummary.user_id == user_id,
+        DailyUserSummary.date >= start,
+        DailyUserSummary.date <= end
+    ).group_by(period).order_by(period)
+
+
+def get_activity(db: Session, user_id: int, start: date, end: date, bucket: str = "day") -> List[Dict]:
+    """
+    Workout totals per bucket for [start, end], oldest first.
+
+    Every bucket in the range is returned, including empty ones. The first
+    and last week/month buckets only count days inside the range.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        start: First day of the range
+        end: Last day of the range
+        bucket: day, week or month
+
+    Returns:
+        [{"period_start", "workout_count", "active_days", "duration",
+          "distance", "training_load", "workout_types"}, ...]
+        Raises ValueError for an unknown bucket or an invalid/oversized range.
+    """
+    if bucket not in ACTIVITY_BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'. Available: {', '.join(ACTIVITY_BUCKETS)}")
+    if start > end:
+        raise ValueError("start must be on or before end")
+    if (end - start).days + 1 > MAX_ACTIVITY_DAYS:
+        raise ValueError(f"Range exceeds {MAX_ACTIVITY_DAYS} days")
+
+    dialect = db.get_bind().dialect.name
+    rows = db.execute(activity_statement(dialect, user_id, start, end, bucket)).all()
+
+    by_period = {}
+    for period, count, duration, distance, load, active_days, types, other_types in rows:
+        if not isinstance(period, date):
+            period = date.fromisoformat(period)  # SQLite date() returns text
+        by_period[period] = (count, duration, distance, load, active_days, types, other_types)
+
+    result = []
+    period = bucket_start(start, bucket)
+    while period <= end:
+        count, duration, distance, load, active_days, types, other_types = by_period.get(
+            period, (0, 0.0, 0.0, 0.0, 0, 0, None)
+        )
+        result.append({
+            "period_start": period,
+            "workout_count": count,
+            "active_days": active_days,
+            "duration": round(duration, 1),
+            "distance": round(distance, 2),
+            "training_load": round(load, 1),
+            "workout_types": types_from_bitmap(types or 0, other_types),
+        })
+        period = _next_bucket(period, bucket)
+    return result
@@ -5,30 +5,76 @@ This module uses a multi-agent workflow to generate personalized workout recomme
 1. Data Analyzer - Analyzes training metrics and identifies patterns
 2. Coach - Creates workout recommendations based on analysis
 3. Validator - Ensures recommendations are safe and appropriate
+
+The graph is compiled once per process and its nodes are async, so a
+recommendation waiting on the LLM holds neither a thread nor a database
+connection.
+
+stream_workout_recommendation runs the same graph and yields its progress
+as Server-Sent Events: node start/finish markers, analysis tokens as they
+are generated, the recommendation once parsed and the validation verdict.
+
+Both return today's stored recommendation instead of running the graph
+when its inputs are unchanged (see recommendation_reuse.py), and otherwise
+serve another athlete's recommendation for the same profile and training
+state when one is cached (see recommendation_cache.py). While that cache is
+enabled the prompts name neither the athlete nor their figures: the model
+writes placeholder tokens ({athlete}, {ctl}, ...) that are filled in for
+whoever the output is served to. With RECOMMENDATION_CACHE_SIZE=0 the
+prompts are the plain ones.
 """
 
-import os
-from typing import TypedDict, Annotated, List, Dict
+import asyncio
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Optional, Tuple, TypedDict, Annotated, List, Dict
 from datetime import date
 import json
 
-from openai import OpenAI
+from fastapi.concurrency import run_in_threadpool
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 from sqlalchemy.orm import Session
 
-from app.routes.config import settings
-from app.services.training_engine import get_training_metrics
-from app.models.user import User
+from app.database import SessionLocal
+from app.services.llm_gateway import llm_gateway
+from app.services.metrics_cache import get_cached_training_metrics
+from app.services.recommendation_cache import (
+    TokenRenderer,
+    placeholder_values,
+    recommendation_cache,
+    render,
+    render_output,
+    render_recommendation,
+)
+from app.services.recommendation_reuse import find_reusable, input_fingerprint, reuse_stats, stored_output
 from app.models.recommendation import Recommendation
 
+logger = logging.getLogger(__name__)
+
+STREAM_ERROR_DETAIL = "Could not generate a recommendation. Please try again."
+
+# Shared by the placeholder prompts; the tokens are filled in by recommendation_cache.render_output
+WRITING_RULES = """WRITING RULES:
+- Refer to the athlete only as {athlete}
+- Quote a metric only through its token, never as a number: {ctl}, {atl}, {tsb},
+  {recovery_score}, {weekly_training_load} (they are filled in later)
+
+"""
+VALIDATION_WRITING_RULE = """ Refer to the athlete as {athlete} and quote
+metrics as {recovery_score} or {tsb}, never as numbers."""
+
+# Workflows behind /recommend/stream keep running after a client disconnects
+_background_streams = set()
+
+
+def _placeholder_prompts() -> bool:
+    """Outputs only need placeholder tokens when they may be served to another athlete."""
+    return recommendation_cache.max_entries > 0
 
-# Initialize Fireworks client with OpenAI SDK
-def get_fireworks_client():
-    """Get Fireworks AI client using OpenAI SDK"""
-    return OpenAI(
-        api_key=settings.FIREWORKS_API_KEY,
-        base_url=settings.FIREWORKS_BASE_URL
-    )
+
+def _figure(label: str, token: str, value, placeholders: bool) -> str:
+    return f"{label} {{{token}}}: {value}" if placeholders else f"{label}: {value}"
 
 
 class RecommendationState(TypedDict):
@@ -41,30 +87,29 @@ class RecommendationState(TypedDict):
     final_output: Dict
 
 
-def analyze_training_data(state: RecommendationState) -> RecommendationState:
+async def analyze_training_data(state: RecommendationState) -> RecommendationState:
     """
     Step 1: Analyze user's training data and metrics
     """
-    client = get_fireworks_client()
-    
     user_profile = state["user_profile"]
     metrics = state["training_metrics"]
+    tokens = _placeholder_prompts()
     
     # Create analysis prompt
     prompt = f"""You are an expert endurance sports coach analyzing an athlete's training data.
 
 ATHLETE PROFILE:
-- Name: {user_profile['name']}
+- Name: {'{athlete}' if tokens else user_profile['name']}
 - Sport: {user_profile['sport']}
 - Experience: {user_profile['experience_level']}
 - Goal: {user_profile['goal']}
 
-CURRENT TRAINING METRICS:
-- Fitness (CTL): {metrics['fitness']['ctl']}
-- Fatigue (ATL): {metrics['fatigue']['atl']}
-- Form (TSB): {metrics['form']['tsb']} - {metrics['form']['status']}
-- Recovery Score: {metrics['recovery']['recovery_score']}% - {metrics['recovery']['recommendation']}
-- Weekly Training Load: {metrics['weekly_training_load']}
+CURRENT TRAINING METRICS{' (token: value)' if tokens else ''}:
+- {_figure('Fitness (CTL)', 'ctl', metrics['fitness']['ctl'], tokens)}
+- {_figure('Fatigue (ATL)', 'atl', metrics['fatigue']['atl'], tokens)}
+- {_figure('Form (TSB)', 'tsb', metrics['form']['tsb'], tokens)} - {metrics['form']['status']}
+- {_figure('Recovery Score', 'recovery_score', metrics['recovery']['recovery_score'], tokens)}% - {metrics['recovery']['recommendation']}
+- {_figure('Weekly Training Load', 'weekly_training_load', metrics['weekly_training_load'], tokens)}
 
 ANALYSIS TASK:
 1. Assess the athlete's current training state
@@ -72,18 +117,16 @@ ANALYSIS TASK:
 3. Determine what type of training they need most
 4. Consider their experience level and goals
 
-Provide a concise 2-3 paragraph analysis."""
+{WRITING_RULES if tokens else ''}Provide a concise 2-3 paragraph analysis."""
 
+    # Tokens go to stream_workout_recommendation's listener (a no-op under ainvoke)
+    write = get_stream_writer()
     try:
-        response = client.chat.completions.create(
-            model=settings.FIREWORKS_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        analysis = response.choices[0].message.content
-        state["analysis"] = analysis
+        chunks = []
+        async for chunk in llm_gateway.astream("analyze", prompt, temperature=0.7, max_tokens=500):
+            chunks.append(chunk)
+            write({"node": "analyze", "text": chunk})
+        state["analysis"] = "".join(chunks)
         
     except Exception as e:
         state["analysis"] = f"Error in analysis: {str(e)}"
@@ -91,24 +134,23 @@ Provide a concise 2-3 paragraph analysis."""
     return state
 
 
-def generate_recommendation(state: RecommendationState) -> RecommendationState:
+async def generate_recommendation(state: RecommendationState) -> RecommendationState:
     """
     Step 2: Generate specific workout recommendation
     """
-    client = get_fireworks_client()
-    
     metrics = state["training_metrics"]
     analysis = state["analysis"]
     user_profile = state["user_profile"]
+    tokens = _placeholder_prompts()
     
     prompt = f"""Based on this analysis, create a specific workout recommendation.
 
 ANALYSIS:
 {analysis}
 
-CURRENT STATE:
-- Form (TSB): {metrics['form']['tsb']}
-- Recovery: {metrics['recovery']['recovery_score']}%
+CURRENT STATE{' (token: value)' if tokens else ''}:
+- {_figure('Form (TSB)', 'tsb', metrics['form']['tsb'], tokens)}
+- {_figure('Recovery', 'recovery_score', metrics['recovery']['recovery_score'], tokens)}%
 - Athlete Goal: {user_profile['goal']}
 
 Generate a workout recommendation in JSON format with these fields:
@@ -127,17 +169,10 @@ IMPORTANT:
 - Consider experience level (don't overload beginners)
 - Match workout to stated goal (marathon prep, base building, etc.)
 
-Return ONLY valid JSON, no additional text."""
+{WRITING_RULES if tokens else ''}Return ONLY valid JSON, no additional text."""
 
     try:
-        response = client.chat.completions.create(
-            model=settings.FIREWORKS_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=600
-        )
-        
-        recommendation_text = response.choices[0].message.content.strip()
+        recommendation_text = (await llm_gateway.acomplete("recommend", prompt, temperature=0.7, max_tokens=600)).strip()
         
         # Try to parse JSON (handle markdown code blocks)
         if "```json" in recommendation_text:
@@ -162,22 +197,21 @@ Return ONLY valid JSON, no additional text."""
     return state
 
 
-def validate_recommendation(state: RecommendationState) -> RecommendationState:
+async def validate_recommendation(state: RecommendationState) -> RecommendationState:
     """
     Step 3: Validate the recommendation for safety
     """
-    client = get_fireworks_client()
-    
     recommendation = state["recommendation"]
     metrics = state["training_metrics"]
     user_profile = state["user_profile"]
+    tokens = _placeholder_prompts()
     
     prompt = f"""You are a sports medicine expert. Review this workout recommendation for safety.
 
 ATHLETE:
 - Experience: {user_profile['experience_level']}
-- Current Recovery: {metrics['recovery']['recovery_score']}%
-- Form (TSB): {metrics['form']['tsb']}
+- {_figure('Current Recovery', 'recovery_score', metrics['recovery']['recovery_score'], tokens)}%
+- {_figure('Form (TSB)', 'tsb', metrics['form']['tsb'], tokens)}
 
 RECOMMENDED WORKOUT:
 - Type: {recommendation['workout_type']}
@@ -195,17 +229,10 @@ Respond with:
 - "ADJUST: <specific changes needed>" if needs modification
 - "REJECT: <reason>" if unsafe
 
-Keep response to 1-2 sentences."""
+Keep response to 1-2 sentences.{VALIDATION_WRITING_RULE if tokens else ''}"""
 
     try:
-        response = client.chat.completions.create(
-            model=settings.FIREWORKS_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=200
-        )
-        
-        validation = response.choices[0].message.content
+        validation = await llm_gateway.acomplete("validate", prompt, temperature=0.3, max_tokens=200)
         state["validation"] = validation
         
         # Apply adjustments if needed
@@ -262,51 +289,230 @@ def build_recommendation_workflow() -> StateGraph:
     return workflow.compile()
 
 
-def generate_workout_recommendation(db: Session, user: User) -> Dict:
+@lru_cache(maxsize=1)
+def get_recommendation_workflow():
+    """The compiled workflow, built on first use (main.py warms it at startup)."""
+    return build_recommendation_workflow()
+
+
+def build_initial_state(user, metrics: Dict) -> RecommendationState:
+    """Workflow input for a user (User or Principal) and their training metrics."""
+    return {
+        "user_profile": {
+            "name": user.name,
+            "sport": user.sport or "endurance sports",
+            "experience_level": user.experience_level or "intermediate",
+            "goal": user.goal or "general fitness"
+        },
+        "training_metrics": metrics,
+        "analysis": "",
+        "recommendation": {},
+        "validation": "",
+        "final_output": {}
+    }
+
+
+def _load_inputs(
+    session_factory: Callable[[], Session], user, force: bool
+) -> Tuple[RecommendationState, str, Optional[Dict]]:
+    """Workflow input, its fingerprint and the stored output to reuse (None when forced or not found)."""
+    db = session_factory()
+    try:
+        state = build_initial_state(user, get_cached_training_metrics(db, user.id))
+        fingerprint = input_fingerprint(state["user_profile"], state["training_metrics"], date.today())
+        stored = None if force else find_reusable(db, user.id, fingerprint)
+        return state, fingerprint, stored_output(stored) if stored is not None else None
+    finally:
+        db.close()
+
+
+def _save_recommendation(
+    session_factory: Callable[[], Session], user_id: int, final_output: Dict, fingerprint: str
+) -> None:
+    db = session_factory()
+    try:
+        db.add(Recommendation(
+            user_id=user_id,
+            date=date.today(),
+            recommendation_json=final_output["recommendation"],
+            reasoning_summary=final_output["analysis"],
+            validation=final_output["validation"],
+            # An error fallback is kept for the history but never reused
+            input_fingerprint=None if _workflow_failed(final_output) else fingerprint
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _workflow_failed(final_output: Dict) -> bool:
+    """True if a node fell back after an LLM error (such outputs are not shared)."""
+    return (
+        final_output["analysis"].startswith("Error in analysis:")
+        or final_output["validation"].startswith("Validation error:")
+        or "System error - defaulting to rest day" in final_output["recommendation"].get("warnings", [])
+    )
+
+
+def _placeholder_values(state: RecommendationState) -> Dict[str, str]:
+    return placeholder_values(state["user_profile"]["name"], state["training_metrics"])
+
+
+def _shared_output(state: RecommendationState) -> Optional[Dict]:
+    """Another athlete's cached output for the same profile and training state, rendered for this one."""
+    output = recommendation_cache.get(
+        recommendation_cache.key(state["user_profile"], state["training_metrics"]),
+        state["user_profile"]["name"],
+        state["training_metrics"]
+    )
+    if output is not None:
+        output["generated_date"] = date.today().isoformat()
+    return output
+
+
+def _share_output(state: RecommendationState, final_output: Dict) -> None:
+    """Offer a new, unrendered workflow output to the shared cache."""
+    if not _workflow_failed(final_output):
+        recommendation_cache.put(
+            recommendation_cache.key(state["user_profile"], state["training_metrics"]),
+            final_output,
+            state["training_metrics"]
+        )
+
+
+def format_sse(event: str, data) -> str:
+    """One Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def generate_workout_recommendation(
+    user, session_factory: Callable[[], Session] = SessionLocal, force: bool = False
+) -> Dict:
     """
     Generate a personalized workout recommendation using AI
     
+    The metrics read and the final insert each use a short session of their
+    own on the threadpool; no connection is held during the LLM calls.
+    
     Args:
-        db: Database session
-        user: User object
+        user: User or Principal
+        session_factory: Creates the sessions for the metrics read and the insert
+        force: Run the workflow even if a stored or shared recommendation fits
     
     Returns:
-        Dictionary with recommendation and analysis
+        Dictionary with recommendation and analysis; "reused" tells whether
+        it is the user's stored recommendation, "shared" whether it came
+        from the cross-athlete cache rather than a new workflow run
     """
-    # Get training metrics
-    metrics = get_training_metrics(db, user.id)
+    state, fingerprint, stored = await run_in_threadpool(_load_inputs, session_factory, user, force)
+    reuse_stats.record(hit=stored is not None, forced=force)
+    if stored is not None:
+        return {**stored, "reused": True, "shared": False}
     
-    # Prepare user profile
-    user_profile = {
-        "name": user.name,
-        "sport": user.sport or "endurance sports",
-        "experience_level": user.experience_level or "intermediate",
-        "goal": user.goal or "general fitness"
-    }
+    final_output = None if force else _shared_output(state)
+    shared = final_output is not None
+    if not shared:
+        final_output = (await get_recommendation_workflow().ainvoke(state))["final_output"]
+        _share_output(state, final_output)
+        final_output = render_output(final_output, _placeholder_values(state))
     
-    # Initialize state
-    initial_state = {
-        "user_profile": user_profile,
-        "training_metrics": metrics,
-        "analysis": "",
-        "recommendation": {},
-        "validation": "",
-        "final_output": {}
-    }
+    await run_in_threadpool(_save_recommendation, session_factory, user.id, final_output, fingerprint)
     
-    # Run workflow
-    workflow = build_recommendation_workflow()
-    result = workflow.invoke(initial_state)
+    return {**final_output, "reused": False, "shared": shared}
+
+
+async def _stream_events(
+    user, session_factory: Callable[[], Session], force: bool
+) -> AsyncIterator[str]:
+    try:
+        state, fingerprint, final_output = await run_in_threadpool(_load_inputs, session_factory, user, force)
+        reuse_stats.record(hit=final_output is not None, forced=force)
+        reused = final_output is not None
+        if not reused and not force:
+            final_output = _shared_output(state)
+        shared = not reused and final_output is not None
+        if final_output is not None:
+            yield format_sse("recommendation", final_output["recommendation"])
+            yield format_sse("validation", {
+                "validation": final_output["validation"], "recommendation": final_output["recommendation"]
+            })
+            if shared:
+                await run_in_threadpool(_save_recommendation, session_factory, user.id, final_output, fingerprint)
+            yield format_sse("done", {**final_output, "reused": reused, "shared": shared})
+            return
+        
+        values = _placeholder_values(state)
+        tokens = TokenRenderer(values)
+        async for mode, chunk in get_recommendation_workflow().astream(state, stream_mode=["tasks", "custom", "updates"]):
+            if mode == "custom":
+                text = tokens.feed(chunk["text"])
+                if text:
+                    yield format_sse("token", {**chunk, "text": text})
+            elif mode == "tasks":
+                if "input" not in chunk:
+                    text = tokens.flush()
+                    if text:
+                        yield format_sse("token", {"node": chunk["name"], "text": text})
+                yield format_sse("node_start" if "input" in chunk else "node_end", {"node": chunk["name"]})
+            elif "recommend" in chunk:
+                yield format_sse("recommendation", render_recommendation(chunk["recommend"]["recommendation"], values))
+            elif "validate" in chunk:
+                validated = chunk["validate"]
+                yield format_sse("validation", {
+                    "validation": render(validated["validation"], values),
+                    "recommendation": render_recommendation(validated["recommendation"], values)
+                })
+            elif "finalize" in chunk:
+                final_output = chunk["finalize"]["final_output"]
+        
+        _share_output(state, final_output)
+        final_output = render_output(final_output, values)
+        await run_in_threadpool(_save_recommendation, session_factory, user.id, final_output, fingerprint)
+    except Exception:
+        # Database and LLM errors stay in the log; the client gets a generic event
+        logger.exception("Streaming recommendation failed for user %s", user.id)
+        yield format_sse("error", {"detail": STREAM_ERROR_DETAIL})
+        return
     
-    # Save to database
-    recommendation_record = Recommendation(
-        user_id=user.id,
-        date=date.today(),
-        recommendation_json=result["final_output"]["recommendation"],
-        reasoning_summary=result["final_output"]["analysis"]
-    )
-    db.add(recommendation_record)
-    db.commit()
-    db.refresh(recommendation_record)
+    yield format_sse("done", {**final_output, "reused": False, "shared": False})
+
+
+async def _forward_events(events: AsyncIterator[str], queue: asyncio.Queue) -> None:
+    try:
+        async for frame in events:
+            queue.put_nowait(frame)
+    finally:
+        queue.put_nowait(None)
+
+
+async def stream_workout_recommendation(
+    user, session_factory: Callable[[], Session] = SessionLocal, force: bool = False
+) -> AsyncIterator[str]:
+    """
+    generate_workout_recommendation as a stream of Server-Sent Events
+    
+    Events, in order:
+    - node_start / node_end: {"node": name} around each workflow step
+    - token: {"node": "analyze", "text": delta} while the analysis is generated
+    - recommendation: the parsed workout, as soon as the coach step finishes
+    - validation: {"validation": verdict, "recommendation": workout after any adjustment}
+    - done: the /recommend body, sent after it has been saved to recommendations
+    - error: {"detail": STREAM_ERROR_DETAIL} if the workflow or the save fails
+      (the exception is logged)
     
-    return result["final_output"]
+    A stored or shared recommendation sends recommendation, validation and
+    done at once.
+    
+    The workflow runs in a background task that this generator only relays,
+    so a client disconnecting mid-stream does not cancel it: the LLM calls
+    already paid for still end in a saved recommendation.
+    """
+    queue = asyncio.Queue()
+    task = asyncio.create_task(_forward_events(_stream_events(user, session_factory, force), queue))
+    _background_streams.add(task)
+    task.add_done_callback(_background_streams.discard)
+    while True:
+        frame = await queue.get()
+        if frame is None:
+            return
+        yield frame
@@ -0,0 +1,229 @@
+"""
+Batch Metrics - Cohort-wide CTL/ATL/TSB and recovery recompute
+
+Nightly job for reporting and pre-warming, replacing N users x per-user
+get_training_metrics calls:
+1. Stream every user's daily training loads and recent sleep logs in
+   user-id order through server-side cursors (three queries in total)
+2. Shard users across a ProcessPoolExecutor; workers run the same math
+   as the request path (compute_state_rows + TrainingSnapshot)
+3. Bulk-write daily_training_state and metrics_snapshots per shard
+
+Every user is streamed with users.metrics_version, which request writes
+bump first in their transaction. A shard write locks its users' rows and
+skips any user whose version moved since the stream read (a workout or
+sleep log committed meanwhile): their state, maintained incrementally by
+that write, is left as it is. Written users get their version bumped, so
+API workers drop their cached metrics.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+from datetime import date, timedelta
+from itertools import groupby
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.training_state import DailyTrainingState
+from app.models.metrics_snapshot import MetricsSnapshot
+from app.services.training_engine import TrainingSnapshot, ATL_TIME_CONSTANT, RECOVERY_SLEEP_DAYS
+from app.services.training_state import compute_state_rows
+from app.services.metrics_cache import bump_metrics_version
+
+STREAM_BATCH_SIZE = 5000  # rows fetched per server-side cursor round trip
+
+# (user_id, metrics_version, [(date, daily_load), ...], [(hours, quality_score), ...])
+UserHistory = Tuple[int, int, List[Tuple[date, float]], List[Tuple[float, int]]]
+
+
+def _stream(db: Session, statement):
+    return db.execute(statement.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE))
+
+
+def _grouped_by_user(rows) -> Iterator[Tuple[int, List[tuple]]]:
+    for user_id, group in groupby(rows, key=lambda row: row[0]):
+        yield user_id, [tuple(row[1:]) for row in group]
+
+
+def stream_user_histories(db: Session, as_of: date) -> Iterator[UserHistory]:
+    """
+    Stream (user_id, metrics_version, daily loads, recent sleep) for every user in user-id order.
+
+    Daily loads are summed per day in SQL; sleep is limited to the nights
+    the recovery score looks at. The three ordered streams are merged on user_id.
+    """
+    users = _stream(db, select(User.id, User.metrics_version).order_by(User.id))
+    loads = _grouped_by_user(_stream(db, select(
+        Workout.user_id,
+        Workout.date,
+        func.sum(func.coalesce(Workout.training_load_score, 0.0))
+    ).group_by(Workout.user_id, Workout.date).order_by(Workout.user_id, Workout.date)))
+    sleep = _grouped_by_user(_stream(db, select(
+        SleepLog.user_id,
+        SleepLog.hours,
+        SleepLog.quality_score
+    ).where(
+        SleepLog.date >= as_of - timedelta(days=RECOVERY_SLEEP_DAYS - 1),
+        SleepLog.date <= as_of
+    ).order_by(SleepLog.user_id, SleepLog.date.desc())))
+
+    streams = [loads, sleep]
+    heads = [next(stream, None) for stream in streams]
+    for user_id, version in users:
+        history = []
+        for index, stream in enumerate(streams):
+            while heads[index] is not None and heads[index][0] < user_id:
+                heads[index] = next(stream, None)
+            if heads[index] is not None and heads[index][0] == user_id:
+                history.append(heads[index][1])
+                heads[index] = next(stream, None)
+            else:
+                history.append([])
+        yield (user_id, version, *history)
+
+
+def compute_shard_metrics(shard: List[UserHistory], as_of: date) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Worker entry point: training state rows and metrics snapshot rows for a shard.
+
+    Pure function over plain tuples so it can run in a separate process.
+    """
+    state_rows, snapshots = [], []
+    for user_id, _, daily, sleep in shard:
+        rows = compute_state_rows(user_id, daily)
+        state_rows.extend(rows)
+
+        recent = [SimpleNamespace(**row) for row in reversed(rows) if row["date"] <= as_of][:ATL_TIME_CONSTANT]
+        sleep_logs = [SimpleNamespace(hours=hours, quality_score=quality) for hours, quality in sleep[:RECOVERY_SLEEP_DAYS]]
+        metrics = TrainingSnapshot(user_id, as_of, recent, sleep_logs).metrics()
+
+        snapshots.append({
+            "user_id": user_id,
+            "date": as_of,
+            "ctl": metrics["fitness"]["ctl"],
+            "atl": metrics["fatigue"]["atl"],
+            "tsb": metrics["form"]["tsb"],
+            "recovery_score": metrics["recovery"]["recovery_score"],
+            "weekly_training_load": metrics["weekly_training_load"],
+        })
+    return state_rows, snapshots
+
+
+def _write_shard(
+    db: Session, versions: Dict[int, int], state_rows: List[Dict], snapshots: List[Dict], as_of: date
+) -> int:
+    """Write a shard's rows for the users unchanged since they were streamed. Returns the number skipped."""
+    # Row locks in id order: writes for these users wait for this commit, or this waits for theirs
+    current = dict(db.execute(
+        select(User.id, User.metrics_version)
+        .where(User.id.in_(list(versions)))
+        .order_by(User.id)
+        .with_for_update()
+    ).all())
+    fresh = [user_id for user_id, version in versions.items() if current.get(user_id) == version]
+    if fresh:
+        keep = set(fresh)
+        state_rows = [row for row in state_rows if row["user_id"] in keep]
+        snapshots = [row for row in snapshots if row["user_id"] in keep]
+        db.execute(delete(DailyTrainingState).where(DailyTrainingState.user_id.in_(fresh)))
+        if state_rows:
+            db.execute(insert(DailyTrainingState), state_rows)
+        db.execute(delete(MetricsSnapshot).where(
+            MetricsSnapshot.user_id.in_(fresh),
+            MetricsSnapshot.date == as_of
+        ))
+        if snapshots:
+            db.execute(insert(MetricsSnapshot), snapshots)
+        bump_metrics_version(db, fresh)
+    db.commit()
+    return len(versions) - len(fresh)
+
+
+def _shards(histories: Iterator[UserHistory], shard_size: int) -> Iterator[List[UserHistory]]:
+    shard = []
+    for history in histories:
+        shard.append(history)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def recompute_all_metrics(
+    session_factory: Callable[[], Session] = SessionLocal,
+    workers: Optional[int] = None,
+    shard_size: int = 500,
+    as_of: Optional[date] = None,
+    progress: Optional[Callable[[int, float], None]] = None
+) -> Dict[str, float]:
+    """
+    Recompute training state and metrics for every user.
+
+    Args:
+        session_factory: Creates sessions (one streams, one writes)
+        workers: Worker processes (default: CPU count)
+        shard_size: Users per worker task
+        as_of: Day the metrics are computed for (default today)
+        progress: Called with (users_done, elapsed_seconds) after each shard is written
+
+    Returns:
+        {"users", "skipped", "shards", "seconds", "users_per_sec"}; skipped
+        users were written to during the run and keep their incremental state
+    """
+    as_of = as_of or date.today()
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers  # bounds memory held by pending shards
+
+    read_db = session_factory()
+    write_db = session_factory()
+    started = time.perf_counter()
+    users_done = 0
+    skipped = 0
+    shards = 0
+
+    def collect(in_flight: Dict, return_when: str) -> None:
+        nonlocal users_done, skipped
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            versions = in_flight.pop(future)
+            state_rows, snapshots = future.result()
+            skipped += _write_shard(write_db, versions, state_rows, snapshots, as_of)
+            users_done += len(versions)
+            if progress:
+                progress(users_done, time.perf_counter() - started)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            for shard in _shards(stream_user_histories(read_db, as_of), shard_size):
+                future = pool.submit(compute_shard_metrics, shard, as_of)
+                in_flight[future] = {user_id: version for user_id, version, _, _ in shard}
+                shards += 1
+                if len(in_flight) >= max_in_flight:
+                    collect(in_flight, FIRST_COMPLETED)
+            if in_flight:
+                collect(in_flight, ALL_COMPLETED)
+    except Exception:
+        write_db.rollback()
+        raise
+    finally:
+        read_db.close()
+        write_db.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "users": users_done,
+        "skipped": skipped,
+        "shards": shards,
+        "seconds": round(elapsed, 2),
+        "users_per_sec": round(users_done / elapsed, 1) if elapsed > 0 else 0.0
+    }
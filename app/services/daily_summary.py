@@ -0,0 +1,237 @@
+"""
+Daily Summary - Per-user daily rollup maintained on write
+
+daily_user_summary holds one row per user per day with workout, sleep and
+nutrition totals:
+- Every log write upserts the day's row in the same transaction
+  (INSERT ... ON CONFLICT DO UPDATE adding to the totals)
+- Workout types are kept as a bitmap (OR-ed on upsert), so distinct types
+  per day or per bucket need no raw rows; names outside the standard five
+  set the "other" bit and are kept as logged in other_workout_types
+- Bulk paths pre-aggregate per day and upsert a batch in one statement
+- rebuild_daily_summary recomputes a user's rows from the raw tables
+  (re-scoring, repairs)
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func, literal, select, delete
+from sqlalchemy.orm import Session
+
+from app.models.daily_summary import DailyUserSummary
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.nutrition_log import NutritionLog
+
+WORKOUT_TYPE_BITS = {
+    "easy": 1,
+    "tempo": 2,
+    "interval": 4,
+    "long": 8,
+    "race": 16,
+}
+OTHER_WORKOUT_BIT = 32  # any type outside the standard five
+OTHER_TYPES_SEPARATOR = "\n"  # joins the names behind OTHER_WORKOUT_BIT in other_workout_types
+UPSERT_BATCH_SIZE = 1000  # days per INSERT ... ON CONFLICT statement (bind parameter limits)
+
+SUMMED_COLUMNS = [
+    "workout_count", "workout_duration", "workout_distance", "training_load",
+    "sleep_count", "sleep_hours", "sleep_quality",
+    "nutrition_count", "calories", "protein", "carbs", "fats",
+]
+
+
+def workout_type_bit(workout_type: str) -> int:
+    return WORKOUT_TYPE_BITS.get((workout_type or "").lower(), OTHER_WORKOUT_BIT)
+
+
+def split_other_types(other_types: Optional[str]) -> List[str]:
+    """Distinct, sorted names from one or more joined other_workout_types values."""
+    return sorted({name for name in (other_types or "").split(OTHER_TYPES_SEPARATOR) if name})
+
+
+def merge_other_types(*values: Optional[str]) -> str:
+    return OTHER_TYPES_SEPARATOR.join(split_other_types(OTHER_TYPES_SEPARATOR.join(v or "" for v in values)))
+
+
+def types_from_bitmap(bitmap: int, other_types: Optional[str] = "") -> List[str]:
+    """
+    Workout type names for a bitmap and its other_workout_types.
+
+    Non-standard types come back under their logged names; "other" only
+    stands in for rows that predate other_workout_types.
+    """
+    types = [name for name, bit in WORKOUT_TYPE_BITS.items() if bitmap & bit]
+    if bitmap & OTHER_WORKOUT_BIT:
+        types.extend(split_other_types(other_types) or ["other"])
+    return types
+
+
+def workout_totals(workout) -> Dict:
+    bit = workout_type_bit(workout.workout_type)
+    return {
+        "workout_count": 1,
+        "workout_duration": workout.duration or 0.0,
+        "workout_distance": workout.distance or 0.0,
+        "training_load": workout.training_load_score or 0.0,
+        "workout_types": bit,
+        "other_workout_types": (workout.workout_type or "") if bit == OTHER_WORKOUT_BIT else "",
+    }
+
+
+def sleep_totals(sleep_log) -> Dict:
+    return {"sleep_count": 1, "sleep_hours": sleep_log.hours, "sleep_quality": sleep_log.quality_score}
+
+
+def nutrition_totals(nutrition_log) -> Dict:
+    return {
+        "nutrition_count": 1,
+        "calories": nutrition_log.calories,
+        "protein": nutrition_log.protein,
+        "carbs": nutrition_log.carbs,
+        "fats": nutrition_log.fats,
+    }
+
+
+def _dialect_insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _merged_other_types(db: Session, existing, added):
+    """SQL for appending `added` names to a stored other_workout_types, skipping a name already there."""
+    position = func.strpos if db.get_bind().dialect.name == "postgresql" else func.instr
+    separator = literal(OTHER_TYPES_SEPARATOR)
+    return case(
+        (added == "", existing),
+        (existing == "", added),
+        (position(separator + existing + separator, separator + added + separator) > 0, existing),
+        else_=existing + separator + added
+    )
+
+
+def upsert_daily_totals(db: Session, user_id: int, totals: Iterable[tuple]) -> None:
+    """
+    Add (date, totals dict) pairs to a user's daily rows in one statement.
+
+    Totals for the same date are merged first (one VALUES row per key).
+    Call inside the caller's transaction.
+    """
+    merged = defaultdict(dict)
+    for day, values in totals:
+        row = merged[day]
+        for column, value in values.items():
+            if column == "workout_types":
+                row[column] = row.get(column, 0) | value
+            elif column == "other_workout_types":
+                row[column] = merge_other_types(row.get(column), value)
+            else:
+                row[column] = row.get(column, 0) + value
+    if not merged:
+        return
+
+    rows = []
+    for day, values in merged.items():
+        row = {column: 0 for column in SUMMED_COLUMNS}
+        row.update({"user_id": user_id, "date": day, "workout_types": 0, "other_workout_types": ""})
+        row.update(values)
+        rows.append(row)
+
+    table = DailyUserSummary.__table__
+    insert = _dialect_insert(db)
+    for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(table).values(rows[offset:offset + UPSERT_BATCH_SIZE])
+        update = {column: table.c[column] + statement.excluded[column] for column in SUMMED_COLUMNS}
+        update["workout_types"] = table.c.workout_types.op("|")(statement.excluded.workout_types)
+        update["other_workout_types"] = _merged_other_types(
+            db, table.c.other_workout_types, statement.excluded.other_workout_types
+        )
+        update["updated_at"] = func.now()
+        db.execute(statement.on_conflict_do_update(index_elements=["user_id", "date"], set_=update))
+
+
+def get_daily_summaries(db: Session, user_id: int, start: date, end: date) -> List[DailyUserSummary]:
+    """A user's summary rows in [start, end], oldest first (days without logs are absent)."""
+    return db.scalars(select(DailyUserSummary).where(
+        DailyUserSummary.user_id == user_id,
+        DailyUserSummary.date >= start,
+        DailyUserSummary.date <= end
+    ).order_by(DailyUserSummary.date)).all()
+
+
+def rebuild_daily_summary(db: Session, user_id: int) -> int:
+    """
+    Recompute a user's rollup from the workouts, sleep and nutrition tables.
+
+    Three GROUP BY queries, one for the non-standard type names and one
+    batched upsert. Returns the number of days.
+    """
+    db.execute(delete(DailyUserSummary).where(DailyUserSummary.user_id == user_id))
+
+    # Bitmap of the day's types without bit_or (not on SQLite): one MAX per bit
+    workout_type = func.lower(Workout.workout_type)
+    type_bits = [
+        func.max(case((workout_type == name, bit), else_=0)) for name, bit in WORKOUT_TYPE_BITS.items()
+    ] + [func.max(case((workout_type.in_(list(WORKOUT_TYPE_BITS)), 0), else_=OTHER_WORKOUT_BIT))]
+
+    totals = []
+    workout_days = db.execute(select(
+        Workout.date,
+        func.count(),
+        func.sum(Workout.duration),
+        func.sum(func.coalesce(Workout.distance, 0.0)),
+        func.sum(func.coalesce(Workout.training_load_score, 0.0)),
+        *type_bits
+    ).where(Workout.user_id == user_id).group_by(Workout.date)).all()
+    other_types = defaultdict(list)
+    for day, name in db.execute(select(Workout.date, Workout.workout_type).where(
+        Workout.user_id == user_id,
+        workout_type.not_in(list(WORKOUT_TYPE_BITS))
+    ).distinct()):
+        other_types[day].append(name or "")
+    for day, count, duration, distance, load, *bits in workout_days:
+        totals.append((day, {
+            "workout_count": count, "workout_duration": duration, "workout_distance": distance,
+            "training_load": load, "workout_types": sum(bits),
+            "other_workout_types": merge_other_types(*other_types[day]),
+        }))
+
+    sleep_days = db.execute(select(
+        SleepLog.date, func.count(), func.sum(SleepLog.hours), func.sum(SleepLog.quality_score)
+    ).where(SleepLog.user_id == user_id).group_by(SleepLog.date)).all()
+    totals.extend((day, {"sleep_count": count, "sleep_hours": hours, "sleep_quality": quality})
+                  for day, count, hours, quality in sleep_days)
+
+    nutrition_days = db.execute(select(
+        NutritionLog.date, func.count(), func.sum(NutritionLog.calories), func.sum(NutritionLog.protein),
+        func.sum(NutritionLog.carbs), func.sum(NutritionLog.fats)
+    ).where(NutritionLog.user_id == user_id).group_by(NutritionLog.date)).all()
+    totals.extend((day, {"nutrition_count": count, "calories": calories, "protein": protein,
+                         "carbs": carbs, "fats": fats})
+                  for day, count, calories, protein, carbs, fats in nutrition_days)
+
+    upsert_daily_totals(db, user_id, totals)
+    return len({day for day, _ in totals})
+
+
+def summary_to_dict(summary: DailyUserSummary) -> Dict:
+    """API shape of a summary row: type names instead of the bitmap, average sleep quality."""
+    return {
+        "date": summary.date,
+        "workout_count": summary.workout_count,
+        "workout_duration": round(summary.workout_duration, 1),
+        "workout_distance": round(summary.workout_distance, 2),
+        "training_load": round(summary.training_load, 1),
+        "workout_types": types_from_bitmap(summary.workout_types, summary.other_workout_types),
+        "sleep_hours": round(summary.sleep_hours, 2) if summary.sleep_count else None,
+        "sleep_quality": round(summary.sleep_quality / summary.sleep_count, 1) if summary.sleep_count else None,
+        "calories": summary.calories if summary.nutrition_count else None,
+        "protein": summary.protein if summary.nutrition_count else None,
+        "carbs": summary.carbs if summary.nutrition_count else None,
+        "fats": summary.fats if summary.nutrition_count else None,
+    }
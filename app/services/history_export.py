@@ -0,0 +1,119 @@
+"""
+History Export - Streaming NDJSON / CSV export of a user's full history
+
+Workouts, sleep logs, nutrition logs and recommendations, oldest first:
+- Rows come off a server-side cursor (yield_per), so memory stays flat
+  whatever the history length
+- Serialized into ~64 KB chunks, optionally gzip-compressed on the fly
+- The generator opens its own session: the request's session dependency
+  is closed before a streaming response body is sent
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Callable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.nutrition_log import NutritionLog
+from app.models.recommendation import Recommendation
+
+EXPORT_BATCH_SIZE = 1000  # rows per server-side cursor fetch
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# kind -> (model, exported columns)
+EXPORT_KINDS = {
+    "workouts": (Workout, ["id", "date", "distance", "duration", "avg_hr", "workout_type",
+                           "notes", "training_load_score", "created_at"]),
+    "sleep": (SleepLog, ["id", "date", "hours", "quality_score", "created_at"]),
+    "nutrition": (NutritionLog, ["id", "date", "calories", "protein", "carbs", "fats", "created_at"]),
+    "recommendations": (Recommendation, ["id", "date", "recommendation_json", "reasoning_summary", "created_at"]),
+}
+
+
+def check_export(kind: str, fmt: str) -> None:
+    """Raises ValueError for an unknown kind or format."""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind '{kind}'. Available: {', '.join(EXPORT_KINDS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(EXPORT_FORMATS)}")
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return "" if value is None else value
+
+
+def iter_export_rows(db: Session, user_id: int, kind: str) -> Iterator[tuple]:
+    model, columns = EXPORT_KINDS[kind]
+    statement = select(*[getattr(model, column) for column in columns]).where(
+        model.user_id == user_id
+    ).order_by(model.date, model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    yield from db.execute(statement)
+
+
+def stream_export(
+    user_id: int,
+    kind: str,
+    fmt: str,
+    compress: bool = False,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Iterator[bytes]:
+    """
+    Generate the export body in chunks.
+
+    Args:
+        user_id: Owner of the rows
+        kind: workouts, sleep, nutrition or recommendations
+        fmt: ndjson or csv (CSV starts with a header row)
+        compress: gzip the output stream
+        session_factory: Creates the session the generator reads with
+    """
+    check_export(kind, fmt)
+    columns = EXPORT_KINDS[kind][1]
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    if writer:
+        writer.writerow(columns)
+
+    db = session_factory()
+    try:
+        for row in iter_export_rows(db, user_id, kind):
+            if writer:
+                writer.writerow([_csv_value(value) for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=_json_value))
+                buffer.write("\n")
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+    finally:
+        db.close()
+
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
@@ -0,0 +1,233 @@
+"""
+History Import - Bulk CSV / NDJSON upload of workouts, sleep and nutrition
+
+For athletes bringing years of history from another platform:
+1. Parse the upload as a stream (csv.DictReader / one JSON object per
+   line over the spooled upload file), never the whole file in memory
+2. Validate each row with the same schema as the single-row endpoints,
+   collecting per-row errors instead of failing the request; a file the
+   CSV reader cannot parse at all is rejected (ValueError)
+3. Skip rows the user already has (same IMPORT_DEDUPE_KEYS values, e.g.
+   date, type and duration for workouts), so re-uploading an export does
+   not double-count it; repeats within one upload are kept
+4. Score workouts in batches with the user's load model (score_batch)
+5. Insert batches with multi-row INSERTs, all in one transaction, and
+   upsert the batch's per-day totals into the daily rollup
+6. Rebuild the materialized training state once at the end
+
+Header names / JSON keys match the /log-* request bodies.
+"""
+
+import csv
+import io
+import json
+import time
+from types import SimpleNamespace
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.workout import Workout
+from app.models.sleep_log import SleepLog
+from app.models.nutrition_log import NutritionLog
+from app.routes.schemas import WorkoutCreate, SleepLogCreate, NutritionLogCreate
+from app.services.daily_summary import nutrition_totals, sleep_totals, upsert_daily_totals, workout_totals
+from app.services.load_models import HeartRateProfile, get_user_load_model
+from app.services.training_state import rebuild_training_state
+from app.services.metrics_cache import bump_metrics_version
+
+IMPORT_BATCH_SIZE = 5000  # rows per multi-row INSERT
+MAX_IMPORT_ROWS = 200000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# kind -> (row schema, model)
+IMPORT_KINDS = {
+    "workouts": (WorkoutCreate, Workout),
+    "sleep": (SleepLogCreate, SleepLog),
+    "nutrition": (NutritionLogCreate, NutritionLog),
+}
+# kind -> columns that identify a row the user already has
+IMPORT_DEDUPE_KEYS = {
+    "workouts": ("date", "workout_type", "duration"),
+    "sleep": ("date", "hours", "quality_score"),
+    "nutrition": ("date", "calories", "protein", "carbs", "fats"),
+}
+# kind -> daily rollup totals for one row
+IMPORT_TOTALS = {
+    "workouts": workout_totals,
+    "sleep": sleep_totals,
+    "nutrition": nutrition_totals,
+}
+
+
+def detect_format(filename: str, content_type: str = "") -> str:
+    """csv or ndjson from the upload's filename / content type. Raises ValueError."""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    raise ValueError("Cannot tell the file format; use a .csv or .ndjson file or pass format=csv|ndjson")
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Yield (line number, row dict) from a binary stream, or (line, error message)
+    for lines that cannot be parsed at all.
+
+    Raises ValueError if the CSV itself is malformed (e.g. NUL bytes, an
+    oversized field), since the reader cannot resynchronize after that.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        try:
+            for row in reader:
+                # Empty CSV cells mean "not provided" (optional fields)
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+        except csv.Error as e:
+            raise ValueError(f"Cannot read the CSV file at line {reader.line_num}: {e}")
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"Invalid JSON: {e.msg}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+def _last_existing_id(db: Session, user: User, kind: str) -> int:
+    """Highest id the user has for kind before the import (0 if none)."""
+    model = IMPORT_KINDS[kind][1]
+    return db.scalar(select(func.max(model.id)).where(model.user_id == user.id)) or 0
+
+
+def _drop_existing(db: Session, user: User, kind: str, rows: List[Dict], last_id: int) -> List[Dict]:
+    """rows minus those matching a row the user had before the import (id <= last_id)."""
+    if not last_id or not rows:
+        return rows
+    model = IMPORT_KINDS[kind][1]
+    keys = IMPORT_DEDUPE_KEYS[kind]
+    dates = [row["date"] for row in rows]
+    existing = set(db.execute(select(*[getattr(model, key) for key in keys]).where(
+        model.user_id == user.id,
+        model.id <= last_id,
+        model.date >= min(dates),
+        model.date <= max(dates)
+    )).all())
+    return [row for row in rows if tuple(row[key] for key in keys) not in existing]
+
+
+def _insert_batch(db: Session, user: User, kind: str, rows: List[Dict]) -> None:
+    model = IMPORT_KINDS[kind][1]
+    if kind == "workouts":
+        scores = get_user_load_model(user).score_batch(
+            [row["duration"] for row in rows],
+            [row["workout_type"] for row in rows],
+            [row["avg_hr"] for row in rows],
+            HeartRateProfile.from_user(user)
+        )
+        for row, score in zip(rows, scores):
+            row["training_load_score"] = float(score)
+    for row in rows:
+        row["user_id"] = user.id
+    db.execute(insert(model.__table__), rows)
+    upsert_daily_totals(db, user.id, [(row["date"], IMPORT_TOTALS[kind](SimpleNamespace(**row))) for row in rows])
+
+
+def _import_batch(db: Session, user: User, kind: str, rows: List[Dict], last_id: int) -> int:
+    """Insert the rows the user does not already have; returns how many were inserted."""
+    rows = _drop_existing(db, user, kind, rows, last_id)
+    if rows:
+        _insert_batch(db, user, kind, rows)
+    return len(rows)
+
+
+def import_history(db: Session, user: User, kind: str, stream: BinaryIO, fmt: str) -> Dict:
+    """
+    Import one upload for a user in a single transaction.
+
+    Args:
+        db: Session; committed on success, rolled back on failure
+        user: Owner of the imported rows
+        kind: workouts, sleep or nutrition
+        stream: Binary file object (e.g. UploadFile.file)
+        fmt: csv or ndjson
+
+    Returns:
+        {"kind", "imported", "duplicates", "failed", "errors", "seconds", "rows_per_sec"};
+        duplicates counts valid rows skipped because the user already had
+        them; errors lists {"line", "error"} for up to MAX_REPORTED_ERRORS
+        bad rows.
+        Raises ValueError for an unknown kind/format, an unreadable CSV or
+        an oversized upload.
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Unknown import kind '{kind}'. Available: {', '.join(IMPORT_KINDS)}")
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(IMPORT_FORMATS)}")
+
+    schema = IMPORT_KINDS[kind][0]
+    started = time.perf_counter()
+    imported, duplicates, failed, errors, batch = 0, 0, 0, [], []
+
+    try:
+        # Cached metrics in every process go stale with this commit
+        bump_metrics_version(db, [user.id])
+        last_id = _last_existing_id(db, user, kind)
+        for line_number, row in iter_rows(stream, fmt):
+            if imported + duplicates + failed + len(batch) >= MAX_IMPORT_ROWS:
+                raise ValueError(f"Upload exceeds {MAX_IMPORT_ROWS} rows; split the file")
+            try:
+                if isinstance(row, str):
+                    raise ValueError(row)
+                batch.append(schema.model_validate(row).model_dump())
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    message = _error_message(e) if isinstance(e, ValidationError) else str(e)
+                    errors.append({"line": line_number, "error": message})
+                continue
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                inserted = _import_batch(db, user, kind, batch, last_id)
+                imported += inserted
+                duplicates += len(batch) - inserted
+                batch = []
+
+        if batch:
+            inserted = _import_batch(db, user, kind, batch, last_id)
+            imported += inserted
+            duplicates += len(batch) - inserted
+
+        if kind == "workouts" and imported:
+            # Imports are mostly back-dated; one rebuild beats a per-row recompute
+            rebuild_training_state(db, user.id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "imported": imported,
+        "duplicates": duplicates,
+        "failed": failed,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(imported / elapsed, 1) if elapsed > 0 else 0.0
+    }
@@ -0,0 +1,379 @@
+"""
+LLM Gateway - One pooled, concurrency-limited client for every workflow node
+
+The recommendation workflow makes three chat completions per request. The
+gateway owns how they reach the model:
+- One long-lived OpenAI-compatible client (Fireworks) per process, with a
+  keep-alive HTTP connection pool, instead of a new client, connection pool
+  and TLS handshake per node per request
+- A cap on in-flight calls (LLM_MAX_CONCURRENCY) for sync callers and for
+  each event loop; callers beyond it wait for a slot
+- A per-call timeout, and bounded retries with exponential backoff and full
+  jitter on timeouts, connection errors, 429s and 5xx
+- Token and latency accounting per workflow node
+- Streaming completions (astream) for callers that forward tokens as they
+  arrive; a stream is only retried if it failed before its first token
+- Pluggable backends: LLM_BACKEND=stub answers locally with canned,
+  well-formed responses (optionally after LLM_STUB_LATENCY seconds), so
+  load tests need no network or API key
+
+Counters are per process.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+import httpx
+import openai
+
+from app.routes.config import settings
+
+RECENT_LATENCIES = 1024  # samples kept per node for percentiles
+RETRY_BASE_DELAY = 0.5  # seconds; attempt n waits up to base * 2**n
+RETRY_MAX_DELAY = 8.0
+
+
+class LLMResult(NamedTuple):
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMError(Exception):
+    """A call failed after all retries."""
+
+
+class OpenAICompatibleBackend:
+    """Chat completions over the OpenAI SDK, sharing one keep-alive connection pool."""
+
+    def __init__(self, api_key: str, base_url: str, model: str, timeout: float, max_connections: int):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                # The gateway retries; the SDK's own retries are disabled
+                self._client = openai.OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,
+                    timeout=self.timeout,
+                    http_client=httpx.Client(limits=self._limits(), timeout=self.timeout)
+                )
+            return self._client
+
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,
+                    timeout=self.timeout,
+                    http_client=httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+                )
+            return self._async_client
+
+    @staticmethod
+    def _result(response) -> LLMResult:
+        usage = response.usage
+        return LLMResult(
+            response.choices[0].message.content or "",
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0
+        )
+
+    def complete(self, node: str, messages: List[Dict], **options) -> LLMResult:
+        response = self.client().chat.completions.create(model=self.model, messages=messages, **options)
+        return self._result(response)
+
+    async def acomplete(self, node: str, messages: List[Dict], **options) -> LLMResult:
+        response = await self.async_client().chat.completions.create(model=self.model, messages=messages, **options)
+        return self._result(response)
+
+    async def astream(self, node: str, messages: List[Dict], **options) -> AsyncIterator[LLMResult]:
+        """Text deltas as LLMResults with zero tokens; the final usage arrives as an empty-text result."""
+        stream = await self.async_client().chat.completions.create(
+            model=self.model, messages=messages, stream=True, stream_options={"include_usage": True}, **options
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield LLMResult(chunk.choices[0].delta.content, 0, 0)
+            if chunk.usage:
+                yield LLMResult("", chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        return isinstance(error, (
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError
+        ))
+
+
+STUB_RESPONSES = {
+    "analyze": (
+        "The athlete's fitness and fatigue are close to balanced and recovery is adequate. "
+        "There are no red flags for overtraining or detraining. "
+        "An aerobic session at conversational effort fits their current state and goal."
+    ),
+    "recommend": json.dumps({
+        "workout_type": "easy",
+        "duration_minutes": 45,
+        "intensity": "low",
+        "description": "45 minutes at conversational pace, heart rate in zone 2.",
+        "reasoning": "Form and recovery support steady aerobic volume today.",
+        "warnings": []
+    }),
+    "validate": "APPROVED",
+}
+
+
+class StubBackend:
+    """Local canned responses per node, for load tests and development without network."""
+
+    def __init__(self, latency: float = 0.0, responses: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.responses = responses or STUB_RESPONSES
+
+    def _result(self, node: str, messages: List[Dict]) -> LLMResult:
+        text = self.responses.get(node, "OK")
+        prompt_words = sum(len(message["content"].split()) for message in messages)
+        return LLMResult(text, prompt_words, len(text.split()))
+
+    def complete(self, node: str, messages: List[Dict], **options) -> LLMResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(node, messages)
+
+    async def acomplete(self, node: str, messages: List[Dict], **options) -> LLMResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(node, messages)
+
+    async def astream(self, node: str, messages: List[Dict], **options) -> AsyncIterator[LLMResult]:
+        """The canned response word by word, the latency spread across the words."""
+        result = self._result(node, messages)
+        words = result.text.split(" ")
+        for index, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield LLMResult(word if index == 0 else " " + word, 0, 0)
+        yield LLMResult("", result.prompt_tokens, result.completion_tokens)
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        return False
+
+
+class NodeUsage:
+    """Calls, retries, errors, tokens and latency for one workflow node."""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = deque(maxlen=RECENT_LATENCIES)
+
+    def stats(self) -> Dict:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": {
+                "p50": round(ordered[count // 2] * 1000, 1) if ordered else 0.0,
+                "p95": round(ordered[min(count - 1, int(count * 0.95))] * 1000, 1) if ordered else 0.0,
+                "max": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            },
+        }
+
+
+class LLMGateway:
+    """Concurrency limit, timeouts, retries and accounting around a backend."""
+
+    def __init__(self, backend, max_concurrency: int, timeout: float, max_retries: int):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+        self._usage = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _node_usage(self, node: str) -> NodeUsage:
+        if node not in self._usage:
+            self._usage[node] = NodeUsage()
+        return self._usage[node]
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_slots:
+                self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return self._async_slots[loop]
+
+    def _started(self) -> float:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def _record(self, node: str, started: float, result: Optional[LLMResult], retries: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            usage = self._node_usage(node)
+            usage.calls += 1
+            usage.retries += retries
+            if result is None:
+                usage.errors += 1
+                return
+            usage.prompt_tokens += result.prompt_tokens
+            usage.completion_tokens += result.completion_tokens
+            usage.latencies.append(time.perf_counter() - started)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+    def complete(self, node: str, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> str:
+        """
+        One chat completion for a workflow node.
+
+        Args:
+            node: Workflow node name (accounting key)
+            prompt: User message
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            The completion text. Raises LLMError once retries are exhausted.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        options = {"temperature": temperature, "max_tokens": max_tokens, "timeout": self.timeout}
+        with self._slots:
+            started = self._started()
+            result, attempt = None, 0
+            try:
+                while True:
+                    try:
+                        result = self.backend.complete(node, messages, **options)
+                        return result.text
+                    except Exception as e:
+                        if attempt >= self.max_retries or not self.backend.retryable(e):
+                            raise LLMError(f"{node} call failed: {e}") from e
+                        time.sleep(self._backoff(attempt))
+                        attempt += 1
+            finally:
+                self._record(node, started, result, attempt)
+
+    async def acomplete(self, node: str, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> str:
+        """complete() for async callers; waits for a slot without blocking the event loop."""
+        messages = [{"role": "user", "content": prompt}]
+        options = {"temperature": temperature, "max_tokens": max_tokens, "timeout": self.timeout}
+        async with self._async_semaphore():
+            started = self._started()
+            result, attempt = None, 0
+            try:
+                while True:
+                    try:
+                        result = await self.backend.acomplete(node, messages, **options)
+                        return result.text
+                    except Exception as e:
+                        if attempt >= self.max_retries or not self.backend.retryable(e):
+                            raise LLMError(f"{node} call failed: {e}") from e
+                        await asyncio.sleep(self._backoff(attempt))
+                        attempt += 1
+            finally:
+                self._record(node, started, result, attempt)
+
+    async def astream(self, node: str, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> AsyncIterator[str]:
+        """
+        A streaming completion: yields text deltas as the backend produces them.
+
+        Holds a slot until the stream ends or the caller closes it. Failures
+        before the first delta are retried like acomplete(); once text has
+        been yielded a failure raises LLMError, since the caller has already
+        forwarded part of the answer.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        options = {"temperature": temperature, "max_tokens": max_tokens, "timeout": self.timeout}
+        async with self._async_semaphore():
+            started = self._started()
+            result, attempt = None, 0
+            try:
+                while True:
+                    text, prompt_tokens, completion_tokens = [], 0, 0
+                    try:
+                        async for chunk in self.backend.astream(node, messages, **options):
+                            prompt_tokens += chunk.prompt_tokens
+                            completion_tokens += chunk.completion_tokens
+                            if chunk.text:
+                                text.append(chunk.text)
+                                yield chunk.text
+                        result = LLMResult("".join(text), prompt_tokens, completion_tokens)
+                        return
+                    except Exception as e:
+                        if text or attempt >= self.max_retries or not self.backend.retryable(e):
+                            raise LLMError(f"{node} stream failed: {e}") from e
+                        await asyncio.sleep(self._backoff(attempt))
+                        attempt += 1
+            finally:
+                self._record(node, started, result, attempt)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "nodes": {node: usage.stats() for node, usage in self._usage.items()},
+            }
+
+
+def build_backend(name: str):
+    """Backend for LLM_BACKEND: fireworks (OpenAI-compatible API) or stub. Raises ValueError."""
+    if name == "fireworks":
+        return OpenAICompatibleBackend(
+            settings.FIREWORKS_API_KEY,
+            settings.FIREWORKS_BASE_URL,
+            settings.FIREWORKS_MODEL,
+            settings.LLM_TIMEOUT,
+            settings.LLM_MAX_CONCURRENCY
+        )
+    if name == "stub":
+        return StubBackend(latency=settings.LLM_STUB_LATENCY)
+    raise ValueError(f"Unknown LLM backend '{name}'. Available: fireworks, stub")
+
+
+llm_gateway = LLMGateway(
+    build_backend(settings.LLM_BACKEND),
+    settings.LLM_MAX_CONCURRENCY,
+    settings.LLM_TIMEOUT,
+    settings.LLM_MAX_RETRIES
+)
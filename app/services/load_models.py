@@ -0,0 +1,212 @@
+"""
+Training Load Models - Pluggable workout scoring
+
+Registry of training-load models. Each model has:
+- score(): one workout, used on the request path (/log-workout)
+- score_batch(): arrays of durations / workout types / heart rates, used by
+  imports, re-scoring jobs and the plan simulator (NumPy, no per-row Python
+  beyond a dict lookup per distinct workout type)
+
+Models:
+- heuristic: duration x workout-type intensity x HR-zone factor (the original formula)
+- trimp: Banister TRIMP from heart-rate reserve
+- hrtss: heart-rate TSS, 100 points = one hour at lactate threshold
+
+The model is selectable per user (users.load_model, default "heuristic").
+Models that need heart rate estimate intensity from the workout type when
+no average HR was recorded.
+"""
+
+import math
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_LOAD_MODEL = "heuristic"
+
+
+class HeartRateProfile(NamedTuple):
+    """Athlete heart-rate anchors used by HR-based models."""
+    max_hr: float = 190.0
+    resting_hr: float = 60.0
+
+    @property
+    def threshold_hr(self) -> float:
+        # Lactate threshold HR estimated at ~90% of max
+        return 0.9 * self.max_hr
+
+    @classmethod
+    def from_user(cls, user) -> "HeartRateProfile":
+        """Estimate from the user's age (220 - age), defaults otherwise."""
+        age = getattr(user, "age", None)
+        if age:
+            return cls(max_hr=float(220 - age))
+        return cls()
+
+
+DEFAULT_HR_PROFILE = HeartRateProfile()
+
+
+def _type_factors(workout_types: Sequence[str], factors: Dict[str, float], default: float) -> np.ndarray:
+    """Map workout types to factors with one dict lookup per distinct type."""
+    unique, inverse = np.unique(np.asarray(workout_types, dtype=str), return_inverse=True)
+    lookup = np.array([factors.get(workout_type.lower(), default) for workout_type in unique], dtype=float)
+    return lookup[inverse.reshape(-1)]
+
+
+def _heart_rates(avg_hrs: Optional[Sequence[Optional[float]]], size: int) -> np.ndarray:
+    """Average HRs as floats, NaN where missing (None or 0)."""
+    if avg_hrs is None:
+        return np.full(size, np.nan)
+    if isinstance(avg_hrs, np.ndarray):
+        hrs = avg_hrs.astype(float)
+    else:
+        hrs = np.array([np.nan if hr is None else hr for hr in avg_hrs], dtype=float)
+    hrs[hrs == 0] = np.nan
+    return hrs
+
+
+class TrainingLoadModel:
+    """Base class: a scalar path and a batch path that agree."""
+    name = ""
+    description = ""
+
+    def score(self, duration: float, workout_type: str, avg_hr: Optional[int] = None,
+              profile: HeartRateProfile = DEFAULT_HR_PROFILE) -> float:
+        raise NotImplementedError
+
+    def score_batch(self, durations: Sequence[float], workout_types: Sequence[str],
+                    avg_hrs: Optional[Sequence[Optional[float]]] = None,
+                    profile: HeartRateProfile = DEFAULT_HR_PROFILE) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HeuristicLoadModel(TrainingLoadModel):
+    """
+    Original Oran formula: duration * intensity_factor * (hr_factor if available)
+    """
+    name = "heuristic"
+    description = "Duration x workout-type intensity x heart-rate zone factor"
+
+    # Intensity factors by workout type
+    intensity_map = {
+        "easy": 1.0,
+        "tempo": 1.5,
+        "interval": 2.0,
+        "long": 1.2,
+        "race": 2.5
+    }
+    # Simplified HR zones: <130 (easy), 130-150 (moderate), 150-170 (hard), >170 (max)
+    hr_zone_bounds = [130, 150, 170]
+    hr_zone_factors = [1.0, 1.2, 1.5, 1.8]
+
+    def score(self, duration, workout_type, avg_hr=None, profile=DEFAULT_HR_PROFILE):
+        intensity_factor = self.intensity_map.get(workout_type.lower(), 1.0)
+
+        # Base score: duration * intensity
+        base_score = duration * intensity_factor
+
+        # Heart rate adjustment (if provided)
+        if avg_hr:
+            zone = sum(1 for bound in self.hr_zone_bounds if avg_hr >= bound)
+            base_score *= self.hr_zone_factors[zone]
+
+        return round(base_score, 2)
+
+    def score_batch(self, durations, workout_types, avg_hrs=None, profile=DEFAULT_HR_PROFILE):
+        durations = np.asarray(durations, dtype=float)
+        scores = durations * _type_factors(workout_types, self.intensity_map, 1.0)
+
+        hrs = _heart_rates(avg_hrs, len(durations))
+        zones = np.digitize(np.nan_to_num(hrs), self.hr_zone_bounds)
+        hr_factors = np.where(np.isnan(hrs), 1.0, np.asarray(self.hr_zone_factors)[zones])
+
+        return np.round(scores * hr_factors, 2)
+
+
+class TrimpLoadModel(TrainingLoadModel):
+    """
+    Banister TRIMP: minutes * HRr * 0.64 * e^(1.92 * HRr),
+    HRr = (avg_hr - resting_hr) / (max_hr - resting_hr)
+    """
+    name = "trimp"
+    description = "Banister training impulse from heart-rate reserve"
+
+    # Typical heart-rate reserve fraction by workout type, used without HR
+    reserve_by_type = {
+        "easy": 0.60,
+        "tempo": 0.80,
+        "interval": 0.88,
+        "long": 0.68,
+        "race": 0.92
+    }
+
+    def _reserve(self, avg_hr, profile):
+        return min(1.0, max(0.0, (avg_hr - profile.resting_hr) / (profile.max_hr - profile.resting_hr)))
+
+    def score(self, duration, workout_type, avg_hr=None, profile=DEFAULT_HR_PROFILE):
+        if avg_hr:
+            reserve = self._reserve(avg_hr, profile)
+        else:
+            reserve = self.reserve_by_type.get(workout_type.lower(), 0.60)
+        return round(duration * reserve * 0.64 * math.exp(1.92 * reserve), 2)
+
+    def score_batch(self, durations, workout_types, avg_hrs=None, profile=DEFAULT_HR_PROFILE):
+        durations = np.asarray(durations, dtype=float)
+        hrs = _heart_rates(avg_hrs, len(durations))
+        measured = np.clip((hrs - profile.resting_hr) / (profile.max_hr - profile.resting_hr), 0.0, 1.0)
+        reserve = np.where(np.isnan(hrs), _type_factors(workout_types, self.reserve_by_type, 0.60), measured)
+        return np.round(durations * reserve * 0.64 * np.exp(1.92 * reserve), 2)
+
+
+class HrTssLoadModel(TrainingLoadModel):
+    """
+    Heart-rate TSS: hours * IF^2 * 100, IF = avg_hr / threshold_hr
+    """
+    name = "hrtss"
+    description = "Heart-rate training stress score (100 = one hour at threshold)"
+
+    # Typical intensity factor by workout type, used without HR
+    intensity_by_type = {
+        "easy": 0.70,
+        "tempo": 0.88,
+        "interval": 0.95,
+        "long": 0.75,
+        "race": 1.00
+    }
+
+    def score(self, duration, workout_type, avg_hr=None, profile=DEFAULT_HR_PROFILE):
+        if avg_hr:
+            intensity = avg_hr / profile.threshold_hr
+        else:
+            intensity = self.intensity_by_type.get(workout_type.lower(), 0.70)
+        return round(duration / 60 * intensity ** 2 * 100, 2)
+
+    def score_batch(self, durations, workout_types, avg_hrs=None, profile=DEFAULT_HR_PROFILE):
+        durations = np.asarray(durations, dtype=float)
+        hrs = _heart_rates(avg_hrs, len(durations))
+        intensity = np.where(
+            np.isnan(hrs),
+            _type_factors(workout_types, self.intensity_by_type, 0.70),
+            hrs / profile.threshold_hr
+        )
+        return np.round(durations / 60 * intensity ** 2 * 100, 2)
+
+
+LOAD_MODELS: Dict[str, TrainingLoadModel] = {
+    model.name: model
+    for model in (HeuristicLoadModel(), TrimpLoadModel(), HrTssLoadModel())
+}
+
+
+def get_load_model(name: Optional[str] = None) -> TrainingLoadModel:
+    """Look up a model by name (None = default). Raises ValueError for unknown names."""
+    name = name or DEFAULT_LOAD_MODEL
+    if name not in LOAD_MODELS:
+        raise ValueError(f"Unknown training load model '{name}'. Available: {', '.join(LOAD_MODELS)}")
+    return LOAD_MODELS[name]
+
+
+def get_user_load_model(user) -> TrainingLoadModel:
+    """The model selected by a user, falling back to the default if unset or unknown."""
+    return LOAD_MODELS.get(getattr(user, "load_model", None) or DEFAULT_LOAD_MODEL, LOAD_MODELS[DEFAULT_LOAD_MODEL])
@@ -0,0 +1,201 @@
+"""
+Metrics Cache - In-process LRU cache for get_training_metrics
+
+Between log writes a user's metrics only change when the calendar day rolls
+over (rest-day decay, sleep window), so /metrics, /dashboard and the AI
+coach can share one computation per user per day:
+- Keyed by user id, bounded size with LRU eviction
+- Entries remember the day they were computed for and expire at the
+  day boundary
+- log_workout, log_sleep and profile updates invalidate the user's entry
+- Entries also carry users.metrics_version, which every write to a user's
+  metrics inputs or derived state increments in its own transaction
+  (bump_metrics_version). A hit re-checks the stored version with one
+  primary-key lookup at most every METRICS_VERSION_CHECK_SECONDS, so a
+  hit within that window costs no query at all. The trade-off: writes made
+  by other worker processes and by the batch / re-score jobs can go unseen
+  for up to that long (this process's own writes invalidate immediately);
+  0 checks on every read
+
+The cache is per process; each uvicorn worker keeps its own.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.routes.config import settings
+
+
+class MetricsCache:
+    """Thread-safe LRU of user_id -> (day, metrics_version, verified_at, metrics)."""
+
+    def __init__(self, max_entries: int, version_check_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.version_check_seconds = version_check_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so results computed before a write are not cached after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.version_mismatches = 0
+        self.version_checks = 0
+        self.invalidations = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get_verified(self, user_id: int, day: date) -> Optional[Dict]:
+        """A hit whose version was checked within version_check_seconds; None means check it with get()."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != day or time.monotonic() >= entry[2] + self.version_check_seconds:
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[3]
+
+    def get(self, user_id: int, day: date, version: int = 0) -> Optional[Dict]:
+        with self._lock:
+            self.version_checks += 1
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != day:
+                # Day rolled over since this entry was computed
+                del self._entries[user_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if entry[1] != version:
+                # Written since, possibly by another process
+                del self._entries[user_id]
+                self.version_mismatches += 1
+                self.misses += 1
+                return None
+            self._entries[user_id] = (entry[0], entry[1], time.monotonic(), entry[3])
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[3]
+
+    def put(self, user_id: int, day: date, metrics: Dict, generation: int, version: int = 0) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[user_id] = (day, version, time.monotonic(), metrics)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "version_check_seconds": self.version_check_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "version_mismatches": self.version_mismatches,
+                "version_checks": self.version_checks,
+                "invalidations": self.invalidations
+            }
+
+
+metrics_cache = MetricsCache(settings.METRICS_CACHE_SIZE, settings.METRICS_VERSION_CHECK_SECONDS)
+
+
+def _version_statement(user_id: int):
+    return select(User.metrics_version).where(User.id == user_id)
+
+
+def _bump_statement(user_ids: Iterable[int]):
+    return update(User).where(User.id.in_(list(user_ids))).values(
+        metrics_version=User.metrics_version + 1
+    ).returning(User.id, User.load_model, User.age).execution_options(
+        synchronize_session=False
+    )
+
+
+def bump_metrics_version(db: Session, user_ids: Iterable[int]) -> List:
+    """
+    Mark users' cached metrics stale in every process.
+
+    Call first in any transaction that changes a user's workouts, sleep,
+    load-model inputs or derived training state; the caller commits. The
+    users row lock it takes also orders that write against the batch job
+    (batch_metrics._write_shard), which re-checks the version under lock.
+
+    Returns the locked rows' (id, load_model, age): the scoring inputs as
+    committed, which the cached Principal may lag behind by up to
+    PRINCIPAL_CACHE_TTL after a profile change in another process.
+    """
+    return db.execute(_bump_statement(user_ids)).all()
+
+
+async def bump_metrics_version_async(db, user_ids: Iterable[int]) -> List:
+    """bump_metrics_version on an AsyncSession."""
+    return (await db.execute(_bump_statement(user_ids))).all()
+
+
+def get_cached_training_metrics(db: Session, user_id: int) -> Dict:
+    """get_training_metrics through the per-user cache. Returns a copy callers may modify."""
+    from app.services.training_engine import get_training_metrics
+
+    today = date.today()
+    metrics = metrics_cache.get_verified(user_id, today)
+    if metrics is None:
+        version = db.scalar(_version_statement(user_id)) or 0
+        metrics = metrics_cache.get(user_id, today, version)
+        if metrics is None:
+            generation = metrics_cache.generation()
+            metrics = get_training_metrics(db, user_id)
+            metrics_cache.put(user_id, today, metrics, generation, version)
+    return copy.deepcopy(metrics)
+
+
+def invalidate_training_metrics(user_id: int) -> None:
+    """Drop a user's cached metrics after a write that affects them."""
+    metrics_cache.invalidate(user_id)
+
+
+async def get_cached_training_metrics_async(db, user_id: int) -> Dict:
+    """get_cached_training_metrics on an AsyncSession."""
+    from app.services.training_engine import get_training_metrics_async
+
+    today = date.today()
+    metrics = metrics_cache.get_verified(user_id, today)
+    if metrics is None:
+        version = await db.scalar(_version_statement(user_id)) or 0
+        metrics = metrics_cache.get(user_id, today, version)
+        if metrics is None:
+            generation = metrics_cache.generation()
+            metrics = await get_training_metrics_async(db, user_id)
+            metrics_cache.put(user_id, today, metrics, generation, version)
+    return copy.deepcopy(metrics)
@@ -0,0 +1,84 @@
+"""
+Pagination - Keyset (date, id) paging over a user's logs
+
+Pages are ordered newest first by (date, id). The cursor is the
+(date, id) of the last row of the previous page, so every page is one
+index range scan from that point (WHERE (date, id) < cursor), whatever
+the depth; OFFSET would re-read every skipped row.
+
+Cursors are opaque url-safe base64 tokens.
+"""
+
+import base64
+import json
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    payload = json.dumps({"d": row_date.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[date, int]:
+    """(date, id) from a cursor token. Raises ValueError for a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def paginate(
+    db: Session,
+    model,
+    user_id: int,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    filters: Optional[List] = None
+) -> Dict:
+    """
+    One page of a user's rows, newest first.
+
+    Args:
+        model: Mapped class with user_id, date and id columns
+        limit: Page size (1..MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+        start / end: Optional inclusive date range
+        filters: Extra WHERE clauses (e.g. workout type)
+
+    Returns:
+        {"items": [...], "next_cursor": token or None on the last page}.
+        Raises ValueError for a bad page size or cursor.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    statement = select(model).where(model.user_id == user_id, *(filters or []))
+    if start is not None:
+        statement = statement.where(model.date >= start)
+    if end is not None:
+        statement = statement.where(model.date <= end)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        # The plain date bound lets the (user_id, date) index start the scan at the cursor;
+        # the row comparison settles ties between rows on the cursor's date
+        statement = statement.where(
+            model.date <= cursor_date,
+            tuple_(model.date, model.id) < (cursor_date, cursor_id)
+        )
+
+    # One extra row tells whether another page exists
+    rows = db.scalars(statement.order_by(model.date.desc(), model.id.desc()).limit(limit + 1)).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].date, items[-1].id) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,202 @@
+"""
+Password Hashing Pool - bcrypt off the request threads, with admission control
+
+bcrypt is deliberately slow (~250 ms at cost 12); run inside request
+threads, a burst of logins occupies every worker and stalls unrelated
+endpoints. Hashing and verification instead run in a dedicated process pool:
+- PASSWORD_HASH_WORKERS processes (0 = inline in the calling thread)
+- At most workers + PASSWORD_HASH_QUEUE_LIMIT operations in flight; beyond
+  that HashingOverloaded is raised immediately (the routes answer 503 with
+  Retry-After) instead of queueing without bound
+- Latency (queue wait + hashing) is recorded per operation for percentiles
+- Logins use verify_and_update: hashes made with other bcrypt cost
+  settings verify as before and come back re-hashed with BCRYPT_ROUNDS
+
+The pool is per process and started (spawned) on first use.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.routes.config import settings
+
+RECENT_LATENCIES = 2048  # samples kept per operation for percentiles
+
+_worker_context: Optional[CryptContext] = None
+
+
+def crypt_context_options(rounds: int) -> Dict:
+    """CryptContext settings: bcrypt at `rounds`, anything else is due a rehash."""
+    return {
+        "schemes": ["bcrypt"],
+        "deprecated": "auto",
+        "bcrypt__rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+        "bcrypt__max_rounds": rounds,
+    }
+
+
+def _init_worker(context_options: Dict) -> None:
+    global _worker_context
+    _worker_context = CryptContext(**context_options)
+
+
+def _hash(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return _worker_context.verify_and_update(password, hashed)
+
+
+class HashingOverloaded(Exception):
+    """Too many hashing operations in flight; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing is at capacity")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Bounded process pool for password hashing with per-operation latency metrics."""
+
+    def __init__(self, workers: int, queue_limit: int, context_options: Dict, retry_after: int = 1):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.max_pending = max(workers, 1) + queue_limit
+        self.retry_after = retry_after
+        self.context_options = context_options
+        self._context = CryptContext(**context_options)  # inline mode
+        self._executor = None
+        self._lock = threading.Lock()
+        self._latencies = {"hash": deque(maxlen=RECENT_LATENCIES), "verify": deque(maxlen=RECENT_LATENCIES)}
+        self.counts = {"hash": 0, "verify": 0}
+        self.pending = 0
+        self.peak_pending = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: forking a threaded server process can deadlock the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.context_options,)
+                )
+            return self._executor
+
+    def _admit(self) -> float:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingOverloaded(self.retry_after)
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        return time.perf_counter()
+
+    def _release(self, operation: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.pending -= 1
+            self.counts[operation] += 1
+            self._latencies[operation].append(elapsed)
+
+    def _call_inline(self, operation: str, *args):
+        if operation == "hash":
+            return self._context.hash(*args)
+        return self._context.verify_and_update(*args)
+
+    def _submit(self, operation: str, *args):
+        function = _hash if operation == "hash" else _verify_and_update
+        return self._get_executor().submit(function, *args)
+
+    def _run(self, operation: str, *args):
+        started = self._admit()
+        try:
+            if self.workers == 0:
+                return self._call_inline(operation, *args)
+            return self._submit(operation, *args).result()
+        finally:
+            self._release(operation, started)
+
+    async def _run_async(self, operation: str, *args):
+        started = self._admit()
+        try:
+            if self.workers == 0:
+                return await asyncio.get_running_loop().run_in_executor(None, self._call_inline, operation, *args)
+            return await asyncio.wrap_future(self._submit(operation, *args))
+        finally:
+            self._release(operation, started)
+
+    def _count_rehash(self, result: Tuple[bool, Optional[str]]) -> Tuple[bool, Optional[str]]:
+        if result[1] is not None:
+            with self._lock:
+                self.rehashed += 1
+        return result
+
+    def hash(self, password: str) -> str:
+        """Hash a password. Raises HashingOverloaded when at capacity."""
+        return self._run("hash", password)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its stored hash.
+
+        Returns (verified, new_hash); new_hash is set when the stored hash
+        was made with other cost settings and should be replaced.
+        Raises HashingOverloaded when at capacity.
+        """
+        return self._count_rehash(self._run("verify", password, hashed))
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async("hash", password)
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._count_rehash(await self._run_async("verify", password, hashed))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latency = {}
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                count = len(ordered)
+                latency[operation] = {
+                    "count": self.counts[operation],
+                    "p50": round(ordered[count // 2] * 1000, 1) if ordered else 0.0,
+                    "p95": round(ordered[min(count - 1, int(count * 0.95))] * 1000, 1) if ordered else 0.0,
+                    "p99": round(ordered[min(count - 1, int(count * 0.99))] * 1000, 1) if ordered else 0.0,
+                    "max": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+                }
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "latency_ms": latency,
+            }
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE_LIMIT,
+    crypt_context_options(settings.BCRYPT_ROUNDS),
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER
+)
@@ -0,0 +1,109 @@
+"""
+Plan Simulator - "What-if" CTL/ATL/TSB projection for planned training
+
+Scores candidate plans (lists of future workouts) with the athlete's
+training load model (batch path), then projects every plan forward from the
+athlete's current state in one vectorized pass over a plans x days load
+matrix. Used by coaches to compare build blocks and taper variants.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services.load_models import (
+    DEFAULT_HR_PROFILE,
+    HeartRateProfile,
+    TrainingLoadModel,
+    get_load_model,
+    get_user_load_model,
+)
+from app.services.training_engine import compute_pmc_series
+from app.services.training_state import get_training_state
+
+MAX_PROJECTION_DAYS = 16 * 7
+MAX_PLANS = 200
+
+
+def build_load_matrix(plans: List, days: int, model: TrainingLoadModel = None,
+                      profile: HeartRateProfile = DEFAULT_HR_PROFILE) -> np.ndarray:
+    """
+    Score every planned workout into a (plans, days) daily-load matrix.
+
+    All workouts across all plans are scored in one batch call.
+    Column 0 is tomorrow. Raises ValueError for workouts outside the horizon.
+    """
+    model = model or get_load_model()
+    workouts = [(plan_index, workout) for plan_index, plan in enumerate(plans) for workout in plan.workouts]
+    for _, workout in workouts:
+        if not 1 <= workout.day <= days:
+            raise ValueError(f"Workout day {workout.day} is outside the {days}-day projection")
+
+    loads = np.zeros((len(plans), days))
+    if not workouts:
+        return loads
+
+    scores = model.score_batch(
+        [workout.duration for _, workout in workouts],
+        [workout.workout_type for _, workout in workouts],
+        [workout.avg_hr for _, workout in workouts],
+        profile
+    )
+    np.add.at(
+        loads,
+        ([plan_index for plan_index, _ in workouts], [workout.day - 1 for _, workout in workouts]),
+        scores
+    )
+    return loads
+
+
+def simulate_training_plans(db: Session, user: User, plans: List, days: int) -> Dict:
+    """
+    Project CTL/ATL/TSB for each plan from the athlete's current state,
+    scoring workouts with the athlete's training load model.
+
+    Raises ValueError for an invalid horizon, too many plans or
+    out-of-range workouts.
+    """
+    if not 1 <= days <= MAX_PROJECTION_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_PROJECTION_DAYS}")
+    if not 1 <= len(plans) <= MAX_PLANS:
+        raise ValueError(f"Provide between 1 and {MAX_PLANS} plans")
+
+    current = get_training_state(db, user.id)
+    loads = build_load_matrix(plans, days, get_user_load_model(user), HeartRateProfile.from_user(user))
+    series = compute_pmc_series(loads, initial_ctl=current["ctl"], initial_atl=current["atl"])
+
+    ctl = np.round(series["ctl"], 2)
+    atl = np.round(series["atl"], 2)
+    tsb = np.round(series["tsb"], 2)
+    peak_days = np.argmax(series["tsb"], axis=1)
+
+    results = []
+    for plan_index, plan in enumerate(plans):
+        results.append({
+            "name": plan.name or f"Plan {plan_index + 1}",
+            "final": {
+                "ctl": float(ctl[plan_index, -1]),
+                "atl": float(atl[plan_index, -1]),
+                "tsb": float(tsb[plan_index, -1])
+            },
+            "peak_tsb": {
+                "day": int(peak_days[plan_index]) + 1,
+                "tsb": float(tsb[plan_index, peak_days[plan_index]])
+            },
+            "total_load": round(float(loads[plan_index].sum()), 2),
+            "ctl": ctl[plan_index].tolist(),
+            "atl": atl[plan_index].tolist(),
+            "tsb": tsb[plan_index].tolist()
+        })
+
+    return {
+        "start": (date.today() + timedelta(days=1)).isoformat(),
+        "days": days,
+        "current": current,
+        "plans": results
+    }
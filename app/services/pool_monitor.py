@@ -0,0 +1,149 @@
+"""
+Pool Monitor - Connection pool instrumentation
+
+Counts what the SQLAlchemy pool is doing so p99 spikes can be matched to
+pool exhaustion:
+- Checkout wait time (time spent in the pool waiting for a connection,
+  including opening a new one), recent percentiles and max
+- Connections in use now and at peak, overflow in use
+- Checkout timeouts are counted by the pool subclass; new connections,
+  checkouts/checkins and invalidations (failed pre-pings, disconnects)
+  by pool event listeners
+
+Counters are per engine and per process.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+RECENT_WAITS = 2048  # checkout wait samples kept for percentiles
+
+
+class PoolMonitor:
+    """Thread-safe counters for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=RECENT_WAITS)
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def attach(self, pool) -> None:
+        """Register the event listeners on a pool."""
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.in_use += 1
+                self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+                self.in_use = max(0, self.in_use - 1)
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def stats(self, pool=None) -> Dict[str, float]:
+        with self._lock:
+            waits = sorted(self._waits)
+            waited = len(waits)
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": round(waits[waited // 2] * 1000, 3) if waits else 0.0,
+                    "p95": round(waits[min(waited - 1, int(waited * 0.95))] * 1000, 3) if waits else 0.0,
+                    "p99": round(waits[min(waited - 1, int(waited * 0.99))] * 1000, 3) if waits else 0.0,
+                    "max": round(self.max_wait * 1000, 3),
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats["pool"] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        return stats
+
+
+class _TimedCheckoutMixin:
+    """Times each checkout from the pool's queue and counts timeouts."""
+
+    monitor: PoolMonitor
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.monitor.record_timeout()
+            raise
+        self.monitor.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Keep the same monitor when the engine recreates its pool (dispose);
+        # the event listeners are carried over with the pool's dispatch
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine) -> PoolMonitor:
+    """Attach a PoolMonitor to an engine created with an Instrumented*QueuePool."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    monitor = PoolMonitor()
+    pool.monitor = monitor
+    monitor.attach(pool)
+    return monitor
@@ -0,0 +1,173 @@
+"""
+Principal Cache - In-process cache of authenticated users for the auth fast path
+
+Most endpoints only need a user's id and a few profile fields (load model,
+age, coaching profile), not the full users row with its password hash and
+potentially large profile_picture. get_current_principal resolves the token
+to a Principal without touching the database on a hit:
+- Keyed by user id, bounded size with LRU eviction, entries expire after
+  PRINCIPAL_CACHE_TTL seconds
+- Tokens carry the user's token_version ("ver" claim); a cached principal
+  only serves tokens of the same version, anything else reloads the row
+- Profile updates invalidate the user's entry in this process; changing the
+  password also bumps users.token_version, which revokes older tokens
+  (other worker processes notice within PRINCIPAL_CACHE_TTL)
+- Misses select only the principal columns
+
+The cache is per process; each uvicorn worker keeps its own.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.routes.config import settings
+
+
+class Principal(NamedTuple):
+    """The authenticated user's scalar profile, without credentials or picture."""
+    id: int
+    email: str
+    name: str
+    age: Optional[int]
+    height: Optional[float]
+    weight: Optional[float]
+    sport: Optional[str]
+    experience_level: Optional[str]
+    goal: Optional[str]
+    load_model: Optional[str]
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(*(getattr(user, field) for field in cls._fields))
+
+
+class PrincipalCache:
+    """Thread-safe LRU of user_id -> (expires_at, principal)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so rows read before a write are not cached after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.version_mismatches = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: int, token_version: int) -> Optional[Principal]:
+        """The cached principal if it is fresh and matches the token's version."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[user_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if principal.token_version != token_version:
+                # Either the token is revoked or this entry predates a bump elsewhere; reload
+                self.version_mismatches += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return principal
+
+    def put(self, principal: Principal, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "version_mismatches": self.version_mismatches,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+
+_principal_statement = select(*[getattr(User, field) for field in Principal._fields])
+
+
+def get_principal(db: Session, user_id: int, token_version: int) -> Optional[Principal]:
+    """
+    Resolve a user id to a Principal through the cache.
+
+    Returns None if the user does not exist. The returned principal's
+    token_version may differ from the token's (the caller rejects those).
+    """
+    principal = principal_cache.get(user_id, token_version)
+    if principal is None:
+        generation = principal_cache.generation()
+        row = db.execute(_principal_statement.where(User.id == user_id)).first()
+        # End the read so the connection goes back to the pool before the handler
+        # runs (a handler awaiting the LLM would otherwise hold it throughout)
+        db.rollback()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        principal_cache.put(principal, generation)
+    return principal
+
+
+async def get_principal_async(db, user_id: int, token_version: int) -> Optional[Principal]:
+    """get_principal on an AsyncSession."""
+    principal = principal_cache.get(user_id, token_version)
+    if principal is None:
+        generation = principal_cache.generation()
+        row = (await db.execute(_principal_statement.where(User.id == user_id))).first()
+        await db.rollback()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        principal_cache.put(principal, generation)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a user's cached principal after a profile or password change."""
+    principal_cache.invalidate(user_id)
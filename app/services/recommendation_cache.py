@@ -0,0 +1,240 @@
+"""
+Recommendation Cache - Shared recommendations across athletes in the same training state
+
+The coach's output depends on the coaching profile (sport, experience,
+goal) and a handful of metrics; many athletes present near-identical
+inputs. A generated recommendation is cached for every athlete whose inputs
+fall in the same buckets:
+- Keyed on sport, experience level and goal (never the name or user id)
+  and on TSB, recovery score, CTL, ATL and weekly load quantized to
+  METRIC_STEPS x RECOMMENDATION_CACHE_GRANULARITY, plus the form and
+  recovery labels and the coach's rest thresholds (TSB < -20, recovery
+  < 60), so no bucket straddles a safety rule whatever the granularity
+- Bounded size with LRU eviction, entries expire after
+  RECOMMENDATION_CACHE_TTL seconds
+- The workflow never sees the athlete's name or writes their figures: its
+  prompts say {athlete}, {ctl}, {atl}, {tsb}, {recovery_score} and
+  {weekly_training_load}, and the output is stored with those tokens.
+  render_output() fills them in from the requesting athlete's own name and
+  metrics, so nothing is pattern-matched out of the text
+- An output that quotes the generating athlete's metric figures anyway (the
+  model ignored the tokens) is not stored
+- Failed workflow runs (error fallbacks) are never stored
+
+The cache is per process; each uvicorn worker keeps its own.
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.routes.config import settings
+
+# Bucket width per metric at granularity 1.0
+METRIC_STEPS = {
+    "tsb": 5.0,
+    "recovery_score": 10.0,
+    "ctl": 10.0,
+    "atl": 10.0,
+    "weekly_training_load": 100.0,
+}
+REST_TSB = -20  # thresholds from the coach prompt (ai_coach.generate_recommendation)
+REST_RECOVERY = 60
+NAME_PLACEHOLDER = "{athlete}"
+# Metric tokens in the coach prompts -> where the value sits in the metrics dict
+METRIC_PLACEHOLDERS = {
+    "{ctl}": ("fitness", "ctl"),
+    "{atl}": ("fatigue", "atl"),
+    "{tsb}": ("form", "tsb"),
+    "{recovery_score}": ("recovery", "recovery_score"),
+    "{weekly_training_load}": ("weekly_training_load",),
+}
+PROFILE_FIELDS = ("sport", "experience_level", "goal")
+
+
+def _bucket(value: float, step: float) -> int:
+    return int((value or 0.0) // step)
+
+
+def cache_key(user_profile: Dict, metrics: Dict, granularity: float = 1.0) -> Tuple:
+    """The shared key: non-identifying profile fields and quantized metrics."""
+    tsb = metrics["form"]["tsb"]
+    recovery = metrics["recovery"]["recovery_score"]
+    values = {
+        "tsb": tsb,
+        "recovery_score": recovery,
+        "ctl": metrics["fitness"]["ctl"],
+        "atl": metrics["fatigue"]["atl"],
+        "weekly_training_load": metrics["weekly_training_load"],
+    }
+    return (
+        tuple((user_profile.get(field) or "").strip().lower() for field in PROFILE_FIELDS),
+        tuple(_bucket(values[name], step * granularity) for name, step in METRIC_STEPS.items()),
+        metrics["form"]["status"],
+        metrics["recovery"]["recommendation"],
+        tsb < REST_TSB,
+        recovery < REST_RECOVERY,
+    )
+
+
+def _metric(metrics: Dict, path: Tuple[str, ...]):
+    for field in path:
+        metrics = metrics[field]
+    return metrics
+
+
+def placeholder_values(name: str, metrics: Dict) -> Dict[str, str]:
+    """What each placeholder token renders to for one athlete."""
+    values = {NAME_PLACEHOLDER: name or "the athlete"}
+    for token, path in METRIC_PLACEHOLDERS.items():
+        values[token] = str(_metric(metrics, path))
+    return values
+
+
+def render(text: str, values: Dict[str, str]) -> str:
+    for token, value in values.items():
+        text = text.replace(token, value)
+    return text
+
+
+def render_recommendation(recommendation: Dict, values: Dict[str, str]) -> Dict:
+    """Copy of a workout with the tokens in its text fields filled in."""
+    recommendation = copy.deepcopy(recommendation or {})
+    for field in ("description", "reasoning"):
+        if isinstance(recommendation.get(field), str):
+            recommendation[field] = render(recommendation[field], values)
+    if isinstance(recommendation.get("warnings"), list):
+        recommendation["warnings"] = [render(warning, values) if isinstance(warning, str) else warning
+                                      for warning in recommendation["warnings"]]
+    return recommendation
+
+
+def render_output(output: Dict, values: Dict[str, str]) -> Dict:
+    """Copy of a workflow output with the tokens filled in for one athlete."""
+    output = copy.deepcopy(output)
+    output["analysis"] = render(output.get("analysis") or "", values)
+    output["validation"] = render(output.get("validation") or "", values)
+    output["recommendation"] = render_recommendation(output.get("recommendation"), values)
+    return output
+
+
+class TokenRenderer:
+    """render() for streamed text: holds back a token split across deltas until it is complete."""
+
+    def __init__(self, values: Dict[str, str]):
+        self.values = values
+        self.longest = max(len(token) for token in values)
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        text = self._pending + delta
+        start = text.rfind("{")
+        if start != -1 and "}" not in text[start:] and len(text) - start < self.longest:
+            text, self._pending = text[:start], text[start:]
+        else:
+            self._pending = ""
+        return render(text, self.values)
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return render(text, self.values)
+
+
+def quotes_figures(output: Dict, metrics: Dict) -> bool:
+    """True if the output's text contains one of these metrics' figures (as given in the prompt, or to 1 decimal)."""
+    figures = set()
+    for path in METRIC_PLACEHOLDERS.values():
+        value = abs(float(_metric(metrics, path) or 0.0))
+        figures.update((str(value), f"{value:.1f}"))
+    pattern = re.compile(r"(?<![\d.])(?:" + "|".join(re.escape(figure) for figure in figures) + r")(?!\d)")
+    recommendation = output.get("recommendation") or {}
+    texts = [output.get("analysis") or "", output.get("validation") or ""]
+    texts += [recommendation.get(field) for field in ("description", "reasoning")]
+    texts += recommendation.get("warnings") or []
+    return any(isinstance(text, str) and pattern.search(text) for text in texts)
+
+
+class RecommendationCache:
+    """Thread-safe LRU of cache_key -> (expires_at, workflow output with placeholder tokens)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, granularity: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.granularity = granularity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.unshareable = 0
+
+    def key(self, user_profile: Dict, metrics: Dict) -> Tuple:
+        return cache_key(user_profile, metrics, self.granularity)
+
+    def get(self, key: Tuple, name: str, metrics: Dict) -> Optional[Dict]:
+        """The cached output for key, rendered with `name` and `metrics`, or None."""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[0]:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            output = entry[1]
+        return render_output(output, placeholder_values(name, metrics))
+
+    def put(self, key: Tuple, output: Dict, metrics: Dict) -> None:
+        """Store a generated output (unrendered), unless it quotes the figures of the `metrics` it was made from."""
+        if self.max_entries <= 0:
+            return
+        if quotes_figures(output, metrics):
+            with self._lock:
+                self.unshareable += 1
+            return
+        output = copy.deepcopy(output)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, output)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "granularity": self.granularity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "unshareable": self.unshareable
+            }
+
+
+recommendation_cache = RecommendationCache(
+    settings.RECOMMENDATION_CACHE_SIZE,
+    settings.RECOMMENDATION_CACHE_TTL,
+    settings.RECOMMENDATION_CACHE_GRANULARITY
+)
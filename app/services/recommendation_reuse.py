@@ -0,0 +1,98 @@
+"""
+Recommendation Reuse - Return today's stored recommendation for unchanged inputs
+
+A recommendation is a function of the coaching profile, the training
+metrics and the day. Refreshing /recommend without logging anything in
+between used to run all three LLM calls again and insert another row:
+- Each stored recommendation carries input_fingerprint, a sha256 of the
+  profile fields the workflow sees, the metrics rounded to
+  FINGERPRINT_DECIMALS and the date. Runs where a node fell back after an
+  LLM error are stored without one, so the next request regenerates
+- A request whose fingerprint matches a stored row of the user's returns
+  that row without calling the LLM; force=true regenerates
+- Counters record lookups, hits and forced regenerations, and the LLM
+  calls the hits avoided
+
+Counters are per process; the stored rows are shared by every worker.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.recommendation import Recommendation
+
+FINGERPRINT_DECIMALS = 1  # metric precision that counts as a change
+LLM_CALLS_PER_RECOMMENDATION = 3  # analyze, recommend, validate
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, FINGERPRINT_DECIMALS)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rounded(item) for item in value]
+    return value
+
+
+def input_fingerprint(user_profile: Dict, metrics: Dict, day: date) -> str:
+    """sha256 hex of the workflow inputs: profile fields, rounded metrics and the day."""
+    payload = {"profile": user_profile, "metrics": _rounded(metrics), "date": day.isoformat()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def find_reusable(db: Session, user_id: int, fingerprint: str) -> Optional[Recommendation]:
+    """The user's latest stored recommendation with this fingerprint, if any."""
+    return db.scalars(
+        select(Recommendation)
+        .where(Recommendation.user_id == user_id, Recommendation.input_fingerprint == fingerprint)
+        .order_by(Recommendation.created_at.desc())
+        .limit(1)
+    ).first()
+
+
+def stored_output(recommendation: Recommendation) -> Dict:
+    """A stored row in the shape the workflow returns (final_output)."""
+    return {
+        "recommendation": recommendation.recommendation_json,
+        "analysis": recommendation.reasoning_summary,
+        "validation": recommendation.validation,
+        "generated_date": recommendation.date.isoformat()
+    }
+
+
+class ReuseStats:
+    """Thread-safe counters for fingerprint lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.forced = 0
+
+    def record(self, hit: bool, forced: bool = False) -> None:
+        with self._lock:
+            if forced:
+                self.forced += 1
+                return
+            self.lookups += 1
+            self.hits += hit
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "forced": self.forced,
+                "llm_calls_avoided": self.hits * LLM_CALLS_PER_RECOMMENDATION
+            }
+
+
+reuse_stats = ReuseStats()
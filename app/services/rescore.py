@@ -0,0 +1,209 @@
+"""
+Workout Re-scoring - Resumable backfill of training_load_score
+
+training_load_score is computed once on insert; changing a load model
+(intensity factors, HR zones, a user's selected model) leaves history
+scored with the old formula. This job re-scores every workout:
+1. Walk the workouts table in id order with keyset pagination
+   (id > last_id LIMIT n), one short transaction per chunk
+2. Score each chunk with the users' load models through score_batch
+3. Write changed scores with one bulk UPDATE (executemany by primary key)
+4. Checkpoint the last id to a JSON file after every committed chunk, so
+   an interrupted run resumes where it stopped
+5. Rebuild the daily rollup and daily_training_state and drop metrics
+   snapshots for every user whose scores changed, bumping their
+   users.metrics_version so every API worker drops its cached metrics
+
+Re-running a finished job is cheap: unchanged scores are not written.
+rescore_user does the same for one athlete inside the caller's transaction
+(PUT /me, when the load model or age changes).
+"""
+
+import json
+import os
+import time
+from itertools import groupby
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.workout import Workout
+from app.models.metrics_snapshot import MetricsSnapshot
+from app.services.load_models import HeartRateProfile, get_user_load_model
+from app.services.daily_summary import rebuild_daily_summary
+from app.services.training_state import rebuild_training_state
+from app.services.metrics_cache import bump_metrics_version
+
+SCORE_TOLERANCE = 0.005  # scores are rounded to 2 places
+SCORING_FIELDS = ("load_model", "age")  # User fields the load model reads (age via HeartRateProfile)
+
+
+def _load_checkpoint(path: Optional[str]) -> Dict:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"phase": "rescore", "last_id": 0, "rows": 0, "updated": 0, "users": []}
+
+
+def _save_checkpoint(path: Optional[str], checkpoint: Dict) -> None:
+    if not path:
+        return
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def rescore_chunk(rows: List) -> List[Dict]:
+    """
+    Score one chunk of workout rows and return the changed ones.
+
+    Args:
+        rows: (id, user_id, duration, workout_type, avg_hr, training_load_score,
+               load_model, age), ordered by id
+
+    Returns:
+        [{"id", "user_id", "training_load_score"}, ...] for scores that changed
+    """
+    changed = []
+    by_user = sorted(rows, key=lambda row: row.user_id)
+    for _, group in groupby(by_user, key=lambda row: row.user_id):
+        group = list(group)
+        user = group[0]
+        scores = get_user_load_model(user).score_batch(
+            [row.duration for row in group],
+            [row.workout_type for row in group],
+            [row.avg_hr for row in group],
+            HeartRateProfile.from_user(user)
+        )
+        for row, score in zip(group, scores):
+            score = float(score)
+            if row.training_load_score is None or abs(row.training_load_score - score) > SCORE_TOLERANCE:
+                changed.append({"id": row.id, "user_id": row.user_id, "training_load_score": score})
+    return changed
+
+
+def _rebuild_derived_state(db: Session, user_id: int) -> None:
+    rebuild_daily_summary(db, user_id)
+    rebuild_training_state(db, user_id)
+    # Stored snapshots were computed from the old scores; the nightly job rewrites them
+    db.execute(delete(MetricsSnapshot).where(MetricsSnapshot.user_id == user_id))
+
+
+def _refresh_derived_state(db: Session, user_id: int) -> None:
+    bump_metrics_version(db, [user_id])
+    _rebuild_derived_state(db, user_id)
+    db.commit()
+
+
+def _workout_rows():
+    return select(
+        Workout.id,
+        Workout.user_id,
+        Workout.duration,
+        Workout.workout_type,
+        Workout.avg_hr,
+        Workout.training_load_score,
+        User.load_model,
+        User.age
+    ).join(User, User.id == Workout.user_id).order_by(Workout.id)
+
+
+def rescore_user(db: Session, user_id: int) -> int:
+    """
+    Re-score one user's workouts with their current load model and rebuild
+    their derived state (rollup, daily_training_state, snapshots).
+
+    Runs in the caller's transaction: pending changes to the user are
+    flushed first, the caller bumps metrics_version and commits.
+    Returns the number of workouts whose score changed.
+    """
+    db.flush()
+    changed = rescore_chunk(db.execute(_workout_rows().where(Workout.user_id == user_id)).all())
+    if changed:
+        db.execute(update(Workout), [
+            {"id": row["id"], "training_load_score": row["training_load_score"]} for row in changed
+        ])
+    _rebuild_derived_state(db, user_id)
+    return len(changed)
+
+
+def rescore_workouts(
+    session_factory: Callable[[], Session] = SessionLocal,
+    chunk_size: int = 5000,
+    checkpoint_path: Optional[str] = None,
+    progress: Optional[Callable[[int, float], None]] = None
+) -> Dict[str, float]:
+    """
+    Re-score every workout with its owner's current load model.
+
+    Args:
+        session_factory: Creates the session used by the job
+        chunk_size: Workouts per keyset page (one transaction each)
+        checkpoint_path: JSON file to resume from and record progress in
+            (removed once the run completes); None disables checkpointing
+        progress: Called with (rows_done, elapsed_seconds) after each chunk
+
+    Returns:
+        {"rows", "updated", "users", "seconds", "rows_per_sec"}
+    """
+    checkpoint = _load_checkpoint(checkpoint_path)
+    affected = set(checkpoint["users"])
+    db = session_factory()
+    started = time.perf_counter()
+    rows_this_run = 0
+
+    statement = _workout_rows().limit(chunk_size)
+
+    try:
+        while checkpoint["phase"] == "rescore":
+            rows = db.execute(statement.where(Workout.id > checkpoint["last_id"])).all()
+            if not rows:
+                checkpoint["phase"] = "rebuild"
+                _save_checkpoint(checkpoint_path, checkpoint)
+                break
+
+            changed = rescore_chunk(rows)
+            if changed:
+                db.execute(update(Workout), [
+                    {"id": row["id"], "training_load_score": row["training_load_score"]} for row in changed
+                ])
+            db.commit()
+
+            affected.update(row["user_id"] for row in changed)
+            checkpoint["last_id"] = rows[-1].id
+            checkpoint["rows"] += len(rows)
+            checkpoint["updated"] += len(changed)
+            checkpoint["users"] = sorted(affected)
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+            rows_this_run += len(rows)
+            if progress:
+                progress(checkpoint["rows"], time.perf_counter() - started)
+
+        # Users are removed from the checkpoint as their derived state is rebuilt
+        for user_id in list(checkpoint["users"]):
+            _refresh_derived_state(db, user_id)
+            checkpoint["users"].remove(user_id)
+            _save_checkpoint(checkpoint_path, checkpoint)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": checkpoint["rows"],
+        "updated": checkpoint["updated"],
+        "users": len(affected),
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows_this_run / elapsed, 1) if elapsed > 0 else 0.0
+    }
@@ -7,22 +7,260 @@ This module implements the Performance Management Chart (PMC) model:
 - TSB (Training Stress Balance) = Form (CTL - ATL)
 
 Recovery score is based on sleep quality and training load.
+
+The EMAs are evaluated as vectorized linear filters over NumPy arrays
+(see compute_pmc_series) so a full multi-year CTL/ATL/TSB series costs
+a handful of array operations instead of a Python loop per day.
+compute_pmc_sparse works from the training days only, decaying across
+rest days in closed form, so its cost scales with the number of workouts.
 """
 
+import math
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.models.workout import Workout
 from app.models.sleep_log import SleepLog
+from app.models.training_state import DailyTrainingState
+from app.models.daily_summary import DailyUserSummary
+
+
+CTL_TIME_CONSTANT = 42  # days
+ATL_TIME_CONSTANT = 7   # days
+
+RECOVERY_SLEEP_DAYS = 3  # nights of sleep that feed the recovery score
+
+# PMC history downsampling
+HISTORY_RESOLUTIONS = ("day", "week", "month")
+MAX_HISTORY_POINTS = 400  # points per response
+
+# Largest acceptable dynamic range of decay powers inside one filter block.
+# Keeps the rescaled cumulative sum well inside float64 precision.
+_MAX_BLOCK_RANGE = 1e8
+
+
+def ema_smoothing_factor(time_constant: int) -> float:
+    """Smoothing factor (alpha) used for an EMA with the given time constant."""
+    return 2 / (time_constant + 1)
+
+
+CTL_ALPHA = ema_smoothing_factor(CTL_TIME_CONSTANT)
+ATL_ALPHA = ema_smoothing_factor(ATL_TIME_CONSTANT)
+
+
+def _ema_filter(values: np.ndarray, alpha: float,
+                initial: Optional[Union[float, np.ndarray]] = None) -> np.ndarray:
+    """
+    Vectorized EMA along the last axis of `values`.
+
+    Solves y[t] = alpha * x[t] + (1 - alpha) * y[t-1] in closed form:
+    inside a block, y[j] = d^(j+1) * (y_prev + alpha * cumsum(x[k] / d^(k+1))),
+    with d = 1 - alpha. Blocks are sized so d^-block stays bounded, and the
+    last value of each block seeds the next one.
+
+    Args:
+        values: Array of loads, shape (..., days)
+        alpha: Smoothing factor
+        initial: State before the first day. None seeds the EMA with the
+            first value (the behaviour of the original loop).
+
+    Returns:
+        Array of the same shape holding the EMA for every day
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.empty_like(values)
+    days = values.shape[-1]
+    if days == 0:
+        return out
+
+    decay = 1.0 - alpha
+    if initial is None:
+        state = values[..., 0].copy()
+        out[..., 0] = state
+        start = 1
+    else:
+        state = np.broadcast_to(np.asarray(initial, dtype=float), values.shape[:-1]).copy()
+        start = 0
+
+    block = _block_span(decay) if decay > 0 else days
+    for offset in range(start, days, block):
+        chunk = values[..., offset:offset + block]
+        powers = decay ** np.arange(1, chunk.shape[-1] + 1)
+        filtered = powers * (np.expand_dims(state, -1) + alpha * np.cumsum(chunk / powers, axis=-1))
+        out[..., offset:offset + chunk.shape[-1]] = filtered
+        state = filtered[..., -1]
+
+    return out
+
+
+def compute_pmc_series(
+    daily_loads: Union[Sequence[float], np.ndarray],
+    initial_ctl: Optional[float] = None,
+    initial_atl: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the full Performance Management Chart for a dense daily-load array.
+
+    Args:
+        daily_loads: One training load per calendar day (oldest first), any length
+        initial_ctl: CTL on the day before the first load (None = seed with first load)
+        initial_atl: ATL on the day before the first load (None = seed with first load)
+
+    Returns:
+        {
+            "ctl": CTL for every day,
+            "atl": ATL for every day,
+            "tsb": TSB (CTL - ATL) for every day
+        }
+    """
+    loads = np.asarray(daily_loads, dtype=float)
+    ctl = _ema_filter(loads, ema_smoothing_factor(CTL_TIME_CONSTANT), initial_ctl)
+    atl = _ema_filter(loads, ema_smoothing_factor(ATL_TIME_CONSTANT), initial_atl)
+    return {"ctl": ctl, "atl": atl, "tsb": ctl - atl}
+
+
+def _block_span(decay: float) -> int:
+    """Days per filter block so decay ** -span stays within _MAX_BLOCK_RANGE."""
+    return max(1, int(math.log(_MAX_BLOCK_RANGE) / -math.log(decay))) if decay > 0 else 1
+
+
+def _sparse_ema_filter(offsets: np.ndarray, values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    EMA evaluated only on training days.
+    
+    offsets are strictly increasing day numbers counted from the day of the
+    initial state (all >= 1). Between two training days the EMA decays by
+    (1 - alpha) ** gap, so
+    y[k] = d^(t[k] - t_state) * state + alpha * sum_j d^(t[k] - t[j]) * x[j]
+    which is evaluated blockwise with a cumulative sum, blocks spanning at
+    most _block_span(d) days so the rescaling stays bounded.
+    """
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    span = _block_span(decay)
+    state, state_day = initial, 0
+    start = 0
+    while start < len(values):
+        stop = int(np.searchsorted(offsets, offsets[start] + span, side="right"))
+        block_offsets = offsets[start:stop]
+        powers = decay ** (block_offsets - block_offsets[0])
+        filtered = (decay ** (block_offsets - state_day) * state
+                    + alpha * powers * np.cumsum(values[start:stop] / powers))
+        out[start:stop] = filtered
+        state, state_day = filtered[-1], block_offsets[-1]
+        start = stop
+    return out
+
+
+def compute_pmc_sparse(
+    training_days: Sequence[date],
+    daily_loads: Sequence[float],
+    initial_ctl: float = 0.0,
+    initial_atl: float = 0.0,
+    initial_date: Optional[date] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Compute CTL/ATL/TSB on training days only, from a sparse history.
+    
+    Rest days are never materialized: the decay across n empty days is
+    applied in closed form, so cost scales with the number of training days
+    and years-long gaps cost nothing.
+    
+    Args:
+        training_days: Days with training load, strictly increasing
+        daily_loads: Total load on each of those days
+        initial_ctl: CTL at the end of `initial_date`
+        initial_atl: ATL at the end of `initial_date`
+        initial_date: Day of the initial state (default: day before the first training day)
+    
+    Returns:
+        {"ctl", "atl", "tsb"} arrays aligned with training_days (state at the end of each day)
+    """
+    if len(training_days) == 0:
+        empty = np.empty(0)
+        return {"ctl": empty, "atl": empty.copy(), "tsb": empty.copy()}
+    
+    initial_date = initial_date or training_days[0] - timedelta(days=1)
+    offsets = np.fromiter(((day - initial_date).days for day in training_days), dtype=np.int64, count=len(training_days))
+    loads = np.asarray(daily_loads, dtype=float)
+    ctl = _sparse_ema_filter(offsets, loads, CTL_ALPHA, initial_ctl)
+    atl = _sparse_ema_filter(offsets, loads, ATL_ALPHA, initial_atl)
+    return {"ctl": ctl, "atl": atl, "tsb": ctl - atl}
+
+
+def decay_state(ctl: float, atl: float, days: int) -> Tuple[float, float]:
+    """Decay a CTL/ATL pair across `days` rest days in closed form."""
+    return ctl * (1 - CTL_ALPHA) ** days, atl * (1 - ATL_ALPHA) ** days
+
+
+def choose_history_resolution(days: int, requested: str = "auto") -> str:
+    """
+    Pick the bucket size for a history range of `days` days.
+    
+    "auto" picks the finest resolution that stays within MAX_HISTORY_POINTS.
+    Raises ValueError for unknown resolutions or ones that would exceed it,
+    including "auto" when even monthly buckets would.
+    """
+    approx_bucket_days = {"day": 1, "week": 7, "month": 30}
+    if requested == "auto":
+        for resolution in HISTORY_RESOLUTIONS:
+            if days / approx_bucket_days[resolution] <= MAX_HISTORY_POINTS:
+                return resolution
+        requested = HISTORY_RESOLUTIONS[-1]
+    if requested not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"resolution must be one of: auto, {', '.join(HISTORY_RESOLUTIONS)}")
+    if days / approx_bucket_days[requested] > MAX_HISTORY_POINTS:
+        raise ValueError(f"Range too long for '{requested}' resolution (max {MAX_HISTORY_POINTS} points)")
+    return requested
+
+
+def downsample_pmc_series(start: date, daily_loads: np.ndarray, series: Dict[str, np.ndarray],
+                          resolution: str) -> List[Dict[str, any]]:
+    """
+    Aggregate a daily PMC series into day, week (Monday) or month buckets.
+    
+    Each point carries the bucket's start date, CTL/ATL/TSB at the end of
+    the bucket and the total training load inside it.
+    """
+    days = len(daily_loads)
+    if days == 0:
+        return []
+    
+    dates = np.datetime64(start, "D") + np.arange(days)
+    if resolution == "week":
+        epoch_days = dates.astype("int64")
+        keys = dates - (epoch_days + 3) % 7  # 1970-01-01 was a Thursday
+    elif resolution == "month":
+        keys = dates.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        keys = dates
+    
+    first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    last = np.r_[first[1:] - 1, days - 1]
+    loads = np.add.reduceat(np.asarray(daily_loads, dtype=float), first)
+    
+    return [
+        {
+            "date": keys[first_index].astype(date).isoformat(),
+            "ctl": round(float(series["ctl"][last_index]), 2),
+            "atl": round(float(series["atl"][last_index]), 2),
+            "tsb": round(float(series["tsb"][last_index]), 2),
+            "training_load": round(float(load), 2)
+        }
+        for first_index, last_index, load in zip(first, last, loads)
+    ]
 
 
 def calculate_exponential_moving_average(values: List[float], time_constant: int) -> float:
     """
     Calculate exponential moving average (EMA).
     
-    Formula: EMA = yesterday_EMA + (today_value - yesterday_EMA) * (1 / time_constant)
+    Formula: EMA = yesterday_EMA + (today_value - yesterday_EMA) * alpha,
+    with alpha = 2 / (time_constant + 1)
     
     Args:
         values: List of training load values (most recent last)
@@ -34,13 +272,8 @@ def calculate_exponential_moving_average(values: List[float], time_constant: int
     if not values:
         return 0.0
     
-    alpha = 2 / (time_constant + 1)  # Smoothing factor
-    ema = values[0]  # Start with first value
-    
-    for value in values[1:]:
-        ema = alpha * value + (1 - alpha) * ema
-    
-    return round(ema, 2)
+    ema = _ema_filter(values, ema_smoothing_factor(time_constant))
+    return round(float(ema[-1]), 2)
 
 
 def get_training_loads(db: Session, user_id: int, days: int = 42) -> List[float]:
@@ -48,40 +281,56 @@ def get_training_loads(db: Session, user_id: int, days: int = 42) -> List[float]
     Get daily training load scores for the last N days.
     
     Returns a list with one value per day (0 if no workout that day).
+    Reads the per-day totals from daily_user_summary (one row per day).
     """
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
     
-    # Get all workouts in date range
-    workouts = db.query(Workout).filter(
-        Workout.user_id == user_id,
-        Workout.date >= start_date,
-        Workout.date <= end_date
-    ).order_by(Workout.date).all()
-    
-    # Create daily training load list
-    daily_loads = []
-    workout_dict = {}
-    
-    # Sum training loads for each day (in case of multiple workouts per day)
-    for workout in workouts:
-        if workout.date not in workout_dict:
-            workout_dict[workout.date] = 0
-        workout_dict[workout.date] += workout.training_load_score or 0
-    
-    # Fill in all days with 0 for rest days
-    current_date = start_date
-    while current_date <= end_date:
-        daily_loads.append(workout_dict.get(current_date, 0.0))
-        current_date += timedelta(days=1)
+    daily_loads = [0.0] * days
+    rows = db.query(DailyUserSummary.date, DailyUserSummary.training_load).filter(
+        DailyUserSummary.user_id == user_id,
+        DailyUserSummary.date >= start_date,
+        DailyUserSummary.date <= end_date
+    ).all()
+    for day, load in rows:
+        daily_loads[(day - start_date).days] = load
     
     return daily_loads
 
 
+def calculate_full_history_pmc(db: Session, user_id: int, as_of: Optional[date] = None) -> Dict[str, float]:
+    """
+    Exact CTL/ATL/TSB over the athlete's entire workout history.
+    
+    Recomputes from the workouts table (one GROUP BY query) with the sparse
+    engine, without relying on the materialized state. Used for repairs
+    and for verifying daily_training_state.
+    """
+    as_of = as_of or date.today()
+    daily = db.query(
+        Workout.date,
+        func.sum(func.coalesce(Workout.training_load_score, 0.0))
+    ).filter(
+        Workout.user_id == user_id,
+        Workout.date <= as_of
+    ).group_by(Workout.date).order_by(Workout.date).all()
+    
+    if not daily:
+        return {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+    
+    series = compute_pmc_sparse([day for day, _ in daily], [load for _, load in daily])
+    ctl, atl = decay_state(float(series["ctl"][-1]), float(series["atl"][-1]), (as_of - daily[-1][0]).days)
+    return {"ctl": round(ctl, 2), "atl": round(atl, 2), "tsb": round(ctl - atl, 2)}
+
+
 def calculate_fitness_fatigue_form(db: Session, user_id: int) -> Dict[str, float]:
     """
     Calculate CTL (fitness), ATL (fatigue), and TSB (form).
     
+    Reads the materialized daily_training_state (see training_state.py),
+    which covers the athlete's full history and is kept current on every
+    workout write.
+    
     Returns:
         {
             "ctl": Chronic Training Load (42-day EMA) - fitness
@@ -89,33 +338,17 @@ def calculate_fitness_fatigue_form(db: Session, user_id: int) -> Dict[str, float
             "tsb": Training Stress Balance (CTL - ATL) - form
         }
     """
-    # Get training loads for last 42 days
-    training_loads = get_training_loads(db, user_id, days=42)
-    
-    if not training_loads or sum(training_loads) == 0:
-        return {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+    from app.services.training_state import get_training_state
     
-    # Calculate CTL (Chronic Training Load) - 42 day exponential moving average
-    ctl = calculate_exponential_moving_average(training_loads, time_constant=42)
-    
-    # Calculate ATL (Acute Training Load) - 7 day exponential moving average
-    # Use last 7 days only
-    recent_loads = training_loads[-7:] if len(training_loads) >= 7 else training_loads
-    atl = calculate_exponential_moving_average(recent_loads, time_constant=7)
-    
-    # Calculate TSB (Training Stress Balance) = Form
-    tsb = round(ctl - atl, 2)
-    
-    return {
-        "ctl": ctl,  # Fitness (higher is better, but build gradually)
-        "atl": atl,  # Fatigue (lower is better for recovery)
-        "tsb": tsb   # Form (-30 to -10: optimal for training, 5-25: peak performance)
-    }
+    # CTL: fitness (higher is better, but build gradually)
+    # ATL: fatigue (lower is better for recovery)
+    # TSB: form (-30 to -10: optimal for training, 5-25: peak performance)
+    return get_training_state(db, user_id)
 
 
-def calculate_recovery_score(db: Session, user_id: int) -> Dict[str, any]:
+def score_recovery(sleep_logs: List[SleepLog], fitness_metrics: Dict[str, float]) -> Dict[str, any]:
     """
-    Calculate recovery score based on sleep quality and training load.
+    Score recovery from recent sleep logs and the current CTL/ATL/TSB.
     
     Returns score 0-100 where:
     - 80-100: Fully recovered, ready for hard training
@@ -123,16 +356,6 @@ def calculate_recovery_score(db: Session, user_id: int) -> Dict[str, any]:
     - 40-59: Low recovery, consider rest
     - 0-39: Poor recovery, rest required
     """
-    # Get last 3 days of sleep
-    end_date = date.today()
-    start_date = end_date - timedelta(days=2)
-    
-    sleep_logs = db.query(SleepLog).filter(
-        SleepLog.user_id == user_id,
-        SleepLog.date >= start_date,
-        SleepLog.date <= end_date
-    ).order_by(SleepLog.date.desc()).limit(3).all()
-    
     # Calculate sleep component (50% of score)
     if sleep_logs:
         avg_sleep_hours = sum(log.hours for log in sleep_logs) / len(sleep_logs)
@@ -148,9 +371,7 @@ def calculate_recovery_score(db: Session, user_id: int) -> Dict[str, any]:
     
     # Calculate training stress component (50% of score)
     # Lower ATL relative to CTL = better recovery
-    fitness_metrics = calculate_fitness_fatigue_form(db, user_id)
     ctl = fitness_metrics["ctl"]
-    atl = fitness_metrics["atl"]
     tsb = fitness_metrics["tsb"]
     
     if ctl > 0:
@@ -189,32 +410,23 @@ def calculate_recovery_score(db: Session, user_id: int) -> Dict[str, any]:
     }
 
 
-def get_training_metrics(db: Session, user_id: int) -> Dict[str, any]:
-    """
-    Get all training metrics for a user.
-    
-    Returns comprehensive metrics including fitness, fatigue, form, and recovery.
-    """
-    fitness_metrics = calculate_fitness_fatigue_form(db, user_id)
-    recovery_metrics = calculate_recovery_score(db, user_id)
-    
-    # Get recent training load (last 7 days)
-    recent_loads = get_training_loads(db, user_id, days=7)
-    weekly_load = round(sum(recent_loads), 2)
-    
-    # Interpret TSB
-    tsb = fitness_metrics["tsb"]
+def describe_form(tsb: float) -> str:
+    """Interpret TSB as a training status."""
     if tsb < -30:
-        form_status = "Overreaching - high risk of overtraining"
+        return "Overreaching - high risk of overtraining"
     elif tsb < -10:
-        form_status = "Optimal training zone - building fitness"
+        return "Optimal training zone - building fitness"
     elif tsb < 5:
-        form_status = "Maintaining fitness"
+        return "Maintaining fitness"
     elif tsb < 25:
-        form_status = "Peak form - race ready"
+        return "Peak form - race ready"
     else:
-        form_status = "Detraining - consider increasing training load"
-    
+        return "Detraining - consider increasing training load"
+
+
+def build_training_metrics(fitness_metrics: Dict[str, float], recovery_metrics: Dict[str, any],
+                           weekly_load: float) -> Dict[str, any]:
+    """Assemble the metrics payload returned by /metrics and /dashboard."""
     return {
         "fitness": {
             "ctl": fitness_metrics["ctl"],
@@ -226,9 +438,109 @@ def get_training_metrics(db: Session, user_id: int) -> Dict[str, any]:
         },
         "form": {
             "tsb": fitness_metrics["tsb"],
-            "status": form_status,
+            "status": describe_form(fitness_metrics["tsb"]),
             "description": "Training Stress Balance - readiness to perform"
         },
         "recovery": recovery_metrics,
         "weekly_training_load": weekly_load
     }
+
+
+class TrainingSnapshot:
+    """
+    Everything get_training_metrics needs for one user, loaded once.
+    
+    Two queries in total:
+    1. The latest 7 daily_training_state rows up to `as_of` - the newest
+       row carries CTL/ATL, the rows inside the 7-day window sum to the
+       weekly load (there is at most one row per day)
+    2. The last 3 days of sleep logs
+    
+    Fitness, fatigue, form, recovery and weekly load are then derived
+    from that in-memory data.
+    """
+    
+    def __init__(self, user_id: int, as_of: date, state_rows: List[DailyTrainingState],
+                 sleep_logs: List[SleepLog]):
+        self.user_id = user_id
+        self.as_of = as_of
+        self.state_rows = state_rows  # most recent first
+        self.sleep_logs = sleep_logs  # most recent first
+    
+    @staticmethod
+    def statements(user_id: int, as_of: date):
+        """The two SELECTs behind a snapshot, shared by the sync and async loaders."""
+        state_rows = select(DailyTrainingState).where(
+            DailyTrainingState.user_id == user_id,
+            DailyTrainingState.date <= as_of
+        ).order_by(DailyTrainingState.date.desc()).limit(ATL_TIME_CONSTANT)
+        
+        sleep_logs = select(SleepLog).where(
+            SleepLog.user_id == user_id,
+            SleepLog.date >= as_of - timedelta(days=RECOVERY_SLEEP_DAYS - 1),
+            SleepLog.date <= as_of
+        ).order_by(SleepLog.date.desc()).limit(RECOVERY_SLEEP_DAYS)
+        
+        return state_rows, sleep_logs
+    
+    @classmethod
+    def load(cls, db: Session, user_id: int, as_of: Optional[date] = None) -> "TrainingSnapshot":
+        as_of = as_of or date.today()
+        state_rows, sleep_logs = cls.statements(user_id, as_of)
+        return cls(user_id, as_of, db.scalars(state_rows).all(), db.scalars(sleep_logs).all())
+    
+    @classmethod
+    async def load_async(cls, db, user_id: int, as_of: Optional[date] = None) -> "TrainingSnapshot":
+        """Same as load() on an AsyncSession."""
+        as_of = as_of or date.today()
+        state_rows, sleep_logs = cls.statements(user_id, as_of)
+        return cls(user_id, as_of, (await db.scalars(state_rows)).all(), (await db.scalars(sleep_logs)).all())
+    
+    def fitness_fatigue_form(self) -> Dict[str, float]:
+        """CTL/ATL/TSB on `as_of`, decayed from the latest training day."""
+        if not self.state_rows:
+            return {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+        
+        latest = self.state_rows[0]
+        ctl, atl = decay_state(latest.ctl, latest.atl, (self.as_of - latest.date).days)
+        return {"ctl": round(ctl, 2), "atl": round(atl, 2), "tsb": round(ctl - atl, 2)}
+    
+    def weekly_training_load(self) -> float:
+        """Total training load over the last 7 days."""
+        week_start = self.as_of - timedelta(days=6)
+        return round(sum(row.daily_load for row in self.state_rows if row.date >= week_start), 2)
+    
+    def recovery(self) -> Dict[str, any]:
+        return score_recovery(self.sleep_logs, self.fitness_fatigue_form())
+    
+    def metrics(self) -> Dict[str, any]:
+        fitness_metrics = self.fitness_fatigue_form()
+        return build_training_metrics(
+            fitness_metrics,
+            score_recovery(self.sleep_logs, fitness_metrics),
+            self.weekly_training_load()
+        )
+
+
+def calculate_recovery_score(db: Session, user_id: int) -> Dict[str, any]:
+    """
+    Calculate recovery score based on sleep quality and training load.
+    
+    See score_recovery for the scale.
+    """
+    return TrainingSnapshot.load(db, user_id).recovery()
+
+
+def get_training_metrics(db: Session, user_id: int) -> Dict[str, any]:
+    """
+    Get all training metrics for a user.
+    
+    Returns comprehensive metrics including fitness, fatigue, form, and recovery.
+    Loads a single TrainingSnapshot (two queries) and derives everything from it.
+    """
+    return TrainingSnapshot.load(db, user_id).metrics()
+
+
+async def get_training_metrics_async(db, user_id: int) -> Dict[str, any]:
+    """get_training_metrics on an AsyncSession (same two queries, awaited)."""
+    return (await TrainingSnapshot.load_async(db, user_id)).metrics()
@@ -0,0 +1,225 @@
+"""
+Training State - Materialized PMC per user and day
+
+Keeps the daily_training_state table in sync with the workouts table so
+fitness/fatigue/form reads are a single indexed row lookup instead of a
+range scan plus an EMA rebuild:
+- Appended workouts advance the state in O(1): rest days in between decay
+  the previous row in closed form, (1 - alpha) ** days
+- Same-day workouts are O(1) too, the EMA is linear in the day's load
+- Back-dated workouts recompute forward from the affected date only,
+  touching the stored training days rather than every calendar day
+
+The state starts from zero before the athlete's first workout and covers
+the full history (no 42-day truncation).
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.training_state import DailyTrainingState
+from app.models.workout import Workout
+from app.services.training_engine import (
+    CTL_ALPHA,
+    ATL_ALPHA,
+    compute_pmc_series,
+    compute_pmc_sparse,
+    decay_state,
+    choose_history_resolution,
+    downsample_pmc_series,
+)
+
+
+def _latest_row(db: Session, user_id: int, before: Optional[date] = None,
+                on_or_before: Optional[date] = None, for_update: bool = False):
+    query = db.query(DailyTrainingState).filter(DailyTrainingState.user_id == user_id)
+    if before is not None:
+        query = query.filter(DailyTrainingState.date < before)
+    if on_or_before is not None:
+        query = query.filter(DailyTrainingState.date <= on_or_before)
+    query = query.order_by(DailyTrainingState.date.desc())
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+
+def get_training_state(db: Session, user_id: int, as_of: Optional[date] = None) -> Dict[str, float]:
+    """
+    Read CTL/ATL/TSB for a day from the materialized state.
+
+    One indexed lookup of the latest row on or before `as_of` (default today),
+    decayed forward across the rest days since then.
+    """
+    as_of = as_of or date.today()
+    row = _latest_row(db, user_id, on_or_before=as_of)
+    if row is None:
+        return {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+
+    ctl, atl = decay_state(row.ctl, row.atl, (as_of - row.date).days)
+    return {"ctl": round(ctl, 2), "atl": round(atl, 2), "tsb": round(ctl - atl, 2)}
+
+
+def get_metrics_history(db: Session, user_id: int, start: date, end: date,
+                        resolution: str = "auto") -> Dict:
+    """
+    CTL/ATL/TSB time series between `start` and `end` (inclusive).
+
+    Two indexed queries (the seed row before `start` and the training days
+    in range), one vectorized EMA pass over the dense range, then bucketed
+    server-side so multi-year ranges stay small.
+    Raises ValueError for an invalid range or resolution.
+    """
+    if end < start:
+        raise ValueError("end must be on or after start")
+    days = (end - start).days + 1
+    resolution = choose_history_resolution(days, resolution)
+
+    seed = _latest_row(db, user_id, before=start)
+    rows = db.query(DailyTrainingState.date, DailyTrainingState.daily_load).filter(
+        DailyTrainingState.user_id == user_id,
+        DailyTrainingState.date >= start,
+        DailyTrainingState.date <= end
+    ).all()
+
+    loads = np.zeros(days)
+    for day, load in rows:
+        loads[(day - start).days] = load
+
+    if seed is None:
+        initial_ctl, initial_atl = 0.0, 0.0
+    else:
+        initial_ctl, initial_atl = decay_state(seed.ctl, seed.atl, (start - seed.date).days - 1)
+
+    series = compute_pmc_series(loads, initial_ctl=initial_ctl, initial_atl=initial_atl)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "resolution": resolution,
+        "points": downsample_pmc_series(start, loads, series, resolution)
+    }
+
+
+def apply_workout_load(db: Session, user_id: int, workout_date: date, load: float) -> None:
+    """
+    Fold a newly logged workout's training load into the materialized state.
+
+    Call inside the same transaction as the workout insert; the caller commits.
+    """
+    load = load or 0.0
+    latest = _latest_row(db, user_id, for_update=True)
+
+    if latest is None or workout_date > latest.date:
+        # Appended day: decay the last state across the rest days, then add today's load
+        if latest is None:
+            ctl, atl = 0.0, 0.0
+        else:
+            ctl, atl = decay_state(latest.ctl, latest.atl, (workout_date - latest.date).days - 1)
+        ctl += CTL_ALPHA * (load - ctl)
+        atl += ATL_ALPHA * (load - atl)
+        db.add(DailyTrainingState(
+            user_id=user_id,
+            date=workout_date,
+            daily_load=load,
+            ctl=ctl,
+            atl=atl,
+            tsb=ctl - atl
+        ))
+    elif workout_date == latest.date:
+        # Same day: extra load adds alpha * load to both averages
+        latest.daily_load += load
+        latest.ctl += CTL_ALPHA * load
+        latest.atl += ATL_ALPHA * load
+        latest.tsb = latest.ctl - latest.atl
+    else:
+        recompute_training_state(db, user_id, since=workout_date, added_load=load)
+
+    # Sessions run with autoflush off; make the new state visible to later reads
+    db.flush()
+
+
+def recompute_training_state(db: Session, user_id: int, since: date, added_load: float = 0.0) -> None:
+    """
+    Recompute the state forward from `since`, optionally adding load on that day.
+
+    Rows before `since` are untouched; the row just before seeds the EMA.
+    """
+    seed = _latest_row(db, user_id, before=since)
+    rows = db.query(DailyTrainingState).filter(
+        DailyTrainingState.user_id == user_id,
+        DailyTrainingState.date >= since
+    ).order_by(DailyTrainingState.date).all()
+
+    if rows and rows[0].date == since:
+        rows[0].daily_load += added_load
+    else:
+        first = DailyTrainingState(user_id=user_id, date=since, daily_load=added_load, ctl=0.0, atl=0.0, tsb=0.0)
+        db.add(first)
+        rows.insert(0, first)
+
+    if seed is None:
+        initial_ctl, initial_atl, initial_date = 0.0, 0.0, None
+    else:
+        initial_ctl, initial_atl, initial_date = seed.ctl, seed.atl, seed.date
+
+    series = compute_pmc_sparse(
+        [row.date for row in rows],
+        [row.daily_load for row in rows],
+        initial_ctl=initial_ctl,
+        initial_atl=initial_atl,
+        initial_date=initial_date
+    )
+    for index, row in enumerate(rows):
+        row.ctl = float(series["ctl"][index])
+        row.atl = float(series["atl"][index])
+        row.tsb = float(series["tsb"][index])
+
+
+def compute_state_rows(user_id: int, daily: List[Tuple[date, float]]) -> List[Dict]:
+    """
+    Compute daily_training_state rows from a user's full daily-load history.
+
+    Args:
+        user_id: Owner of the rows
+        daily: (date, total load) for every training day, oldest first
+
+    Returns:
+        One row dict per training day, ready for insert
+    """
+    series = compute_pmc_sparse([day for day, _ in daily], [load for _, load in daily])
+    return [
+        {
+            "user_id": user_id,
+            "date": day,
+            "daily_load": float(load),
+            "ctl": float(series["ctl"][index]),
+            "atl": float(series["atl"][index]),
+            "tsb": float(series["tsb"][index]),
+        }
+        for index, (day, load) in enumerate(daily)
+    ]
+
+
+def rebuild_training_state(db: Session, user_id: int) -> int:
+    """
+    Rebuild a user's materialized state from the workouts table.
+
+    Used for backfills and repairs. Returns the number of state rows written.
+    """
+    db.query(DailyTrainingState).filter(DailyTrainingState.user_id == user_id).delete()
+
+    daily = db.query(
+        Workout.date,
+        func.sum(func.coalesce(Workout.training_load_score, 0.0))
+    ).filter(
+        Workout.user_id == user_id
+    ).group_by(Workout.date).order_by(Workout.date).all()
+
+    rows = compute_state_rows(user_id, [(day, load) for day, load in daily])
+    if rows:
+        # Bulk insert: full rebuilds (imports, re-scores) can write years of rows
+        db.execute(insert(DailyTrainingState.__table__), rows)
+    return len(rows)
@@ -33,6 +33,18 @@ export const authAPI = {
     return response.data;
   },
 
+  // Change password; the server revokes older tokens and returns a replacement
+  changePassword: async (currentPassword, newPassword) => {
+    const response = await api.post('/change-password', {
+      current_password: currentPassword,
+      new_password: newPassword
+    });
+    if (response.data.access_token) {
+      localStorage.setItem('token', response.data.access_token);
+    }
+    return response.data;
+  },
+
   // Check if user is authenticated
   isAuthenticated: () => {
     return !!localStorage.getItem('token');
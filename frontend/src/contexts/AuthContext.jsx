@@ -50,12 +50,18 @@ export const AuthProvider = ({ children }) => {
     return updatedUser;
   };
 
+  const changePassword = async (currentPassword, newPassword) => {
+    // Stores the reissued token: the one in use is revoked by the change
+    return authAPI.changePassword(currentPassword, newPassword);
+  };
+
   const value = {
     user,
     login,
     signup,
     logout,
     updateProfile,
+    changePassword,
     isAuthenticated: !!user,
     loading,
   };
@@ -5,7 +5,7 @@ import api from '../api/axios';
 import './Profile.css';
 
 export default function Profile() {
-  const { user, updateProfile } = useAuth();
+  const { user, updateProfile, changePassword } = useAuth();
   const [activeTab, setActiveTab] = useState('overview');
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState({ type: '', text: '' });
@@ -101,10 +101,7 @@ export default function Profile() {
 
     setLoading(true);
     try {
-      await api.post('/change-password', {
-        current_password: passwordData.current_password,
-        new_password: passwordData.new_password
-      });
+      await changePassword(passwordData.current_password, passwordData.new_password);
       setMessage({ type: 'success', text: 'Password changed successfully!' });
       setPasswordData({ current_password: '', new_password: '', confirm_password: '' });
     } catch (error) {
@@ -0,0 +1,20 @@
+-- Migration: Add daily_training_state table
+-- Date: 2026-10-16
+-- Description: Materialized per-user daily CTL/ATL/TSB, maintained on every workout write.
+-- Populate it afterwards with: python scripts/backfill_training_state.py
+
+CREATE TABLE IF NOT EXISTS daily_training_state (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
+    daily_load DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ctl DOUBLE PRECISION NOT NULL,
+    atl DOUBLE PRECISION NOT NULL,
+    tsb DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (user_id, date)
+);
+
+-- Verify the table was created
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'daily_training_state';
@@ -0,0 +1,20 @@
+-- Migration: Add metrics_snapshots table
+-- Date: 2026-10-16
+-- Description: Nightly per-user CTL/ATL/TSB/recovery written by scripts/recompute_metrics.py
+
+CREATE TABLE IF NOT EXISTS metrics_snapshots (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
+    ctl DOUBLE PRECISION NOT NULL,
+    atl DOUBLE PRECISION NOT NULL,
+    tsb DOUBLE PRECISION NOT NULL,
+    recovery_score DOUBLE PRECISION NOT NULL,
+    weekly_training_load DOUBLE PRECISION NOT NULL,
+    computed_at TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (user_id, date)
+);
+
+-- Verify the table was created
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'metrics_snapshots';
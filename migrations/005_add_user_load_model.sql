@@ -0,0 +1,11 @@
+-- Migration: Add load_model column to users table
+-- Date: 2026-10-16
+-- Description: Per-user training load model (heuristic / trimp / hrtss), NULL = heuristic
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS load_model TEXT;
+
+-- Verify the column was added
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'users' AND column_name = 'load_model';
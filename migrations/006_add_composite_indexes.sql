@@ -0,0 +1,29 @@
+-- Migration: Composite (user_id, date) indexes for per-user range queries
+-- Date: 2026-10-16
+-- Description: Every hot read filters one user's rows by a date range and orders by date
+--              (training loads, recovery, dashboard, weekly activity). The composite indexes
+--              serve filter + order without a sort; INCLUDE columns allow index-only aggregates.
+--              The single-column user_id indexes they supersede are dropped.
+-- Note: CONCURRENTLY cannot run inside a transaction block; run statements one by one.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workouts_user_id_date
+    ON workouts (user_id, date) INCLUDE (training_load_score, duration, workout_type);
+DROP INDEX CONCURRENTLY IF EXISTS ix_workouts_user_id;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sleep_logs_user_id_date
+    ON sleep_logs (user_id, date) INCLUDE (hours, quality_score);
+DROP INDEX CONCURRENTLY IF EXISTS ix_sleep_logs_user_id;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_nutrition_logs_user_id_date
+    ON nutrition_logs (user_id, date);
+DROP INDEX CONCURRENTLY IF EXISTS ix_nutrition_logs_user_id;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recommendations_user_id_created_at
+    ON recommendations (user_id, created_at);
+DROP INDEX CONCURRENTLY IF EXISTS ix_recommendations_user_id;
+
+-- Verify the indexes were created
+SELECT tablename, indexname, indexdef
+FROM pg_indexes
+WHERE tablename IN ('workouts', 'sleep_logs', 'nutrition_logs', 'recommendations')
+ORDER BY tablename, indexname;
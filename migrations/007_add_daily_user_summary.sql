@@ -0,0 +1,60 @@
+-- Migration: Add daily_user_summary rollup table
+-- Date: 2026-10-16
+-- Description: Per-user, per-day totals of workouts, sleep and nutrition, upserted on every
+--              log write. Weekly activity, daily loads and the dashboard read one row per day.
+--              workout_types is a bitmap: easy=1, tempo=2, interval=4, long=8, race=16, other=32.
+
+CREATE TABLE IF NOT EXISTS daily_user_summary (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
+    workout_count INTEGER NOT NULL DEFAULT 0,
+    workout_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    workout_distance DOUBLE PRECISION NOT NULL DEFAULT 0,
+    training_load DOUBLE PRECISION NOT NULL DEFAULT 0,
+    workout_types INTEGER NOT NULL DEFAULT 0,
+    sleep_count INTEGER NOT NULL DEFAULT 0,
+    sleep_hours DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sleep_quality DOUBLE PRECISION NOT NULL DEFAULT 0,
+    nutrition_count INTEGER NOT NULL DEFAULT 0,
+    calories DOUBLE PRECISION NOT NULL DEFAULT 0,
+    protein DOUBLE PRECISION NOT NULL DEFAULT 0,
+    carbs DOUBLE PRECISION NOT NULL DEFAULT 0,
+    fats DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (user_id, date)
+);
+
+-- Backfill from existing logs
+INSERT INTO daily_user_summary
+    (user_id, date, workout_count, workout_duration, workout_distance, training_load, workout_types)
+SELECT user_id, date, count(*), sum(duration), sum(coalesce(distance, 0)),
+       sum(coalesce(training_load_score, 0)),
+       bit_or(CASE lower(workout_type)
+           WHEN 'easy' THEN 1 WHEN 'tempo' THEN 2 WHEN 'interval' THEN 4
+           WHEN 'long' THEN 8 WHEN 'race' THEN 16 ELSE 32 END)
+FROM workouts
+GROUP BY user_id, date
+ON CONFLICT (user_id, date) DO NOTHING;
+
+INSERT INTO daily_user_summary (user_id, date, sleep_count, sleep_hours, sleep_quality)
+SELECT user_id, date, count(*), sum(hours), sum(quality_score)
+FROM sleep_logs
+GROUP BY user_id, date
+ON CONFLICT (user_id, date) DO UPDATE SET
+    sleep_count = EXCLUDED.sleep_count,
+    sleep_hours = EXCLUDED.sleep_hours,
+    sleep_quality = EXCLUDED.sleep_quality;
+
+INSERT INTO daily_user_summary (user_id, date, nutrition_count, calories, protein, carbs, fats)
+SELECT user_id, date, count(*), sum(calories), sum(protein), sum(carbs), sum(fats)
+FROM nutrition_logs
+GROUP BY user_id, date
+ON CONFLICT (user_id, date) DO UPDATE SET
+    nutrition_count = EXCLUDED.nutrition_count,
+    calories = EXCLUDED.calories,
+    protein = EXCLUDED.protein,
+    carbs = EXCLUDED.carbs,
+    fats = EXCLUDED.fats;
+
+-- Verify the table was populated
+SELECT count(*) AS summary_rows FROM daily_user_summary;
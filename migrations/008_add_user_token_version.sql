@@ -0,0 +1,12 @@
+-- Migration: Add token_version column to users table
+-- Date: 2026-10-16
+-- Description: Version stamped into access tokens ("ver" claim). Changing the password bumps it,
+--              which revokes tokens issued before; tokens without the claim count as version 0.
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+
+-- Verify the column was added
+SELECT column_name, data_type, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_name = 'users' AND column_name = 'token_version';
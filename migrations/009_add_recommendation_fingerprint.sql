@@ -0,0 +1,26 @@
+-- Migration: Add input_fingerprint and validation columns to recommendations table
+-- Date: 2026-10-16
+-- Description: input_fingerprint is a sha256 of the workflow inputs (coaching profile, rounded
+--              training metrics, date). POST /recommend returns today's stored row with the same
+--              fingerprint instead of running the LLM workflow again (force=true overrides).
+--              validation keeps the validator's verdict so a reused row returns the same body.
+--              Older rows keep NULL and are never reused.
+-- Note: CONCURRENTLY cannot run inside a transaction block; run statements one by one.
+
+ALTER TABLE recommendations
+ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(64);
+
+ALTER TABLE recommendations
+ADD COLUMN IF NOT EXISTS validation TEXT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recommendations_user_id_input_fingerprint
+    ON recommendations (user_id, input_fingerprint);
+
+-- Verify the columns and index were added
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'recommendations' AND column_name IN ('input_fingerprint', 'validation');
+
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'recommendations' AND indexname = 'ix_recommendations_user_id_input_fingerprint';
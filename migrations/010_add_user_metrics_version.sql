@@ -0,0 +1,16 @@
+-- Migration: Add metrics_version column to users table
+-- Date: 2026-10-17
+-- Description: Incremented in the same transaction as every write to a user's workouts, sleep,
+--              load-model inputs or derived training state (API handlers, imports, the nightly
+--              batch recompute and the re-score job). Each API worker's in-process metrics cache
+--              compares it on read, so writes made by other processes invalidate cached metrics.
+--              The batch recompute also re-checks it under a row lock to skip users written to
+--              while their shard was being computed.
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS metrics_version INTEGER NOT NULL DEFAULT 0;
+
+-- Verify the column was added
+SELECT column_name, data_type, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_name = 'users' AND column_name = 'metrics_version';
@@ -0,0 +1,24 @@
+-- Migration: Add other_workout_types column to daily_user_summary
+-- Date: 2026-10-17
+-- Description: The workout_types bitmap only has bits for easy, tempo, interval, long and race;
+--              any other type sets the "other" bit (32). Its names, as logged, are kept here
+--              newline-separated so /weekly-activity and /activity return them instead of "other".
+
+ALTER TABLE daily_user_summary
+ADD COLUMN IF NOT EXISTS other_workout_types TEXT NOT NULL DEFAULT '';
+
+-- Backfill from existing logs
+UPDATE daily_user_summary s
+SET other_workout_types = o.names
+FROM (
+    SELECT user_id, date, string_agg(DISTINCT workout_type, E'\n' ORDER BY workout_type) AS names
+    FROM workouts
+    WHERE lower(workout_type) NOT IN ('easy', 'tempo', 'interval', 'long', 'race')
+    GROUP BY user_id, date
+) o
+WHERE s.user_id = o.user_id AND s.date = o.date;
+
+-- Verify the column was added
+SELECT column_name, data_type, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_name = 'daily_user_summary' AND column_name = 'other_workout_types';
@@ -0,0 +1,36 @@
+"""
+Rebuild the materialized daily_user_summary and daily_training_state tables
+from the raw logs. Run once after migrations 003 / 007, or any time the
+derived tables need repairing.
+"""
+from app.database import SessionLocal
+from app.models import user, workout, sleep_log, nutrition_log, training_state, daily_summary  # noqa: F401
+from app.models.user import User
+from app.services.daily_summary import rebuild_daily_summary
+from app.services.training_state import rebuild_training_state
+
+print("="*60)
+print("Backfilling daily_user_summary and daily_training_state")
+print("="*60)
+
+db = SessionLocal()
+try:
+    user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id).all()]
+    total_days = 0
+    total_rows = 0
+
+    for user_id in user_ids:
+        total_days += rebuild_daily_summary(db, user_id)
+        total_rows += rebuild_training_state(db, user_id)
+        db.commit()
+
+    print(f"✅ Rebuilt daily summaries for {len(user_ids)} users ({total_days} days)")
+    print(f"✅ Rebuilt training state for {len(user_ids)} users ({total_rows} rows)")
+
+except Exception as e:
+    db.rollback()
+    print(f"❌ Backfill failed: {e}")
+finally:
+    db.close()
+
+print("="*60)
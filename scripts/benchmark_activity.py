@@ -0,0 +1,130 @@
+"""
+Benchmark the /activity calendar against the old Python aggregation.
+
+Seeds one athlete with a 5-year history (1-2 workouts a day) into an
+in-memory SQLite database, or into --database-url (a disposable Postgres
+shows the date_trunc / bit_or path), then times, for each range and bucket:
+- legacy: load the raw workouts and group them in Python by strftime keys,
+  the way /weekly-activity used to
+- rollup: get_activity, one GROUP BY over daily_user_summary
+
+Usage:
+    python scripts/benchmark_activity.py [--years 5] [--repeat 5] [--database-url postgresql://...]
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import user, workout, sleep_log, nutrition_log, training_state, metrics_snapshot, daily_summary  # noqa: F401
+from app.models.user import User
+from app.models.workout import Workout
+from app.services.activity import bucket_start, get_activity
+from app.services.daily_summary import rebuild_daily_summary
+
+WORKOUT_TYPES = ["easy", "easy", "tempo", "interval", "long", "race"]
+
+
+def legacy_activity(db, user_id, start, end, bucket):
+    """The pre-rollup approach: every raw workout through Python, keyed by strftime strings."""
+    workouts = db.query(Workout).filter(
+        Workout.user_id == user_id,
+        Workout.date >= start,
+        Workout.date <= end
+    ).order_by(Workout.date).all()
+
+    buckets = defaultdict(lambda: {"duration": 0, "training_load": 0, "workout_count": 0, "workout_types": []})
+    for w in workouts:
+        key = bucket_start(w.date, bucket).strftime("%Y-%m-%d")
+        buckets[key]["duration"] += w.duration
+        buckets[key]["training_load"] += w.training_load_score or 0
+        buckets[key]["workout_count"] += 1
+        buckets[key]["workout_types"].append(w.workout_type)
+    return [
+        {**data, "period_start": key, "workout_types": list(set(data["workout_types"]))}
+        for key, data in sorted(buckets.items())
+    ]
+
+
+def seed(db, years):
+    athlete = User(email="benchmark@example.com", hashed_password="x", name="Benchmark")
+    db.add(athlete)
+    db.commit()
+
+    rng = random.Random(42)
+    today = date.today()
+    rows = []
+    for offset in range(years * 365):
+        for _ in range(rng.choice([0, 1, 1, 1, 2])):
+            duration = rng.randint(30, 120)
+            rows.append({
+                "user_id": athlete.id,
+                "date": today - timedelta(days=offset),
+                "duration": duration,
+                "distance": duration / 6,
+                "workout_type": rng.choice(WORKOUT_TYPES),
+                "training_load_score": duration * rng.uniform(0.6, 1.4),
+            })
+    db.bulk_insert_mappings(Workout, rows)
+    rebuild_daily_summary(db, athlete.id)
+    db.commit()
+    return athlete.id, len(rows)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /activity against the legacy Python grouping")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="", help="Disposable database; tables are dropped afterwards")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+        tables = None
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        tables = [table for name, table in Base.metadata.tables.items() if name != "recommendations"]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    print("="*60)
+    print(f"Activity calendar benchmark ({engine.dialect.name})")
+    print("="*60)
+
+    try:
+        user_id, workout_count = seed(db, args.years)
+        print(f"Seeded {workout_count} workouts over {args.years} years")
+
+        end = date.today()
+        print(f"\n{'range':>8} {'bucket':>7} {'legacy ms':>10} {'rollup ms':>10} {'speedup':>8}")
+        for range_days in (365, args.years * 365):
+            start = end - timedelta(days=range_days - 1)
+            for bucket in ("day", "week", "month"):
+                legacy = timed(lambda: legacy_activity(db, user_id, start, end, bucket), args.repeat)
+                rollup = timed(lambda: get_activity(db, user_id, start, end, bucket), args.repeat)
+                print(f"{range_days:>7}d {bucket:>7} {legacy:>10.1f} {rollup:>10.1f} {legacy / rollup:>7.1f}x")
+        print("\n✅ Benchmark complete")
+    finally:
+        db.close()
+        Base.metadata.drop_all(engine, tables=tables)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Throughput benchmark for comparing the sync and async API stacks.
+Start the server once with DB_ASYNC=false and once with DB_ASYNC=true on
+the same hardware, then run this against each.
+
+Fires a fixed number of authenticated GETs at concurrency C and reports
+requests/sec and latency percentiles. --recommend-load keeps that many
+/recommend calls running alongside to show whether slow LLM requests
+starve the rest of the API.
+
+Usage:
+    python scripts/benchmark_api.py --email you@example.com --password secret \\
+        [--url http://localhost:8000] [--endpoint /dashboard] [--requests 2000] \\
+        [--concurrency 50] [--recommend-load 0]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def worker(client, endpoint, headers, remaining, latencies, errors):
+    while remaining:
+        remaining.pop()
+        started = time.perf_counter()
+        response = await client.get(endpoint, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def recommend_loop(client, headers, stop):
+    while not stop.is_set():
+        await client.post("/recommend", headers=headers)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + args.recommend_load)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        login = await client.post("/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        stop = asyncio.Event()
+        background = [asyncio.create_task(recommend_loop(client, headers, stop)) for _ in range(args.recommend_load)]
+
+        remaining = list(range(args.requests))
+        latencies, errors = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, args.endpoint, headers, remaining, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await asyncio.gather(*background, return_exceptions=True)
+
+    print(f"✅ {len(latencies)} x GET {args.endpoint} in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} req/sec, {len(errors)} errors)")
+    print(f"   latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API throughput")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--endpoint", default="/dashboard")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--recommend-load", type=int, default=0, help="concurrent /recommend calls kept running")
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"Benchmarking {args.url}{args.endpoint}")
+    print("="*60)
+
+    try:
+        asyncio.run(run(args))
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+
+    print("="*60)
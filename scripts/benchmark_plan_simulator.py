@@ -0,0 +1,126 @@
+"""
+Benchmark POST /simulate's projection against a per-plan Python loop.
+
+Seeds one athlete with a training state into an in-memory SQLite database,
+builds --plans random plans over --days days (up to 16 weeks), then times:
+- loop: score each workout with score() and step CTL/ATL day by day per plan
+- simulator: simulate_training_plans, one batch score and one vectorized
+  pass over the plans x days load matrix (target: < 50 ms for 100 plans)
+
+Usage:
+    python scripts/benchmark_plan_simulator.py [--plans 100] [--days 112] [--repeat 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import user, workout, sleep_log, nutrition_log, training_state, metrics_snapshot, daily_summary  # noqa: F401
+from app.models.user import User
+from app.routes.schemas import PlannedWorkout, TrainingPlan
+from app.services.load_models import HeartRateProfile, get_user_load_model
+from app.services.plan_simulator import MAX_PROJECTION_DAYS, simulate_training_plans
+from app.services.training_engine import ATL_ALPHA, CTL_ALPHA
+from app.services.training_state import apply_workout_load, get_training_state
+
+WORKOUT_TYPES = ["easy", "easy", "tempo", "interval", "long", "race"]
+TARGET_MS = 50
+
+
+def seed(db):
+    athlete = User(email="benchmark@example.com", hashed_password="x", name="Benchmark", age=38)
+    db.add(athlete)
+    db.commit()
+    today = date.today()
+    rng = random.Random(42)
+    for offset in range(120, 0, -1):
+        if rng.random() < 0.7:
+            apply_workout_load(db, athlete.id, today - timedelta(days=offset), rng.uniform(30, 150))
+    db.commit()
+    return athlete
+
+
+def random_plans(count, days):
+    rng = random.Random(7)
+    return [
+        TrainingPlan(name=f"Plan {index + 1}", workouts=[
+            PlannedWorkout(
+                day=day,
+                workout_type=rng.choice(WORKOUT_TYPES),
+                duration=rng.randint(30, 150),
+                avg_hr=rng.choice([None, rng.randint(120, 180)])
+            )
+            for day in range(1, days + 1) if rng.random() < 0.8
+        ])
+        for index in range(count)
+    ]
+
+
+def loop_projection(db, athlete, plans, days):
+    """The straightforward approach: per plan, per workout score(), per day EMA step."""
+    current = get_training_state(db, athlete.id)
+    model, profile = get_user_load_model(athlete), HeartRateProfile.from_user(athlete)
+    projections = []
+    for plan in plans:
+        daily = [0.0] * days
+        for planned in plan.workouts:
+            daily[planned.day - 1] += model.score(planned.duration, planned.workout_type, planned.avg_hr, profile)
+        ctl, atl, series = current["ctl"], current["atl"], []
+        for load in daily:
+            ctl += CTL_ALPHA * (load - ctl)
+            atl += ATL_ALPHA * (load - atl)
+            series.append((ctl, atl, ctl - atl))
+        projections.append(series)
+    return projections
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plan simulator against a per-plan Python loop")
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--days", type=int, default=MAX_PROJECTION_DAYS)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [table for name, table in Base.metadata.tables.items() if name != "recommendations"]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    print("="*60)
+    print("Plan simulator benchmark")
+    print("="*60)
+
+    try:
+        athlete = seed(db)
+        plans = random_plans(args.plans, args.days)
+        workout_count = sum(len(plan.workouts) for plan in plans)
+        print(f"{args.plans} plans, {args.days} days, {workout_count} planned workouts")
+
+        loop = timed(lambda: loop_projection(db, athlete, plans, args.days), args.repeat)
+        simulator = timed(lambda: simulate_training_plans(db, athlete, plans, args.days), args.repeat)
+        print(f"\n{'loop ms':>10} {'simulator ms':>13} {'speedup':>8}")
+        print(f"{loop:>10.1f} {simulator:>13.1f} {loop / simulator:>7.1f}x")
+        verdict = "✅" if simulator < TARGET_MS else "❌"
+        print(f"\n{verdict} simulator median {simulator:.1f} ms (target < {TARGET_MS} ms)")
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Nightly cohort-wide recompute of CTL/ATL/TSB and recovery.
+Rebuilds daily_training_state and writes today's row in metrics_snapshots
+for every user, sharded across worker processes.
+
+Usage:
+    python scripts/recompute_metrics.py [--workers N] [--shard-size N]
+"""
+import argparse
+
+from app.services.batch_metrics import recompute_all_metrics
+
+
+def report(users_done: int, elapsed: float) -> None:
+    rate = users_done / elapsed if elapsed > 0 else 0.0
+    print(f"   {users_done} users done ({rate:.1f} users/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute training metrics for all users")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=500, help="users per worker task")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("Recomputing training metrics for all users")
+    print("="*60)
+
+    try:
+        stats = recompute_all_metrics(workers=args.workers, shard_size=args.shard_size, progress=report)
+        print(f"\n✅ {stats['users']} users in {stats['seconds']}s "
+              f"({stats['users_per_sec']} users/sec, {stats['shards']} shards)")
+        if stats["skipped"]:
+            print(f"   {stats['skipped']} users were written to during the run and kept their current state")
+    except Exception as e:
+        print(f"\n❌ Recompute failed: {e}")
+
+    print("="*60)
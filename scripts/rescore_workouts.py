@@ -0,0 +1,38 @@
+"""
+Re-score training_load_score for every workout with each user's current
+load model, then rebuild derived training state for users whose scores changed.
+Resumable: progress is checkpointed after every chunk; re-run the same
+command after an interruption to continue.
+
+Usage:
+    python scripts/rescore_workouts.py [--chunk-size N] [--checkpoint PATH]
+"""
+import argparse
+
+from app.services.rescore import rescore_workouts
+
+
+def report(rows_done: int, elapsed: float) -> None:
+    rate = rows_done / elapsed if elapsed > 0 else 0.0
+    print(f"   {rows_done} workouts scanned ({rate:.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score training load for all workouts")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="workouts per chunk (one transaction each)")
+    parser.add_argument("--checkpoint", default="rescore_checkpoint.json", help="checkpoint file used to resume")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("Re-scoring workout training load")
+    print("="*60)
+
+    try:
+        stats = rescore_workouts(chunk_size=args.chunk_size, checkpoint_path=args.checkpoint, progress=report)
+        print(f"\n✅ {stats['rows']} workouts scanned, {stats['updated']} re-scored, "
+              f"{stats['users']} users rebuilt in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec)")
+    except Exception as e:
+        print(f"\n❌ Re-score failed: {e}")
+        print(f"   Progress saved to {args.checkpoint}; run again to resume")
+
+    print("="*60)
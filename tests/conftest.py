@@ -0,0 +1,58 @@
+"""
+Shared pytest fixtures: an in-memory SQLite database with the app's tables.
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import user, workout, sleep_log, nutrition_log, training_state, metrics_snapshot, daily_summary  # noqa: F401
+from app.models.user import User
+
+# recommendations uses JSONB, which SQLite cannot create
+SQLITE_TABLES = [
+    table for name, table in Base.metadata.tables.items()
+    if name != "recommendations"
+]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine, tables=SQLITE_TABLES)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def athlete(db):
+    athlete = User(email="athlete@example.com", hashed_password="x", name="Test Athlete")
+    db.add(athlete)
+    db.commit()
+    return athlete
+
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Collects every SQL statement executed on the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,81 @@
+"""
+Tests for the activity calendar (app/services/activity.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.workout import Workout
+from app.services.activity import MAX_ACTIVITY_DAYS, bucket_start, get_activity
+from app.services.daily_summary import upsert_daily_totals, workout_totals
+
+START = date(2025, 12, 29)  # a Monday
+
+
+@pytest.fixture
+def calendar(db, athlete):
+    """Workouts on a handful of days across three months."""
+    entries = [
+        (date(2025, 12, 30), 40, "easy"),
+        (date(2026, 1, 1), 60, "tempo"),
+        (date(2026, 1, 1), 30, "easy"),
+        (date(2026, 1, 6), 90, "long"),
+        (date(2026, 2, 14), 45, "hill repeats"),
+        (date(2026, 2, 15), 30, "Yoga"),
+        (date(2026, 2, 16), 40, "hill repeats"),
+    ]
+    for day, duration, workout_type in entries:
+        workout = Workout(user_id=athlete.id, date=day, duration=duration, distance=duration / 6,
+                          workout_type=workout_type, training_load_score=duration)
+        db.add(workout)
+        upsert_daily_totals(db, athlete.id, [(day, workout_totals(workout))])
+    db.commit()
+    return athlete.id
+
+
+def test_day_buckets_cover_range(db, calendar):
+    activity = get_activity(db, calendar, START, date(2026, 1, 6), "day")
+
+    assert [bucket["period_start"] for bucket in activity] == [START + timedelta(days=i) for i in range(9)]
+    assert [bucket["workout_count"] for bucket in activity] == [0, 1, 0, 2, 0, 0, 0, 0, 1]
+    assert activity[3]["duration"] == 90
+    assert activity[3]["workout_types"] == ["easy", "tempo"]
+
+
+def test_week_buckets_start_on_monday(db, calendar):
+    activity = get_activity(db, calendar, date(2025, 12, 31), date(2026, 1, 11), "week")
+
+    assert [bucket["period_start"] for bucket in activity] == [START, date(2026, 1, 5)]
+    # Dec 30 is outside the range even though its week is not
+    assert activity[0]["workout_count"] == 2
+    assert activity[0]["active_days"] == 1
+    assert activity[1]["workout_types"] == ["long"]
+
+
+def test_month_buckets(db, calendar):
+    activity = get_activity(db, calendar, date(2025, 12, 1), date(2026, 3, 31), "month")
+
+    assert [bucket["period_start"] for bucket in activity] == [
+        date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)
+    ]
+    assert [bucket["workout_count"] for bucket in activity] == [1, 3, 3, 0]
+    assert activity[1]["training_load"] == 180
+    assert activity[1]["active_days"] == 2
+    assert activity[1]["workout_types"] == ["easy", "tempo", "long"]
+    assert activity[2]["workout_types"] == ["Yoga", "hill repeats"]
+    assert activity[3]["workout_types"] == []
+
+
+def test_bucket_start():
+    assert bucket_start(date(2026, 1, 1), "week") == START
+    assert bucket_start(date(2026, 1, 18), "month") == date(2026, 1, 1)
+
+
+@pytest.mark.parametrize("start,end,bucket", [
+    (date(2026, 1, 1), date(2026, 1, 31), "year"),
+    (date(2026, 2, 1), date(2026, 1, 1), "day"),
+    (date(2026, 1, 1) - timedelta(days=MAX_ACTIVITY_DAYS), date(2026, 1, 1), "month"),
+])
+def test_invalid_requests(db, athlete, start, end, bucket):
+    with pytest.raises(ValueError):
+        get_activity(db, athlete.id, start, end, bucket)
@@ -0,0 +1,103 @@
+"""
+The async route variants (settings.DB_ASYNC) against aiosqlite: same
+results as the sync services for the log -> metrics flow.
+(/dashboard reads recommendations, which SQLite cannot create.)
+"""
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_async_db
+from app.models.user import User
+from app.models.workout import Workout
+from app.routes import auth_async, user_async, logs_async
+from app.routes.auth_utils import create_access_token
+from app.services.load_models import HeartRateProfile, get_load_model
+from app.services.metrics_cache import metrics_cache
+from app.services.principal_cache import principal_cache
+from app.services.training_engine import get_training_metrics
+from app.services.training_state import get_training_state
+from tests.conftest import SQLITE_TABLES
+
+
+def build_app(session_factory) -> FastAPI:
+    app = FastAPI()
+    for module in (auth_async, user_async, logs_async):
+        app.include_router(module.router)
+
+    async def override_get_async_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+async def run_flow(engine_url: str):
+    engine = create_async_engine(engine_url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=SQLITE_TABLES))
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with session_factory() as session:
+        athlete = User(email="async@example.com", hashed_password="x", name="Async Athlete", age=35)
+        session.add(athlete)
+        await session.commit()
+        user_id = athlete.id
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    transport = httpx.ASGITransport(app=build_app(session_factory))
+    today = date.today()
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Appended, same-day and back-dated workouts all go through apply_workout_load via run_sync
+        for offset, workout_type in [(10, "easy"), (3, "tempo"), (3, "easy"), (6, "interval"), (0, "long")]:
+            response = await client.post("/log-workout", headers=headers, json={
+                "date": (today - timedelta(days=offset)).isoformat(),
+                "duration": 45,
+                "avg_hr": 150,
+                "workout_type": workout_type
+            })
+            assert response.status_code == 201, response.text
+        response = await client.post("/log-sleep", headers=headers, json={
+            "date": today.isoformat(), "hours": 8, "quality_score": 8
+        })
+        assert response.status_code == 201
+        # A new load model re-scores the logged workouts
+        response = await client.put("/me", headers=headers, json={"load_model": "trimp"})
+        assert response.status_code == 200, response.text
+
+        metrics = (await client.get("/metrics", headers=headers)).json()
+        history = (await client.get("/metrics/history", headers=headers)).json()
+        profile = (await client.get("/me", headers=headers)).json()
+        weekly = (await client.get("/weekly-activity", headers=headers)).json()
+
+    async with session_factory() as session:
+        expected_metrics = await session.run_sync(lambda sync_session: get_training_metrics(sync_session, user_id))
+        expected_state = await session.run_sync(lambda sync_session: get_training_state(sync_session, user_id))
+        workouts = (await session.scalars(select(Workout).where(Workout.user_id == user_id))).all()
+        trimp, profile_35 = get_load_model("trimp"), HeartRateProfile(max_hr=185.0)
+        rescored = all(
+            workout.training_load_score == trimp.score(workout.duration, workout.workout_type, workout.avg_hr, profile_35)
+            for workout in workouts
+        )
+
+    await engine.dispose()
+    return metrics, history, profile, weekly, expected_metrics, expected_state, rescored
+
+
+def test_async_flow_matches_sync_services():
+    metrics_cache.clear()
+    principal_cache.clear()
+    metrics, history, profile, weekly, expected_metrics, expected_state, rescored = asyncio.run(run_flow("sqlite+aiosqlite://"))
+
+    assert metrics == expected_metrics
+    assert metrics["fitness"]["ctl"] == expected_state["ctl"]
+    assert history["points"][-1]["ctl"] == expected_state["ctl"]
+    assert profile["email"] == "async@example.com"
+    assert sum(day["workout_count"] for day in weekly["weekly_activity"]) == 4
+    assert profile["load_model"] == "trimp" and rescored
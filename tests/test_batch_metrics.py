@@ -0,0 +1,94 @@
+"""
+Tests for the cohort-wide batch recompute (app/services/batch_metrics.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.metrics_snapshot import MetricsSnapshot
+from app.models.sleep_log import SleepLog
+from app.models.user import User
+from app.models.workout import Workout
+from app.models.training_state import DailyTrainingState
+from app.services.batch_metrics import _write_shard, compute_shard_metrics, recompute_all_metrics, stream_user_histories
+from app.services.metrics_cache import bump_metrics_version
+from app.services.training_engine import get_training_metrics
+from app.services.training_state import apply_workout_load
+
+
+@pytest.fixture
+def cohort(db):
+    today = date.today()
+    user_ids = []
+    for n in range(5):
+        user = User(email=f"athlete{n}@example.com", hashed_password="x", name=f"Athlete {n}")
+        db.add(user)
+        db.commit()
+        user_ids.append(user.id)
+        # Athlete 0 has no history at all
+        for offset in range(0, 60 * n, 3 + n):
+            day = today - timedelta(days=offset)
+            load = 40.0 + 10 * n + offset % 7
+            db.add(Workout(user_id=user.id, date=day, duration=load, workout_type="easy", training_load_score=load))
+            apply_workout_load(db, user.id, day, load)
+            db.commit()
+        if n % 2:
+            db.add(SleepLog(user_id=user.id, date=today - timedelta(days=1), hours=6.0 + n / 2, quality_score=5 + n))
+            db.commit()
+    return user_ids
+
+
+def test_batch_matches_per_user_metrics(engine, db, cohort):
+    progress = []
+    stats = recompute_all_metrics(
+        session_factory=sessionmaker(bind=engine),
+        workers=2,
+        shard_size=2,
+        progress=lambda users_done, elapsed: progress.append(users_done)
+    )
+
+    assert stats["users"] == len(cohort)
+    assert stats["skipped"] == 0
+    assert stats["shards"] == 3
+    assert progress[-1] == len(cohort)
+
+    snapshots = {row.user_id: row for row in db.query(MetricsSnapshot).all()}
+    for user_id in cohort:
+        expected = get_training_metrics(db, user_id)
+        snapshot = snapshots[user_id]
+        assert snapshot.date == date.today()
+        assert snapshot.ctl == expected["fitness"]["ctl"]
+        assert snapshot.atl == expected["fatigue"]["atl"]
+        assert snapshot.tsb == expected["form"]["tsb"]
+        assert snapshot.recovery_score == expected["recovery"]["recovery_score"]
+        assert snapshot.weekly_training_load == expected["weekly_training_load"]
+
+
+def test_shard_skips_users_written_during_the_run(engine, db, cohort):
+    as_of = date.today()
+    read_db = sessionmaker(bind=engine)()
+    shard = list(stream_user_histories(read_db, as_of))
+    read_db.close()
+    state_rows, snapshots = compute_shard_metrics(shard, as_of)
+
+    # A workout for athlete 3 commits after the stream read, before the shard write
+    writer = cohort[3]
+    bump_metrics_version(db, [writer])
+    db.add(Workout(user_id=writer, date=as_of, duration=90, workout_type="long", training_load_score=150.0))
+    apply_workout_load(db, writer, as_of, 150.0)
+    db.commit()
+
+    write_db = sessionmaker(bind=engine)()
+    skipped = _write_shard(write_db, {user_id: version for user_id, version, _, _ in shard}, state_rows, snapshots, as_of)
+    write_db.close()
+
+    assert skipped == 1
+    db.expire_all()
+    latest = db.query(DailyTrainingState).filter_by(user_id=writer).order_by(DailyTrainingState.date.desc()).first()
+    assert latest.date == as_of and latest.daily_load >= 150.0  # the logged workout survived
+    written = {row.user_id for row in db.query(MetricsSnapshot).all()}
+    assert written == set(cohort) - {writer}
+    # Written users are bumped so API workers drop their cached metrics
+    versions = dict(db.query(User.id, User.metrics_version).all())
+    assert all(versions[user_id] == 1 for user_id in cohort)
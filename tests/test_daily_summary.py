@@ -0,0 +1,123 @@
+"""
+Tests for the daily_user_summary rollup (app/services/daily_summary.py)
+"""
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.daily_summary import DailyUserSummary
+from app.models.nutrition_log import NutritionLog
+from app.models.sleep_log import SleepLog
+from app.models.workout import Workout
+from app.routes.user import summarize_weekly_activity
+from app.services.daily_summary import (
+    get_daily_summaries,
+    nutrition_totals,
+    rebuild_daily_summary,
+    sleep_totals,
+    split_other_types,
+    summary_to_dict,
+    types_from_bitmap,
+    upsert_daily_totals,
+    workout_totals,
+)
+from app.services.history_import import import_history
+from app.services.training_engine import get_training_loads
+
+TODAY = date.today()
+
+
+def _rows(db, user_id):
+    rows = [
+        {column: getattr(row, column) for column in DailyUserSummary.__table__.columns.keys() if column != "updated_at"}
+        for row in db.query(DailyUserSummary).filter_by(user_id=user_id).order_by(DailyUserSummary.date)
+    ]
+    for row in rows:
+        row["other_workout_types"] = split_other_types(row["other_workout_types"])  # stored in write order
+    return rows
+
+
+@pytest.fixture
+def logged(db, athlete):
+    """A week of logs written the way the /log-* endpoints write them."""
+    logs = [
+        Workout(user_id=athlete.id, date=TODAY, duration=45, distance=8.0, workout_type="easy", training_load_score=40),
+        Workout(user_id=athlete.id, date=TODAY, duration=30, workout_type="Interval", training_load_score=55),
+        Workout(user_id=athlete.id, date=TODAY - timedelta(days=2), duration=90, distance=18.0,
+                workout_type="long", training_load_score=110),
+        Workout(user_id=athlete.id, date=TODAY - timedelta(days=3), duration=60, workout_type="hill repeats",
+                training_load_score=70),
+        Workout(user_id=athlete.id, date=TODAY - timedelta(days=3), duration=20, workout_type="Yoga",
+                training_load_score=10),
+        Workout(user_id=athlete.id, date=TODAY - timedelta(days=3), duration=25, workout_type="hill repeats",
+                training_load_score=30),
+        SleepLog(user_id=athlete.id, date=TODAY, hours=7.5, quality_score=8),
+        SleepLog(user_id=athlete.id, date=TODAY - timedelta(days=1), hours=6.0, quality_score=5),
+        NutritionLog(user_id=athlete.id, date=TODAY, calories=1200, protein=60, carbs=150, fats=40),
+        NutritionLog(user_id=athlete.id, date=TODAY, calories=900, protein=40, carbs=100, fats=30),
+    ]
+    totals = {Workout: workout_totals, SleepLog: sleep_totals, NutritionLog: nutrition_totals}
+    for log in logs:
+        db.add(log)
+        upsert_daily_totals(db, athlete.id, [(log.date, totals[type(log)](log))])
+    db.commit()
+    return athlete.id
+
+
+def test_upsert_accumulates_and_ors_types(db, logged):
+    today = db.get(DailyUserSummary, (logged, TODAY))
+
+    assert today.workout_count == 2
+    assert today.workout_duration == 75
+    assert today.training_load == 95
+    assert types_from_bitmap(today.workout_types) == ["easy", "interval"]
+    assert today.sleep_count == 1 and today.sleep_hours == 7.5
+    assert today.nutrition_count == 2 and today.calories == 2100 and today.protein == 100
+
+    odd_day = db.get(DailyUserSummary, (logged, TODAY - timedelta(days=3)))
+    assert types_from_bitmap(odd_day.workout_types, odd_day.other_workout_types) == ["Yoga", "hill repeats"]
+    assert odd_day.other_workout_types.count("hill repeats") == 1
+    # Rows written before other_workout_types existed still report the bit
+    assert types_from_bitmap(odd_day.workout_types) == ["other"]
+
+
+def test_rebuild_matches_incremental_upserts(db, logged):
+    incremental = _rows(db, logged)
+
+    days = rebuild_daily_summary(db, logged)
+    db.commit()
+
+    assert days == 4
+    assert _rows(db, logged) == incremental
+
+
+def test_aggregate_reads_use_rollup(db, logged):
+    assert get_training_loads(db, logged, days=4) == [110.0, 110.0, 0.0, 95.0]
+
+    week_ago = TODAY - timedelta(days=6)
+    activity = summarize_weekly_activity(get_daily_summaries(db, logged, week_ago, TODAY), week_ago)
+    assert len(activity) == 7
+    assert [day["workout_count"] for day in activity] == [0, 0, 0, 3, 1, 0, 2]
+    assert activity[-1]["duration"] == 75
+    assert activity[-1]["training_load"] == 95
+    assert activity[-1]["workout_types"] == ["easy", "interval"]
+    assert activity[3]["workout_types"] == ["Yoga", "hill repeats"]
+
+    summary = summary_to_dict(db.get(DailyUserSummary, (logged, TODAY - timedelta(days=1))))
+    assert summary["workout_count"] == 0 and summary["workout_types"] == []
+    assert summary["sleep_quality"] == 5.0
+    assert summary["calories"] is None
+
+
+def test_import_populates_rollup(db, athlete):
+    upload = io.BytesIO(
+        b"date,hours,quality_score\n"
+        b"2026-01-01,7,6\n"
+        b"2026-01-01,1.5,4\n"
+        b"2026-01-02,8,9\n"
+    )
+    import_history(db, athlete, "sleep", upload, "csv")
+
+    rows = get_daily_summaries(db, athlete.id, date(2026, 1, 1), date(2026, 1, 2))
+    assert [(row.sleep_count, row.sleep_hours, row.sleep_quality) for row in rows] == [(2, 8.5, 10), (1, 8.0, 9)]
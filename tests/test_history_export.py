@@ -0,0 +1,62 @@
+"""
+Tests for streaming history export (app/services/history_export.py)
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.sleep_log import SleepLog
+from app.models.workout import Workout
+from app.services import history_export
+from app.services.history_export import stream_export
+
+
+@pytest.fixture
+def history(db, athlete):
+    start = date(2024, 1, 1)
+    for n in range(500):
+        db.add(Workout(user_id=athlete.id, date=start + timedelta(days=n), duration=30 + n % 40,
+                       workout_type="easy", notes="hill, reps" if n % 7 == 0 else None,
+                       training_load_score=30.0 + n % 40))
+    db.add(SleepLog(user_id=athlete.id, date=start, hours=7.5, quality_score=8))
+    db.commit()
+    return athlete.id
+
+
+def test_ndjson_export_streams_in_chunks(engine, history, monkeypatch):
+    monkeypatch.setattr(history_export, "EXPORT_CHUNK_BYTES", 4096)
+    chunks = list(stream_export(history, "workouts", "ndjson", session_factory=sessionmaker(bind=engine)))
+
+    assert len(chunks) > 5
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert len(rows) == 500
+    assert rows[0]["date"] == "2024-01-01"
+    assert rows[0]["notes"] == "hill, reps"
+    assert [row["date"] for row in rows] == sorted(row["date"] for row in rows)
+
+
+def test_csv_export_gzip(engine, history):
+    body = b"".join(stream_export(history, "workouts", "csv", compress=True, session_factory=sessionmaker(bind=engine)))
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(body).decode())))
+
+    assert len(rows) == 500
+    assert rows[0]["notes"] == "hill, reps"
+    assert rows[1]["notes"] == ""
+    assert float(rows[1]["training_load_score"]) == 31.0
+
+
+def test_export_only_returns_own_rows(engine, db, history):
+    body = b"".join(stream_export(history + 1, "sleep", "ndjson", session_factory=sessionmaker(bind=engine)))
+    assert body == b""
+    body = b"".join(stream_export(history, "sleep", "ndjson", session_factory=sessionmaker(bind=engine)))
+    assert json.loads(body)["hours"] == 7.5
+
+
+def test_unknown_kind_rejected(engine):
+    with pytest.raises(ValueError):
+        list(stream_export(1, "passwords", "ndjson", session_factory=sessionmaker(bind=engine)))
@@ -0,0 +1,125 @@
+"""
+Tests for bulk history import (app/services/history_import.py)
+"""
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.nutrition_log import NutritionLog
+from app.models.sleep_log import SleepLog
+from app.models.training_state import DailyTrainingState
+from app.models.workout import Workout
+from app.routes.logs import calculate_training_load
+from app.services.history_import import detect_format, import_history
+from app.services.training_state import get_training_state, rebuild_training_state
+
+
+def test_csv_workouts_with_row_errors(db, athlete):
+    upload = io.BytesIO(
+        b"date,duration,workout_type,avg_hr,distance,notes\n"
+        b"2026-01-01,45,easy,,8.2,\n"
+        b"2026-01-02,60,tempo,155,,threshold\n"
+        b"not-a-date,30,easy,,,\n"
+        b"2026-01-03,,interval,,,\n"
+        b"2026-01-03,40,interval,170,,\n"
+    )
+    result = import_history(db, athlete, "workouts", upload, "csv")
+
+    assert result["imported"] == 3
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [4, 5]
+    assert "date" in result["errors"][0]["error"]
+    assert "duration" in result["errors"][1]["error"]
+
+    workouts = db.query(Workout).order_by(Workout.date).all()
+    assert [w.training_load_score for w in workouts] == [
+        calculate_training_load(45, "easy"),
+        calculate_training_load(60, "tempo", 155),
+        calculate_training_load(40, "interval", 170),
+    ]
+    assert workouts[1].notes == "threshold" and workouts[0].avg_hr is None
+
+    # Materialized state matches a rebuild from the workouts table
+    imported_state = get_training_state(db, athlete.id, as_of=date(2026, 1, 10))
+    rebuild_training_state(db, athlete.id)
+    db.commit()
+    assert get_training_state(db, athlete.id, as_of=date(2026, 1, 10)) == imported_state
+    assert imported_state["ctl"] > 0
+
+
+def test_ndjson_sleep_and_nutrition(db, athlete):
+    sleep = io.BytesIO(
+        b'{"date": "2026-02-01", "hours": 7.5, "quality_score": 8}\n'
+        b'\n'
+        b'{"date": "2026-02-02", "hours": 6\n'
+        b'["not", "an", "object"]\n'
+        b'{"date": "2026-02-03", "hours": 8, "quality_score": 9}\n'
+    )
+    result = import_history(db, athlete, "sleep", sleep, "ndjson")
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+    assert db.query(SleepLog).count() == 2
+
+    nutrition = io.BytesIO(b'{"date": "2026-02-01", "calories": 2500, "protein": 120, "carbs": 300, "fats": 80}\n')
+    assert import_history(db, athlete, "nutrition", nutrition, "ndjson")["imported"] == 1
+    assert db.query(NutritionLog).one().calories == 2500
+
+
+def test_large_import_is_batched(db, athlete, count_queries):
+    start = date(2020, 1, 1)
+    lines = (
+        json.dumps({"date": (start + timedelta(days=n // 2)).isoformat(), "duration": 30 + n % 60,
+                    "workout_type": ["easy", "tempo", "long"][n % 3], "avg_hr": 120 + n % 50})
+        for n in range(20000)
+    )
+    upload = io.BytesIO("\n".join(lines).encode())
+
+    result = import_history(db, athlete, "workouts", upload, "ndjson")
+
+    assert result["imported"] == 20000
+    assert db.query(Workout).count() == 20000
+    assert db.query(DailyTrainingState).count() == 10000
+    # Multi-row inserts, not one statement per row
+    assert sum(statement.startswith("INSERT INTO workouts") for statement in count_queries) < 200
+
+
+def test_invalid_kind_and_format():
+    with pytest.raises(ValueError):
+        detect_format("history.xlsx")
+    assert detect_format("history.CSV") == "csv"
+    assert detect_format("export.jsonl") == "ndjson"
+
+
+def test_unreadable_csv_is_an_import_error(db, athlete):
+    upload = io.BytesIO(b"date,duration,workout_type,notes\n2026-01-01,45,easy,\"" + b"x" * 200000 + b"\"\n")
+
+    with pytest.raises(ValueError, match="line"):
+        import_history(db, athlete, "workouts", upload, "csv")
+    assert db.query(Workout).count() == 0
+
+
+def test_reupload_skips_rows_already_imported(db, athlete):
+    export = (
+        b"date,duration,workout_type,avg_hr\n"
+        b"2026-03-01,45,easy,\n"
+        b"2026-03-01,45,easy,\n"
+        b"2026-03-02,60,tempo,150\n"
+    )
+    first = import_history(db, athlete, "workouts", io.BytesIO(export), "csv")
+    before = get_training_state(db, athlete.id, as_of=date(2026, 3, 2))
+
+    # The same export again, plus one new day
+    second = import_history(db, athlete, "workouts", io.BytesIO(export + b"2026-03-03,30,easy,\n"), "csv")
+
+    assert (first["imported"], first["duplicates"]) == (3, 0)  # repeats within one upload are kept
+    assert (second["imported"], second["duplicates"]) == (1, 3)
+    assert db.query(Workout).count() == 4
+    # The re-imported days are not counted twice
+    assert get_training_state(db, athlete.id, as_of=date(2026, 3, 2)) == before
+
+    sleep = b'{"date": "2026-03-01", "hours": 7.5, "quality_score": 8}\n'
+    assert import_history(db, athlete, "sleep", io.BytesIO(sleep), "ndjson")["imported"] == 1
+    assert import_history(db, athlete, "sleep", io.BytesIO(sleep), "ndjson")["duplicates"] == 1
+    assert db.query(SleepLog).count() == 1
@@ -0,0 +1,36 @@
+"""
+Tests for the /internal operational endpoints' token guard (app/routes/internal.py)
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import internal
+from app.routes.config import settings
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(internal.router)
+    return TestClient(app)
+
+
+PATHS = ["/internal/cache-stats", "/internal/db-pool", "/internal/password-hashing", "/internal/llm"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_disabled_without_configured_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "")
+
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={"X-Internal-Token": ""}).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_requires_matching_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "s3cret")
+
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "s3cret"}).status_code == 200
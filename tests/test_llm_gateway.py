@@ -0,0 +1,305 @@
+"""
+Tests for the LLM gateway (app/services/llm_gateway.py) and the workflow on the stub backend
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services import ai_coach, llm_gateway as gateway_module
+from app.services.llm_gateway import LLMError, LLMGateway, StubBackend
+from app.services.recommendation_cache import RecommendationCache
+
+
+class FlakyBackend(StubBackend):
+    """Fails the first `failures` calls with `error`, then answers like the stub."""
+
+    def __init__(self, failures, error):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def complete(self, node, messages, **options):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return super().complete(node, messages, **options)
+
+    async def acomplete(self, node, messages, **options):
+        return self.complete(node, messages, **options)
+
+    @staticmethod
+    def retryable(error):
+        return isinstance(error, openai.APITimeoutError)
+
+
+def _timeout():
+    return openai.APITimeoutError(request=httpx.Request("POST", "https://llm.example/chat/completions"))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gateway_module, "RETRY_BASE_DELAY", 0.0)
+
+
+def test_stub_accounting_per_node():
+    gateway = LLMGateway(StubBackend(), max_concurrency=4, timeout=5, max_retries=2)
+
+    recommendation = json.loads(gateway.complete("recommend", "plan a workout"))
+    gateway.complete("validate", "is it safe")
+
+    assert recommendation["workout_type"] == "easy"
+    nodes = gateway.stats()["nodes"]
+    assert nodes["recommend"]["calls"] == 1
+    assert nodes["recommend"]["prompt_tokens"] == 3
+    assert nodes["validate"]["completion_tokens"] == 1
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_retries_transient_errors():
+    backend = FlakyBackend(failures=2, error=_timeout())
+    gateway = LLMGateway(backend, max_concurrency=1, timeout=5, max_retries=2)
+
+    assert gateway.complete("validate", "is it safe") == "APPROVED"
+    assert backend.calls == 3
+    assert gateway.stats()["nodes"]["validate"]["retries"] == 2
+
+
+def test_gives_up_after_max_retries():
+    gateway = LLMGateway(FlakyBackend(failures=5, error=_timeout()), max_concurrency=1, timeout=5, max_retries=1)
+
+    with pytest.raises(LLMError):
+        gateway.complete("analyze", "analyze this")
+    assert gateway.stats()["nodes"]["analyze"]["errors"] == 1
+
+
+def test_does_not_retry_other_errors():
+    backend = FlakyBackend(failures=1, error=ValueError("bad request"))
+    gateway = LLMGateway(backend, max_concurrency=1, timeout=5, max_retries=3)
+
+    with pytest.raises(LLMError):
+        gateway.complete("analyze", "analyze this")
+    assert backend.calls == 1
+
+
+def test_concurrency_cap():
+    gateway = LLMGateway(StubBackend(latency=0.05), max_concurrency=2, timeout=5, max_retries=0)
+
+    threads = [threading.Thread(target=gateway.complete, args=("analyze", "x")) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert gateway.stats()["peak_in_flight"] == 2
+    assert gateway.stats()["nodes"]["analyze"]["calls"] == 6
+
+
+def test_async_concurrency_cap():
+    gateway = LLMGateway(StubBackend(latency=0.02), max_concurrency=3, timeout=5, max_retries=0)
+
+    async def run():
+        return await asyncio.gather(*[gateway.acomplete("validate", "x") for _ in range(10)])
+
+    assert asyncio.run(run()) == ["APPROVED"] * 10
+    assert gateway.stats()["peak_in_flight"] == 3
+
+
+METRICS = {
+    "fitness": {"ctl": 40.0}, "fatigue": {"atl": 45.0},
+    "form": {"tsb": -5.0, "status": "Optimal"},
+    "recovery": {"recovery_score": 75.0, "recommendation": "Train"},
+    "weekly_training_load": 300.0,
+}
+PROFILE = SimpleNamespace(name="A", sport="running", experience_level="beginner", goal="5k")
+
+
+def test_workflow_runs_on_stub_backend(monkeypatch):
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(), 4, 5, 0))
+
+    result = asyncio.run(ai_coach.get_recommendation_workflow().ainvoke(ai_coach.build_initial_state(PROFILE, METRICS)))
+
+    assert result["final_output"]["recommendation"]["workout_type"] == "easy"
+    assert result["final_output"]["validation"] == "APPROVED"
+    assert set(ai_coach.llm_gateway.stats()["nodes"]) == {"analyze", "recommend", "validate"}
+
+
+def test_workflow_is_compiled_once():
+    assert ai_coach.get_recommendation_workflow() is ai_coach.get_recommendation_workflow()
+
+
+def test_concurrent_workflows_share_one_thread(monkeypatch):
+    # 30 workflows x 3 calls x 50 ms: about 0.15 s when they overlap, 4.5 s if serialized
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(latency=0.05), 64, 5, 0))
+    workflow = ai_coach.get_recommendation_workflow()
+
+    async def run():
+        states = [ai_coach.build_initial_state(PROFILE, METRICS) for _ in range(30)]
+        started = time.perf_counter()
+        results = await asyncio.gather(*[workflow.ainvoke(state) for state in states])
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+
+    assert all(result["final_output"]["validation"] == "APPROVED" for result in results)
+    assert ai_coach.llm_gateway.stats()["peak_in_flight"] == 30
+    assert elapsed < 2.0
+
+
+def test_stream_yields_deltas_and_accounts_tokens():
+    gateway = LLMGateway(StubBackend(), max_concurrency=2, timeout=5, max_retries=0)
+
+    async def run():
+        return [chunk async for chunk in gateway.astream("analyze", "analyze this")]
+
+    chunks = asyncio.run(run())
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == gateway_module.STUB_RESPONSES["analyze"]
+    usage = gateway.stats()["nodes"]["analyze"]
+    assert usage["calls"] == 1 and usage["errors"] == 0
+    assert usage["completion_tokens"] == len(chunks)
+    assert gateway.stats()["in_flight"] == 0
+
+
+class FlakyStreamBackend(StubBackend):
+    """Streams that fail with `error` before the first delta `failures` times, then mid-stream if `mid_stream`."""
+
+    def __init__(self, failures, error, mid_stream=False):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+        self.mid_stream = mid_stream
+        self.calls = 0
+
+    async def astream(self, node, messages, **options):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        async for chunk in super().astream(node, messages, **options):
+            yield chunk
+            if self.mid_stream:
+                raise self.error
+
+    @staticmethod
+    def retryable(error):
+        return isinstance(error, openai.APITimeoutError)
+
+
+def test_stream_retries_only_before_first_delta():
+    async def collect(gateway):
+        return [chunk async for chunk in gateway.astream("analyze", "x")]
+
+    backend = FlakyStreamBackend(failures=1, error=_timeout())
+    assert "".join(asyncio.run(collect(LLMGateway(backend, 1, 5, 2)))) == gateway_module.STUB_RESPONSES["analyze"]
+    assert backend.calls == 2
+
+    backend = FlakyStreamBackend(failures=0, error=_timeout(), mid_stream=True)
+    with pytest.raises(LLMError):
+        asyncio.run(collect(LLMGateway(backend, 1, 5, 2)))
+    assert backend.calls == 1
+
+
+class FakeSession:
+    """Stands in for SessionLocal() where the queries themselves are monkeypatched."""
+
+    def close(self):
+        pass
+
+
+def _parse_sse(frames):
+    events = []
+    for frame in frames:
+        event_line, data_line = frame.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_stream_recommendation_events(monkeypatch):
+    saved = []
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(latency=0.3), 4, 5, 0))
+    monkeypatch.setattr(ai_coach, "get_cached_training_metrics", lambda db, user_id: METRICS)
+    monkeypatch.setattr(ai_coach, "find_reusable", lambda db, user_id, fingerprint: None)
+    monkeypatch.setattr(ai_coach, "recommendation_cache", RecommendationCache(0, 60))
+    monkeypatch.setattr(ai_coach, "_save_recommendation", lambda *args: saved.append(args[2]))
+    user = SimpleNamespace(id=7, **vars(PROFILE))
+
+    async def run():
+        frames, first_at = [], None
+        started = time.perf_counter()
+        async for frame in ai_coach.stream_workout_recommendation(user, session_factory=FakeSession):
+            if first_at is None:
+                first_at = time.perf_counter() - started
+            frames.append(frame)
+        return frames, first_at, time.perf_counter() - started
+
+    frames, first_at, total = asyncio.run(run())
+    events = _parse_sse(frames)
+    names = [name for name, _ in events]
+
+    # First byte long before the 3 x 300 ms chain completes
+    assert first_at < 0.1 < 0.8 < total
+    assert names[0] == "node_start" and events[0][1] == {"node": "analyze"}
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert "".join(tokens) == gateway_module.STUB_RESPONSES["analyze"]
+    assert names.index("recommendation") < names.index("validation") < names.index("done") == len(names) - 1
+    assert [data["node"] for name, data in events if name == "node_end"] == ["analyze", "recommend", "validate", "finalize"]
+    assert events[names.index("recommendation")][1]["workout_type"] == "easy"
+    assert events[names.index("validation")][1]["validation"] == "APPROVED"
+    assert events[-1][1]["reused"] is False
+    assert events[-1][1]["shared"] is False
+    assert saved == [{key: value for key, value in events[-1][1].items() if key not in ("reused", "shared")}]
+
+
+def test_stream_recommendation_reports_errors(monkeypatch, caplog):
+    def fail(db, user_id):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(ai_coach, "get_cached_training_metrics", fail)
+    user = SimpleNamespace(id=7, **vars(PROFILE))
+
+    async def run():
+        return [frame async for frame in ai_coach.stream_workout_recommendation(user, session_factory=FakeSession)]
+
+    with caplog.at_level(logging.ERROR, logger="app.services.ai_coach"):
+        events = _parse_sse(asyncio.run(run()))
+
+    # The exception text is logged, not sent to the client
+    assert events == [("error", {"detail": ai_coach.STREAM_ERROR_DETAIL})]
+    assert "database unavailable" in caplog.text
+
+
+def test_stream_disconnect_still_saves(monkeypatch):
+    saved = []
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(latency=0.1), 4, 5, 0))
+    monkeypatch.setattr(ai_coach, "get_cached_training_metrics", lambda db, user_id: METRICS)
+    monkeypatch.setattr(ai_coach, "find_reusable", lambda db, user_id, fingerprint: None)
+    monkeypatch.setattr(ai_coach, "recommendation_cache", RecommendationCache(0, 60))
+    monkeypatch.setattr(ai_coach, "_save_recommendation", lambda *args: saved.append(args[2]))
+    user = SimpleNamespace(id=7, **vars(PROFILE))
+
+    async def run():
+        stream = ai_coach.stream_workout_recommendation(user, session_factory=FakeSession)
+        assert (await anext(stream)).startswith("event: node_start")
+        # The client goes away after the first event
+        await stream.aclose()
+        for _ in range(100):
+            if saved:
+                break
+            await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+
+    assert len(saved) == 1 and saved[0]["validation"] == "APPROVED"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        gateway_module.build_backend("carrier-pigeon")
@@ -0,0 +1,45 @@
+"""
+Tests for the pluggable training load models (app/services/load_models.py)
+"""
+import numpy as np
+import pytest
+
+from app.routes.logs import calculate_training_load
+from app.services.load_models import LOAD_MODELS, HeartRateProfile, get_load_model
+
+WORKOUTS = [
+    (45, "easy", None),
+    (60, "Tempo", 145),
+    (30, "interval", 172),
+    (120, "long", 0),
+    (42, "race", 130),
+    (50, "unknown", 150),
+    (20, "interval", 90),
+    (75, "long", 205),
+]
+
+
+# duration * type factor * HR zone factor, as scored by the original calculate_training_load
+BASELINE_SCORES = [45.0, 108.0, 108.0, 144.0, 126.0, 75.0, 40.0, 162.0]
+
+
+@pytest.mark.parametrize("workout,expected", zip(WORKOUTS, BASELINE_SCORES))
+def test_heuristic_matches_original_formula(workout, expected):
+    assert get_load_model("heuristic").score(*workout) == expected
+    assert calculate_training_load(*workout) == expected
+
+
+@pytest.mark.parametrize("name", sorted(LOAD_MODELS))
+def test_batch_matches_scalar(name):
+    model = LOAD_MODELS[name]
+    profile = HeartRateProfile(max_hr=185, resting_hr=52)
+    durations, types, hrs = zip(*WORKOUTS)
+
+    batch = model.score_batch(durations, types, hrs, profile)
+    scalar = [model.score(d, t, hr, profile) for d, t, hr in WORKOUTS]
+    np.testing.assert_allclose(batch, scalar)
+
+
+def test_unknown_model_rejected():
+    with pytest.raises(ValueError):
+        get_load_model("watts")
@@ -0,0 +1,102 @@
+"""
+Tests for the per-user metrics cache (app/services/metrics_cache.py)
+"""
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.workout import Workout
+from app.services.metrics_cache import MetricsCache, bump_metrics_version, get_cached_training_metrics, metrics_cache
+from app.services.training_state import apply_workout_load
+
+
+def test_lru_eviction_and_counters():
+    cache = MetricsCache(max_entries=2)
+    today = date.today()
+    for user_id in (1, 2):
+        cache.put(user_id, today, {"user": user_id}, cache.generation())
+
+    assert cache.get(1, today) == {"user": 1}  # 1 becomes most recent
+    cache.put(3, today, {"user": 3}, cache.generation())
+
+    assert cache.get(2, today) is None
+    assert cache.get(3, today) == {"user": 3}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 2)
+
+
+def test_entries_expire_at_day_boundary():
+    cache = MetricsCache(max_entries=10)
+    yesterday = date.today() - timedelta(days=1)
+    cache.put(1, yesterday, {"stale": True}, cache.generation())
+
+    assert cache.get(1, date.today()) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidation_discards_in_flight_results():
+    cache = MetricsCache(max_entries=10)
+    today = date.today()
+    cache.put(1, today, {"old": True}, cache.generation())
+
+    generation = cache.generation()  # a read starts computing...
+    cache.invalidate(1)               # ...a write lands meanwhile
+    cache.put(1, today, {"computed_before_write": True}, generation)
+
+    assert cache.get(1, today) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_writes_from_other_processes_invalidate_through_the_version(engine, db, athlete, monkeypatch):
+    """Another worker (or a batch job) only leaves users.metrics_version behind; this process must notice."""
+    monkeypatch.setattr(metrics_cache, "version_check_seconds", 0.0)
+    metrics_cache.clear()
+    before = get_cached_training_metrics(db, athlete.id)
+    assert get_cached_training_metrics(db, athlete.id) == before  # served from the cache
+
+    other_process = sessionmaker(bind=engine)()
+    bump_metrics_version(other_process, [athlete.id])
+    other_process.add(Workout(user_id=athlete.id, date=date.today(), duration=60, workout_type="tempo", training_load_score=90.0))
+    apply_workout_load(other_process, athlete.id, date.today(), 90.0)
+    other_process.commit()
+    other_process.close()
+
+    after = get_cached_training_metrics(db, athlete.id)
+    assert after["fatigue"]["atl"] > before["fatigue"]["atl"]
+    assert metrics_cache.stats()["version_mismatches"] >= 1
+
+
+def test_version_mismatch_is_a_miss():
+    cache = MetricsCache(max_entries=10)
+    today = date.today()
+    cache.put(1, today, {"version": 3}, cache.generation(), version=3)
+
+    assert cache.get(1, today, version=3) == {"version": 3}
+    assert cache.get(1, today, version=4) is None
+    assert cache.stats()["version_mismatches"] == 1
+
+
+def test_hits_recheck_the_version_only_after_the_window(engine, db, athlete, count_queries, monkeypatch):
+    monkeypatch.setattr(metrics_cache, "version_check_seconds", 5.0)
+    metrics_cache.clear()
+    before = get_cached_training_metrics(db, athlete.id)
+
+    count_queries.clear()
+    assert get_cached_training_metrics(db, athlete.id) == before
+    assert count_queries == []  # a hit within the window costs no round trip
+
+    other_process = sessionmaker(bind=engine)()
+    bump_metrics_version(other_process, [athlete.id])
+    apply_workout_load(other_process, athlete.id, date.today(), 90.0)
+    other_process.commit()
+    other_process.close()
+
+    # Another process's write goes unseen until the window has passed
+    mismatches = metrics_cache.stats()["version_mismatches"]
+    assert get_cached_training_metrics(db, athlete.id) == before
+    clock = time.monotonic() + 5.0
+    monkeypatch.setattr("app.services.metrics_cache.time.monotonic", lambda: clock)
+    assert get_cached_training_metrics(db, athlete.id)["fatigue"]["atl"] > before["fatigue"]["atl"]
+    assert metrics_cache.stats()["version_mismatches"] == mismatches + 1
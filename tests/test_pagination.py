@@ -0,0 +1,60 @@
+"""
+Tests for keyset pagination (app/services/pagination.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.workout import Workout
+from app.services.pagination import decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def workouts(db, athlete):
+    start = date(2025, 1, 1)
+    # Several workouts share a date so the id tiebreak matters
+    for n in range(137):
+        db.add(Workout(user_id=athlete.id, date=start + timedelta(days=n // 3), duration=30,
+                       workout_type="tempo" if n % 4 == 0 else "easy", training_load_score=30.0))
+    db.commit()
+    return athlete.id
+
+
+def collect(db, user_id, **kwargs):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = paginate(db, Workout, user_id, cursor=cursor, **kwargs)
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def test_pages_cover_history_in_order(db, workouts):
+    items, pages = collect(db, workouts, limit=10)
+
+    expected = db.query(Workout).order_by(Workout.date.desc(), Workout.id.desc()).all()
+    assert [w.id for w in items] == [w.id for w in expected]
+    assert pages == 14
+
+
+def test_filters_and_exact_last_page(db, workouts):
+    items, _ = collect(db, workouts, limit=7, start=date(2025, 1, 10), end=date(2025, 1, 20))
+    assert len(items) == 33
+    assert all(date(2025, 1, 10) <= w.date <= date(2025, 1, 20) for w in items)
+
+    tempo, _ = collect(db, workouts, limit=5, filters=[Workout.workout_type == "tempo"])
+    assert len(tempo) == 35 and {w.workout_type for w in tempo} == {"tempo"}
+
+    # A page that ends exactly on the last row has no next cursor
+    page = paginate(db, Workout, workouts, limit=137)
+    assert len(page["items"]) == 137 and page["next_cursor"] is None
+
+
+def test_cursor_round_trip_and_validation(db, workouts):
+    assert decode_cursor(encode_cursor(date(2025, 3, 1), 42)) == (date(2025, 3, 1), 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        paginate(db, Workout, workouts, limit=0)
@@ -0,0 +1,128 @@
+"""
+Tests for the password hashing pool (app/services/password_pool.py)
+
+Uses pbkdf2_sha256 at a low cost so the tests are fast; the pool is
+scheme-agnostic.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import auth_utils
+from app.services.password_pool import HashingOverloaded, PasswordHasher, crypt_context_options
+
+
+def pbkdf2_options(rounds: int):
+    return {
+        "schemes": ["pbkdf2_sha256"],
+        "pbkdf2_sha256__rounds": rounds,
+        "pbkdf2_sha256__min_rounds": rounds,
+        "pbkdf2_sha256__max_rounds": rounds,
+    }
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, queue_limit=2, context_options=pbkdf2_options(1000))
+    yield hasher
+    hasher.shutdown()
+
+
+def test_process_pool_hash_and_verify(hasher):
+    hashed = hasher.hash("correct horse")
+
+    assert hasher.verify_and_update("correct horse", hashed) == (True, None)
+    assert hasher.verify_and_update("wrong", hashed)[0] is False
+
+    stats = hasher.stats()
+    assert stats["latency_ms"]["hash"]["count"] == 1
+    assert stats["latency_ms"]["verify"]["count"] == 2
+    assert stats["pending"] == 0
+
+
+def test_async_variants(hasher):
+    async def run():
+        hashed = await hasher.hash_async("correct horse")
+        return await hasher.verify_and_update_async("correct horse", hashed)
+
+    assert asyncio.run(run()) == (True, None)
+
+
+def test_rehash_when_cost_changes(hasher):
+    old_hash = hasher.hash("correct horse")
+    upgraded = PasswordHasher(workers=0, queue_limit=0, context_options=pbkdf2_options(2000))
+
+    verified, new_hash = upgraded.verify_and_update("correct horse", old_hash)
+
+    assert verified and new_hash and "$2000$" in new_hash
+    assert upgraded.verify_and_update("correct horse", new_hash) == (True, None)
+    assert upgraded.stats()["rehashed"] == 1
+
+
+def test_admission_limit(hasher):
+    held = [hasher._admit() for _ in range(hasher.max_pending)]
+
+    with pytest.raises(HashingOverloaded):
+        hasher.hash("correct horse")
+    assert hasher.stats()["rejected"] == 1
+
+    for started in held:
+        hasher._release("hash", started)
+    assert hasher.verify_and_update("x", hasher.hash("x"))[0]
+
+
+def test_overload_becomes_503(hasher, monkeypatch):
+    hasher.max_pending = 0
+    monkeypatch.setattr(auth_utils, "password_hasher", hasher)
+
+    with pytest.raises(HTTPException) as error:
+        auth_utils.verify_password("x", "y")
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+
+
+def test_bcrypt_options_rehash_any_other_cost():
+    options = crypt_context_options(13)
+    assert options["bcrypt__min_rounds"] == options["bcrypt__max_rounds"] == 13
+
+
+def test_auth_routes_hash_on_the_pool(engine, hasher, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import get_db
+    from app.routes import auth, user
+
+    monkeypatch.setattr(auth_utils, "password_hasher", hasher)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.include_router(user.router)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    assert client.post("/signup", json={"email": "a@example.com", "password": "old-password", "name": "A"}).status_code == 201
+    login = client.post("/login", json={"email": "a@example.com", "password": "old-password"})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    changed = client.post("/change-password", headers=headers, json={
+        "current_password": "old-password", "new_password": "new-password"
+    })
+    assert changed.status_code == 200
+    assert client.get("/me", headers=headers).status_code == 401
+    assert client.post("/login", json={"email": "a@example.com", "password": "old-password"}).status_code == 401
+
+    # Signup and change-password hash, login (twice) and change-password verify: all on the pool
+    latency = hasher.stats()["latency_ms"]
+    assert (latency["hash"]["count"], latency["verify"]["count"]) == (2, 3)
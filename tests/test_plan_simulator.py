@@ -0,0 +1,146 @@
+"""
+Tests for the what-if plan simulator (app/services/plan_simulator.py) and POST /simulate
+"""
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.routes import logs
+from app.routes.auth_utils import create_user_token
+from app.routes.schemas import PlannedWorkout, TrainingPlan
+from app.services.load_models import HeartRateProfile, get_user_load_model
+from app.services.plan_simulator import MAX_PROJECTION_DAYS, simulate_training_plans
+from app.services.principal_cache import principal_cache
+from app.services.training_engine import ATL_ALPHA, CTL_ALPHA
+from app.services.training_state import apply_workout_load, get_training_state
+
+WORKOUT_TYPES = ["easy", "tempo", "interval", "long", "race"]
+
+
+def _seed_state(db, athlete):
+    today = date.today()
+    for offset, load in [(20, 60.0), (9, 95.0), (3, 140.0), (1, 45.0)]:
+        apply_workout_load(db, athlete.id, today - timedelta(days=offset), load)
+    db.commit()
+
+
+def _random_plan(rng, days, name=None):
+    return TrainingPlan(name=name, workouts=[
+        PlannedWorkout(
+            day=rng.randint(1, days),
+            workout_type=rng.choice(WORKOUT_TYPES),
+            duration=rng.randint(20, 150),
+            avg_hr=rng.choice([None, rng.randint(110, 185)])
+        )
+        for _ in range(rng.randint(0, days))
+    ])
+
+
+def test_matches_day_by_day_ema(db, athlete):
+    athlete.age, athlete.load_model = 40, "hr_reserve"
+    db.commit()
+    _seed_state(db, athlete)
+    rng = random.Random(7)
+    plans = [_random_plan(rng, 28, name="build"), _random_plan(rng, 28), TrainingPlan(workouts=[])]
+
+    result = simulate_training_plans(db, athlete, plans, 28)
+
+    start = get_training_state(db, athlete.id)
+    model, profile = get_user_load_model(athlete), HeartRateProfile.from_user(athlete)
+    assert result["current"] == start
+    assert [plan["name"] for plan in result["plans"]] == ["build", "Plan 2", "Plan 3"]
+    for plan, projected in zip(plans, result["plans"]):
+        daily = [0.0] * 28
+        for workout in plan.workouts:
+            daily[workout.day - 1] += model.score(workout.duration, workout.workout_type, workout.avg_hr, profile)
+        ctl, atl = start["ctl"], start["atl"]
+        for day, load in enumerate(daily):
+            ctl += CTL_ALPHA * (load - ctl)
+            atl += ATL_ALPHA * (load - atl)
+            assert projected["ctl"][day] == pytest.approx(ctl, abs=0.01)
+            assert projected["atl"][day] == pytest.approx(atl, abs=0.01)
+            assert projected["tsb"][day] == pytest.approx(ctl - atl, abs=0.02)
+        assert projected["final"]["ctl"] == projected["ctl"][-1]
+        assert projected["total_load"] == pytest.approx(sum(daily), abs=0.01)
+        peak = max(range(28), key=lambda day: projected["tsb"][day])
+        assert projected["peak_tsb"] == {"day": peak + 1, "tsb": projected["tsb"][peak]}
+
+
+@pytest.fixture
+def client(engine, athlete):
+    principal_cache.clear()
+    app = FastAPI()
+    app.include_router(logs.router)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    principal_cache.clear()
+
+
+@pytest.mark.parametrize("body", [
+    {"plans": [{"workouts": []}], "days": 0},
+    {"plans": [{"workouts": []}], "days": MAX_PROJECTION_DAYS + 1},
+    {"plans": [], "days": 28},
+    {"plans": [{"workouts": [{"day": 29, "workout_type": "easy", "duration": 30}]}], "days": 28},
+])
+def test_simulate_rejects_out_of_range_requests(client, athlete, body):
+    response = client.post("/simulate", json=body, headers={"Authorization": f"Bearer {create_user_token(athlete)}"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"]
+
+
+@pytest.mark.parametrize("workout", [
+    {"day": 0, "workout_type": "easy", "duration": 30},
+    {"day": -3, "workout_type": "easy", "duration": 30},
+    {"day": MAX_PROJECTION_DAYS + 1, "workout_type": "easy", "duration": 30},
+    {"day": 1, "workout_type": "easy", "duration": -30},
+    {"day": 1, "workout_type": "easy", "duration": 1e12},
+    {"day": 1, "workout_type": "tempo", "duration": 30, "avg_hr": 0},
+    {"day": 1, "workout_type": "tempo", "duration": 30, "avg_hr": 900},
+])
+def test_simulate_validates_planned_workouts(client, athlete, workout):
+    body = {"plans": [{"workouts": [workout]}], "days": MAX_PROJECTION_DAYS}
+
+    response = client.post("/simulate", json=body, headers={"Authorization": f"Bearer {create_user_token(athlete)}"})
+
+    assert response.status_code == 422
+
+
+def test_simulate_endpoint(client, athlete):
+    body = {"plans": [{"name": "taper", "workouts": [{"day": 1, "workout_type": "easy", "duration": 30}]}], "days": 7}
+
+    response = client.post("/simulate", json=body, headers={"Authorization": f"Bearer {create_user_token(athlete)}"})
+
+    assert response.status_code == 200
+    plan = response.json()["plans"][0]
+    assert plan["name"] == "taper" and len(plan["ctl"]) == 7
+
+
+def test_hundred_plans_over_sixteen_weeks_are_fast(db, athlete):
+    # Target: < 50 ms for 100 plans; the bound leaves headroom for slow CI (see scripts/benchmark_plan_simulator.py)
+    _seed_state(db, athlete)
+    rng = random.Random(1)
+    plans = [_random_plan(rng, MAX_PROJECTION_DAYS) for _ in range(100)]
+
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        simulate_training_plans(db, athlete, plans, MAX_PROJECTION_DAYS)
+        samples.append(time.perf_counter() - started)
+
+    assert min(samples) < 0.2
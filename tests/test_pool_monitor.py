@@ -0,0 +1,64 @@
+"""
+Tests for the connection pool instrumentation (app/services/pool_monitor.py)
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.services.pool_monitor import InstrumentedQueuePool, instrument_engine
+
+
+@pytest.fixture
+def small_pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_in_use_and_timeouts(small_pool_engine):
+    monitor = instrument_engine(small_pool_engine)
+
+    first = small_pool_engine.connect()
+    second = small_pool_engine.connect()  # overflow connection
+    first.execute(text("SELECT 1"))
+
+    stats = monitor.stats(small_pool_engine.pool)
+    assert stats["in_use"] == 2
+    assert stats["pool"]["checked_out"] == 2
+    assert stats["pool"]["overflow"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        small_pool_engine.connect()
+
+    first.close()
+    second.close()
+    with small_pool_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    stats = monitor.stats(small_pool_engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 3
+    assert stats["checkins"] == 3
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] == 2
+    assert stats["connects"] == 2
+    assert stats["wait_ms"]["max"] >= stats["wait_ms"]["p50"] > 0
+
+
+def test_monitor_survives_dispose(small_pool_engine):
+    monitor = instrument_engine(small_pool_engine)
+    with small_pool_engine.connect():
+        pass
+    small_pool_engine.dispose()
+    with small_pool_engine.connect():
+        pass
+
+    stats = monitor.stats(small_pool_engine.pool)
+    assert stats["checkouts"] == 2
+    assert stats["connects"] == 2
@@ -0,0 +1,142 @@
+"""
+Tests for the authentication fast path (app/services/principal_cache.py)
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.models.user import User
+from app.routes import user, logs
+from app.routes.auth_utils import create_access_token, create_user_token
+from app.services.load_models import HeartRateProfile, get_load_model
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+@pytest.fixture
+def client(engine, athlete):
+    principal_cache.clear()
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.include_router(logs.router)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    principal_cache.clear()
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _user_selects(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_read_routes_skip_user_select_on_hit(client, athlete, count_queries):
+    headers = _auth(create_user_token(athlete))
+    count_queries.clear()
+    before = principal_cache.stats()
+
+    for _ in range(3):
+        assert client.get("/weekly-activity", headers=headers).status_code == 200
+
+    selects = _user_selects(count_queries)
+    assert len(selects) == 1
+    assert "profile_picture" not in selects[0] and "hashed_password" not in selects[0]
+    after = principal_cache.stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (2, 1)
+
+
+def test_profile_routes_load_full_user(client, athlete, count_queries):
+    headers = _auth(create_user_token(athlete))
+    client.get("/weekly-activity", headers=headers)
+    count_queries.clear()
+
+    response = client.put("/me", headers=headers, json={"sport": "cycling"})
+    assert response.status_code == 200
+    assert "profile_picture" in " ".join(_user_selects(count_queries))
+
+    # The update invalidated the cached principal
+    client.get("/weekly-activity", headers=headers)
+    assert principal_cache.get(athlete.id, 0).sport == "cycling"
+
+
+def test_password_change_revokes_old_tokens(client, athlete, monkeypatch):
+    # Hashing is not under test here
+    monkeypatch.setattr(user, "verify_password", lambda plain, hashed: plain == "old-password")
+    monkeypatch.setattr(user, "hash_password", lambda plain: f"hashed:{plain}")
+    old_headers = _auth(create_user_token(athlete))
+    legacy_headers = _auth(create_access_token({"sub": str(athlete.id)}))  # issued before "ver" existed
+    assert client.get("/weekly-activity", headers=legacy_headers).status_code == 200
+
+    response = client.post("/change-password", headers=old_headers, json={
+        "current_password": "old-password", "new_password": "new-password"
+    })
+    assert response.status_code == 200
+    new_headers = _auth(response.json()["access_token"])
+
+    assert client.get("/weekly-activity", headers=old_headers).status_code == 401
+    assert client.get("/weekly-activity", headers=legacy_headers).status_code == 401
+    assert client.get("/me", headers=old_headers).status_code == 401
+    assert client.get("/weekly-activity", headers=new_headers).status_code == 200
+    assert client.get("/me", headers=new_headers).status_code == 200
+
+
+def test_log_workout_scores_with_committed_load_model(client, athlete, db):
+    headers = _auth(create_user_token(athlete))
+    assert client.get("/weekly-activity", headers=headers).status_code == 200
+    assert principal_cache.get(athlete.id, 0).load_model is None
+
+    # Another worker changes the model and age; this process still caches the old principal
+    db.execute(update(User).where(User.id == athlete.id).values(load_model="trimp", age=40))
+    db.commit()
+
+    response = client.post("/log-workout", headers=headers, json={
+        "date": "2024-03-01", "duration": 60, "avg_hr": 150, "workout_type": "tempo"
+    })
+    assert response.status_code == 201
+    expected = get_load_model("trimp").score(
+        duration=60, workout_type="tempo", avg_hr=150, profile=HeartRateProfile(max_hr=180.0)
+    )
+    assert response.json()["training_load_score"] == pytest.approx(expected)
+
+
+def test_unknown_user_is_rejected(client):
+    headers = _auth(create_access_token({"sub": "999", "ver": 0}))
+    assert client.get("/weekly-activity", headers=headers).status_code == 401
+
+
+def test_cache_expiry_and_version_mismatch(monkeypatch):
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    principal = Principal(1, "a@example.com", "A", None, None, None, None, None, None, None, 3)
+    cache.put(principal, cache.generation())
+
+    assert cache.get(1, 3) == principal
+    assert cache.get(1, 2) is None  # token from before a version bump
+
+    clock = __import__("time").monotonic() + 61
+    monkeypatch.setattr("app.services.principal_cache.time.monotonic", lambda: clock)
+    assert cache.get(1, 3) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["version_mismatches"] == 1
+
+
+def test_put_after_invalidation_is_dropped():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate(1)
+    cache.put(Principal(1, "a@example.com", "A", None, None, None, None, None, None, None, 0), generation)
+
+    assert cache.get(1, 0) is None
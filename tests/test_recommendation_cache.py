@@ -0,0 +1,233 @@
+"""
+Tests for the cross-athlete recommendation cache (app/services/recommendation_cache.py)
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_coach
+from app.services.llm_gateway import STUB_RESPONSES, LLMGateway, StubBackend
+from app.services.recommendation_cache import (
+    RecommendationCache,
+    TokenRenderer,
+    cache_key,
+    placeholder_values,
+    quotes_figures,
+    render_output,
+)
+from app.services.recommendation_reuse import ReuseStats
+
+PROFILE = {"name": "Sam Lee", "sport": "running", "experience_level": "beginner", "goal": "5k"}
+
+
+def metrics(tsb=-4.0, recovery=75.0, ctl=41.0, atl=45.0, weekly=310.0):
+    return {
+        "fitness": {"ctl": ctl}, "fatigue": {"atl": atl},
+        "form": {"tsb": tsb, "status": "Optimal"},
+        "recovery": {"recovery_score": recovery, "recommendation": "Train"},
+        "weekly_training_load": weekly,
+    }
+
+
+OUTPUT = {
+    "recommendation": {
+        "workout_type": "easy", "duration_minutes": 45, "intensity": "low",
+        "description": "{athlete}, run 45 minutes easy.", "reasoning": "With TSB at {tsb}, {athlete} is well recovered.",
+        "warnings": ["Max effort is off the table while recovery is {recovery_score}%"]
+    },
+    "analysis": "{athlete} shows balanced fitness ({ctl}) and fatigue ({atl}). Will, hope and grant money are not involved.",
+    "validation": "APPROVED",
+    "generated_date": "2026-10-15",
+}
+
+
+def test_key_ignores_name_and_noise_within_bucket():
+    other = {**PROFILE, "name": "Ana Ruiz", "goal": " 5K "}
+
+    assert cache_key(PROFILE, metrics()) == cache_key(other, metrics(tsb=-2.5, recovery=79.0, ctl=48.0, weekly=390.0))
+    assert cache_key(PROFILE, metrics()) != cache_key(PROFILE, metrics(tsb=-6.0))
+    assert cache_key(PROFILE, metrics()) != cache_key({**PROFILE, "experience_level": "advanced"}, metrics())
+
+
+def test_granularity_widens_buckets():
+    assert cache_key(PROFILE, metrics(), 1.0) != cache_key(PROFILE, metrics(tsb=-6.0), 1.0)
+    assert cache_key(PROFILE, metrics(), 2.0) == cache_key(PROFILE, metrics(tsb=-6.0), 2.0)
+
+
+def test_rest_thresholds_split_coarse_buckets():
+    # At granularity 3 the TSB bucket is [-30, -15): without the threshold flag -19 and -21 would share it
+    assert cache_key(PROFILE, metrics(tsb=-19.0), 3.0)[1] == cache_key(PROFILE, metrics(tsb=-21.0), 3.0)[1]
+    assert cache_key(PROFILE, metrics(tsb=-19.0), 3.0) != cache_key(PROFILE, metrics(tsb=-21.0), 3.0)
+    assert cache_key(PROFILE, metrics(recovery=59.0), 1.0) != cache_key(PROFILE, metrics(recovery=61.0), 1.0)
+
+
+def test_render_fills_in_name_and_own_figures():
+    rendered = render_output(OUTPUT, placeholder_values("Max Will", metrics(tsb=-2.5, ctl=48.25, atl=50.75, recovery=72.0)))
+
+    assert rendered["analysis"] == "Max Will shows balanced fitness (48.25) and fatigue (50.75). Will, hope and grant money are not involved."
+    assert rendered["recommendation"]["description"] == "Max Will, run 45 minutes easy."
+    assert rendered["recommendation"]["reasoning"] == "With TSB at -2.5, Max Will is well recovered."
+    assert rendered["recommendation"]["warnings"] == ["Max effort is off the table while recovery is 72.0%"]
+    assert {key: rendered["recommendation"][key] for key in ("workout_type", "duration_minutes", "intensity")} == \
+        {"workout_type": "easy", "duration_minutes": 45, "intensity": "low"}
+    assert OUTPUT["analysis"].startswith("{athlete}")  # inputs are not mutated
+
+
+def test_token_renderer_joins_split_tokens():
+    renderer = TokenRenderer(placeholder_values("Ana", metrics()))
+    deltas = ["Well done {ath", "lete}, CTL {", "ctl} is up", " {"]
+
+    assert "".join(renderer.feed(delta) for delta in deltas) + renderer.flush() == "Well done Ana, CTL 41.0 is up {"
+
+
+def test_outputs_quoting_figures_are_not_stored():
+    cache = RecommendationCache(max_entries=2, ttl_seconds=60)
+    key = cache_key(PROFILE, metrics())
+    quoting = {**OUTPUT, "analysis": "CTL is 41.0 and TSB is -4.0."}
+
+    assert quotes_figures(quoting, metrics()) and not quotes_figures(OUTPUT, metrics())
+    assert not quotes_figures({**OUTPUT, "analysis": "Run 141.05 km"}, metrics())
+    cache.put(key, quoting, metrics())
+    assert cache.get(key, "Ana", metrics()) is None
+    assert cache.stats()["unshareable"] == 1 and cache.stats()["size"] == 0
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = RecommendationCache(max_entries=2, ttl_seconds=60)
+    keys = [cache_key(PROFILE, metrics(tsb=tsb)) for tsb in (-4.0, -9.0, -14.0)]
+    for key in keys:
+        cache.put(key, OUTPUT, metrics())
+
+    assert cache.get(keys[0], "Ana", metrics()) is None
+    assert cache.get(keys[2], "Ana", metrics())["analysis"].startswith("Ana")
+    assert cache.stats()["evictions"] == 1
+
+    expiring = RecommendationCache(max_entries=2, ttl_seconds=0)
+    expiring.put(keys[0], OUTPUT, metrics())
+    assert expiring.get(keys[0], "Ana", metrics()) is None
+    assert expiring.stats()["expirations"] == 1
+
+
+def test_size_zero_disables():
+    cache = RecommendationCache(max_entries=0, ttl_seconds=60)
+    cache.put(cache_key(PROFILE, metrics()), OUTPUT, metrics())
+
+    assert cache.get(cache_key(PROFILE, metrics()), "Ana", metrics()) is None
+    assert cache.stats()["size"] == 0 and cache.stats()["misses"] == 0
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def coach(monkeypatch):
+    """The workflow on the stub backend with a fresh shared cache; saved rows are collected."""
+    saved = []
+    inputs = {}
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(), 4, 5, 0))
+    monkeypatch.setattr(ai_coach, "recommendation_cache", RecommendationCache(100, 60))
+    monkeypatch.setattr(ai_coach, "reuse_stats", ReuseStats())
+    monkeypatch.setattr(ai_coach, "get_cached_training_metrics", lambda db, user_id: inputs[user_id])
+    monkeypatch.setattr(ai_coach, "find_reusable", lambda db, user_id, fingerprint: None)
+    monkeypatch.setattr(ai_coach, "_save_recommendation", lambda factory, user_id, output, fingerprint: saved.append((user_id, output)))
+    return SimpleNamespace(saved=saved, inputs=inputs)
+
+
+def _recommend(user, force=False):
+    return asyncio.run(ai_coach.generate_workout_recommendation(user, session_factory=FakeSession, force=force))
+
+
+def test_second_athlete_is_served_from_the_shared_cache(coach):
+    coach.inputs.update({1: metrics(), 2: metrics(tsb=-2.0, recovery=72.0)})
+    first = _recommend(SimpleNamespace(id=1, **PROFILE))
+    second = _recommend(SimpleNamespace(id=2, **{**PROFILE, "name": "Ana Ruiz"}))
+
+    assert first["shared"] is False and second["shared"] is True
+    assert second["recommendation"] == first["recommendation"]
+    assert ai_coach.llm_gateway.stats()["nodes"]["recommend"]["calls"] == 1
+    # The shared answer is still stored as the second athlete's own recommendation
+    assert [user_id for user_id, _ in coach.saved] == [1, 2]
+
+
+def test_force_and_failed_runs_bypass_the_shared_cache(coach, monkeypatch):
+    coach.inputs.update({1: metrics(), 2: metrics()})
+    _recommend(SimpleNamespace(id=1, **PROFILE))
+
+    assert _recommend(SimpleNamespace(id=2, **PROFILE), force=True)["shared"] is False
+    assert ai_coach.llm_gateway.stats()["nodes"]["recommend"]["calls"] == 2
+
+    ai_coach.recommendation_cache.clear()
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(responses={"recommend": "not json"}), 4, 5, 0))
+    _recommend(SimpleNamespace(id=1, **PROFILE))
+    assert ai_coach.recommendation_cache.stats()["size"] == 0
+
+
+class RecordingBackend(StubBackend):
+    """The stub, writing placeholder tokens, with every prompt recorded."""
+
+    def __init__(self):
+        super().__init__(responses={
+            **STUB_RESPONSES,
+            "analyze": "{athlete} holds CTL {ctl} against ATL {atl}; form {tsb} suits aerobic work.",
+        })
+        self.prompts = []
+
+    def _result(self, node, messages):
+        self.prompts.extend(message["content"] for message in messages)
+        return super()._result(node, messages)
+
+
+def test_shared_text_carries_the_requesters_name_and_figures(coach, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(backend, 4, 5, 0))
+    coach.inputs.update({1: metrics(), 2: metrics(tsb=-2.0, ctl=44.5, atl=46.5, recovery=72.0)})
+
+    first = _recommend(SimpleNamespace(id=1, **{**PROFILE, "name": "Grant Hope"}))
+    second = _recommend(SimpleNamespace(id=2, **{**PROFILE, "name": "Ana Ruiz"}))
+
+    assert first["analysis"] == "Grant Hope holds CTL 41.0 against ATL 45.0; form -4.0 suits aerobic work."
+    assert second["shared"] is True
+    assert second["analysis"] == "Ana Ruiz holds CTL 44.5 against ATL 46.5; form -2.0 suits aerobic work."
+    assert not any("Grant" in prompt or "Hope" in prompt for prompt in backend.prompts)
+    assert [output["analysis"] for _, output in coach.saved] == [first["analysis"], second["analysis"]]
+
+
+def test_prompts_are_unchanged_when_sharing_is_off(coach, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(backend, 4, 5, 0))
+    monkeypatch.setattr(ai_coach, "recommendation_cache", RecommendationCache(0, 60))
+    coach.inputs[1] = metrics()
+
+    _recommend(SimpleNamespace(id=1, **PROFILE))
+
+    analyze, recommend, validate = backend.prompts
+    assert analyze == """You are an expert endurance sports coach analyzing an athlete's training data.
+
+ATHLETE PROFILE:
+- Name: Sam Lee
+- Sport: running
+- Experience: beginner
+- Goal: 5k
+
+CURRENT TRAINING METRICS:
+- Fitness (CTL): 41.0
+- Fatigue (ATL): 45.0
+- Form (TSB): -4.0 - Optimal
+- Recovery Score: 75.0% - Train
+- Weekly Training Load: 310.0
+
+ANALYSIS TASK:
+1. Assess the athlete's current training state
+2. Identify any red flags (overtraining, under-recovery, detraining)
+3. Determine what type of training they need most
+4. Consider their experience level and goals
+
+Provide a concise 2-3 paragraph analysis."""
+    assert "CURRENT STATE:\n- Form (TSB): -4.0\n- Recovery: 75.0%\n" in recommend
+    assert recommend.endswith("etc.)\n\nReturn ONLY valid JSON, no additional text.")
+    assert "- Current Recovery: 75.0%\n- Form (TSB): -4.0\n" in validate
+    assert validate.endswith("Keep response to 1-2 sentences.")
+    assert not any("WRITING RULES" in prompt or "never as numbers" in prompt for prompt in backend.prompts)
@@ -0,0 +1,151 @@
+"""
+Tests for fingerprint-based recommendation reuse (app/services/recommendation_reuse.py)
+"""
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_coach, recommendation_reuse
+from app.services.llm_gateway import LLMGateway, StubBackend
+from app.services.recommendation_cache import RecommendationCache
+from app.services.recommendation_reuse import ReuseStats, input_fingerprint
+
+PROFILE = {"name": "A", "sport": "running", "experience_level": "beginner", "goal": "5k"}
+METRICS = {
+    "fitness": {"ctl": 40.04}, "fatigue": {"atl": 45.0},
+    "form": {"tsb": -4.96, "status": "Optimal"},
+    "recovery": {"recovery_score": 75.0, "recommendation": "Train"},
+    "weekly_training_load": 300.0,
+}
+TODAY = date(2026, 10, 16)
+
+
+def test_fingerprint_ignores_noise_below_rounding():
+    jittered = {**METRICS, "fitness": {"ctl": 40.01}, "form": {"tsb": -4.98, "status": "Optimal"}}
+
+    assert input_fingerprint(PROFILE, jittered, TODAY) == input_fingerprint(PROFILE, METRICS, TODAY)
+    assert len(input_fingerprint(PROFILE, METRICS, TODAY)) == 64
+
+
+@pytest.mark.parametrize("profile, metrics, day", [
+    ({**PROFILE, "goal": "marathon"}, METRICS, TODAY),
+    (PROFILE, {**METRICS, "weekly_training_load": 345.0}, TODAY),
+    (PROFILE, {**METRICS, "form": {"tsb": -6.0, "status": "Optimal"}}, TODAY),
+    (PROFILE, METRICS, TODAY + timedelta(days=1)),
+])
+def test_fingerprint_changes_with_inputs(profile, metrics, day):
+    assert input_fingerprint(profile, metrics, day) != input_fingerprint(PROFILE, METRICS, TODAY)
+
+
+def test_stats_count_llm_calls_avoided():
+    stats = ReuseStats()
+    stats.record(hit=False)
+    stats.record(hit=True)
+    stats.record(hit=True)
+    stats.record(hit=False, forced=True)
+
+    assert stats.stats() == {
+        "lookups": 3, "hits": 2, "hit_rate": 0.6667, "forced": 1,
+        "llm_calls_avoided": 2 * recommendation_reuse.LLM_CALLS_PER_RECOMMENDATION
+    }
+
+
+class FakeSession:
+    """Records the rows _save_recommendation adds (recommendations needs Postgres for JSONB)."""
+    rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Stored Recommendation rows in memory; the LLM on the stub backend."""
+    rows = []
+    metrics = {"current": METRICS}
+
+    def find_reusable(db, user_id, fingerprint):
+        matches = [row for row in rows if (row.user_id, row.input_fingerprint) == (user_id, fingerprint)]
+        return matches[-1] if matches else None
+
+    monkeypatch.setattr(FakeSession, "rows", rows)
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(), 4, 5, 0))
+    monkeypatch.setattr(ai_coach, "reuse_stats", ReuseStats())
+    # Cross-athlete sharing has its own tests (test_recommendation_cache.py)
+    monkeypatch.setattr(ai_coach, "recommendation_cache", RecommendationCache(0, 60))
+    monkeypatch.setattr(ai_coach, "get_cached_training_metrics", lambda db, user_id: metrics["current"])
+    monkeypatch.setattr(ai_coach, "find_reusable", find_reusable)
+    return SimpleNamespace(rows=rows, metrics=metrics)
+
+
+def _recommend(user, force=False):
+    return asyncio.run(ai_coach.generate_workout_recommendation(user, session_factory=FakeSession, force=force))
+
+
+def test_repeat_request_reuses_stored_recommendation(store):
+    user = SimpleNamespace(id=1, **PROFILE)
+
+    first = _recommend(user)
+    second = _recommend(user)
+
+    assert first["reused"] is False and second["reused"] is True
+    assert {key: second[key] for key in ("recommendation", "analysis", "validation", "generated_date")} == \
+        {key: first[key] for key in ("recommendation", "analysis", "validation", "generated_date")}
+    assert len(store.rows) == 1
+    assert ai_coach.llm_gateway.stats()["nodes"]["recommend"]["calls"] == 1
+    assert ai_coach.reuse_stats.stats()["llm_calls_avoided"] == 3
+
+
+def test_changed_metrics_or_force_regenerate(store):
+    user = SimpleNamespace(id=1, **PROFILE)
+    _recommend(user)
+
+    store.metrics["current"] = {**METRICS, "weekly_training_load": 360.0}
+    assert _recommend(user)["reused"] is False
+    assert _recommend(user, force=True)["reused"] is False
+    # Another athlete with the same inputs does not see this user's rows
+    assert _recommend(SimpleNamespace(id=2, **PROFILE))["reused"] is False
+
+    assert len(store.rows) == 4
+    assert ai_coach.reuse_stats.stats()["forced"] == 1
+    assert ai_coach.reuse_stats.stats()["hits"] == 0
+
+
+def test_stream_replays_stored_recommendation(store):
+    user = SimpleNamespace(id=1, **PROFILE)
+    _recommend(user)
+
+    async def run():
+        return [frame async for frame in ai_coach.stream_workout_recommendation(user, session_factory=FakeSession)]
+
+    frames = asyncio.run(run())
+
+    assert [frame.split("\n")[0] for frame in frames] == ["event: recommendation", "event: validation", "event: done"]
+    assert '"reused": true' in frames[-1]
+    assert len(store.rows) == 1
+
+
+def test_failed_run_is_not_reused(store, monkeypatch):
+    user = SimpleNamespace(id=1, **PROFILE)
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(responses={"recommend": "not json"}), 4, 5, 0))
+
+    failed = _recommend(user)
+    assert "System error - defaulting to rest day" in failed["recommendation"]["warnings"]
+    # Saved for the history, but without a fingerprint
+    assert store.rows[-1].input_fingerprint is None
+
+    monkeypatch.setattr(ai_coach, "llm_gateway", LLMGateway(StubBackend(), 4, 5, 0))
+    retried = _recommend(user)
+
+    assert retried["reused"] is False
+    assert retried["recommendation"]["workout_type"] == "easy"
+    assert ai_coach.llm_gateway.stats()["nodes"]["recommend"]["calls"] == 1
+    assert _recommend(user)["reused"] is True
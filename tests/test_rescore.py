@@ -0,0 +1,164 @@
+"""
+Tests for the resumable workout re-score job (app/services/rescore.py)
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.training_state import DailyTrainingState
+from app.models.user import User
+from app.models.workout import Workout
+from app.services import metrics_cache as metrics_cache_module, rescore
+from app.services.load_models import HeartRateProfile, get_load_model
+from app.services.metrics_cache import MetricsCache, get_cached_training_metrics
+from app.services.training_state import compute_state_rows
+
+
+@pytest.fixture
+def stale_history(db):
+    """Two athletes whose workouts were scored with an outdated formula."""
+    today = date.today()
+    users = [
+        User(email="heuristic@example.com", hashed_password="x", name="Heuristic"),
+        User(email="trimp@example.com", hashed_password="x", name="Trimp", age=40, load_model="trimp"),
+    ]
+    db.add_all(users)
+    db.commit()
+    for user in users:
+        for offset in range(30):
+            db.add(Workout(
+                user_id=user.id,
+                date=today - timedelta(days=offset),
+                duration=30 + offset,
+                workout_type=["easy", "tempo", "interval"][offset % 3],
+                avg_hr=None if offset % 4 else 140 + offset,
+                training_load_score=1.0
+            ))
+    db.commit()
+    return [user.id for user in users]
+
+
+def _expected_state(db, user_id):
+    daily = {}
+    for workout in db.query(Workout).filter(Workout.user_id == user_id).order_by(Workout.date):
+        daily[workout.date] = daily.get(workout.date, 0.0) + workout.training_load_score
+    return compute_state_rows(user_id, sorted(daily.items()))
+
+
+def test_rescore_updates_scores_and_state(engine, db, stale_history, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    stats = rescore.rescore_workouts(sessionmaker(bind=engine), chunk_size=7, checkpoint_path=str(checkpoint))
+
+    assert stats["rows"] == 60
+    assert stats["updated"] == 60
+    assert stats["users"] == 2
+    assert not checkpoint.exists()
+
+    db.expire_all()
+    # The trimp athlete is 40, so max HR 180
+    trimp = get_load_model("trimp")
+    workout = db.query(Workout).filter(Workout.user_id == stale_history[1]).order_by(Workout.id).first()
+    assert workout.training_load_score == trimp.score(
+        workout.duration, workout.workout_type, workout.avg_hr, HeartRateProfile(max_hr=180.0)
+    )
+
+    for user_id in stale_history:
+        rows = db.query(DailyTrainingState).filter(DailyTrainingState.user_id == user_id).order_by(DailyTrainingState.date).all()
+        expected = _expected_state(db, user_id)
+        assert [row.ctl for row in rows] == pytest.approx([row["ctl"] for row in expected])
+
+    # A second run finds nothing to change
+    again = rescore.rescore_workouts(sessionmaker(bind=engine), chunk_size=7)
+    assert again["updated"] == 0 and again["users"] == 0
+
+
+def test_rescore_resumes_from_checkpoint(engine, db, stale_history, tmp_path, monkeypatch):
+    checkpoint = tmp_path / "checkpoint.json"
+    real_rescore_chunk = rescore.rescore_chunk
+    calls = []
+
+    def failing_rescore_chunk(rows):
+        calls.append(len(rows))
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return real_rescore_chunk(rows)
+
+    monkeypatch.setattr(rescore, "rescore_chunk", failing_rescore_chunk)
+    with pytest.raises(RuntimeError):
+        rescore.rescore_workouts(sessionmaker(bind=engine), chunk_size=10, checkpoint_path=str(checkpoint))
+
+    saved = json.loads(checkpoint.read_text())
+    assert saved["phase"] == "rescore"
+    assert saved["rows"] == 20
+
+    monkeypatch.setattr(rescore, "rescore_chunk", real_rescore_chunk)
+    stats = rescore.rescore_workouts(sessionmaker(bind=engine), chunk_size=10, checkpoint_path=str(checkpoint))
+
+    assert stats["rows"] == 60
+    assert stats["updated"] == 60
+    db.expire_all()
+    assert db.query(Workout).filter(Workout.training_load_score == 1.0).count() == 0
+    assert db.query(DailyTrainingState).count() == 60
+
+
+def test_rescore_invalidates_cached_metrics_through_the_version(engine, db, stale_history, monkeypatch):
+    # The job touches no in-process cache: an API worker's cache sees the change through users.metrics_version
+    worker_cache = MetricsCache(max_entries=10)
+    monkeypatch.setattr(metrics_cache_module, "metrics_cache", worker_cache)
+    user_id = stale_history[0]
+    before = get_cached_training_metrics(db, user_id)
+    assert get_cached_training_metrics(db, user_id) == before
+    db.commit()
+
+    rescore.rescore_workouts(sessionmaker(bind=engine), chunk_size=50)
+
+    after = get_cached_training_metrics(db, user_id)
+    assert after["fitness"]["ctl"] != before["fitness"]["ctl"]
+    assert worker_cache.stats()["version_mismatches"] == 1
+
+
+def test_profile_change_rescores_only_that_athlete(engine, db, stale_history):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.database import get_db
+    from app.routes import user as user_routes
+    from app.routes.auth_utils import create_user_token
+    from app.services.principal_cache import principal_cache
+
+    app = FastAPI()
+    app.include_router(user_routes.router)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    principal_cache.clear()
+    athlete = db.get(User, stale_history[0])
+    headers = {"Authorization": f"Bearer {create_user_token(athlete)}"}
+
+    # Fields the load model does not read, or an unchanged model, leave the scores alone
+    assert client.put("/me", headers=headers, json={"sport": "cycling", "load_model": None}).status_code == 200
+    db.expire_all()
+    assert db.query(Workout).filter(Workout.training_load_score != 1.0).count() == 0
+
+    assert client.put("/me", headers=headers, json={"load_model": "trimp", "age": 40}).status_code == 200
+
+    db.expire_all()
+    trimp = get_load_model("trimp")
+    for workout in db.query(Workout).filter(Workout.user_id == athlete.id):
+        assert workout.training_load_score == trimp.score(
+            workout.duration, workout.workout_type, workout.avg_hr, HeartRateProfile(max_hr=180.0)
+        )
+    assert db.query(Workout).filter(Workout.user_id == stale_history[1], Workout.training_load_score != 1.0).count() == 0
+    rows = db.query(DailyTrainingState).filter(DailyTrainingState.user_id == athlete.id).order_by(DailyTrainingState.date).all()
+    assert [row.ctl for row in rows] == pytest.approx([row["ctl"] for row in _expected_state(db, athlete.id)])
+    principal_cache.clear()
@@ -0,0 +1,136 @@
+"""
+Unit tests for the vectorized PMC engine in app/services/training_engine.py
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.training_engine import (
+    compute_pmc_series,
+    compute_pmc_sparse,
+    decay_state,
+    calculate_exponential_moving_average,
+    ema_smoothing_factor,
+)
+
+
+def reference_ema_series(values, time_constant, initial=None):
+    """Day-by-day EMA loop (the original implementation)"""
+    alpha = ema_smoothing_factor(time_constant)
+    series = []
+    ema = values[0] if initial is None else initial
+    for i, value in enumerate(values):
+        if i == 0 and initial is None:
+            series.append(ema)
+            continue
+        ema = alpha * value + (1 - alpha) * ema
+        series.append(ema)
+    return np.array(series)
+
+
+@pytest.mark.parametrize("days", [1, 2, 7, 42, 365, 5 * 365])
+def test_series_matches_reference_loop(days):
+    rng = np.random.default_rng(days)
+    loads = rng.uniform(0, 250, days) * (rng.random(days) > 0.4)
+
+    series = compute_pmc_series(loads)
+
+    np.testing.assert_allclose(series["ctl"], reference_ema_series(loads, 42), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(series["atl"], reference_ema_series(loads, 7), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(series["tsb"], series["ctl"] - series["atl"])
+
+
+def test_series_with_initial_state():
+    loads = [0, 120, 0, 0, 80, 0, 60]
+
+    series = compute_pmc_series(loads, initial_ctl=50.0, initial_atl=70.0)
+
+    np.testing.assert_allclose(series["ctl"], reference_ema_series(loads, 42, initial=50.0))
+    np.testing.assert_allclose(series["atl"], reference_ema_series(loads, 7, initial=70.0))
+
+
+def test_series_is_vectorized_over_leading_axes():
+    rng = np.random.default_rng(0)
+    plans = rng.uniform(0, 200, (5, 90))
+
+    batch = compute_pmc_series(plans, initial_ctl=40.0, initial_atl=40.0)
+
+    for row, loads in enumerate(plans):
+        single = compute_pmc_series(loads, initial_ctl=40.0, initial_atl=40.0)
+        np.testing.assert_allclose(batch["ctl"][row], single["ctl"])
+        np.testing.assert_allclose(batch["atl"][row], single["atl"])
+
+
+def test_exponential_moving_average_scalar():
+    assert calculate_exponential_moving_average([], 42) == 0.0
+    assert calculate_exponential_moving_average([100.0], 7) == 100.0
+    assert calculate_exponential_moving_average([0, 0, 100], 7) == round(reference_ema_series([0, 0, 100], 7)[-1], 2)
+
+
+# Sparse (gap-aware) engine vs the dense implementation
+
+def sparse_history(seed, days, density, gaps=()):
+    """Random training days over `days` calendar days, with optional (start, length) breaks."""
+    rng = np.random.default_rng(seed)
+    loads = rng.uniform(20, 250, days) * (rng.random(days) < density)
+    for start, length in gaps:
+        loads[start:start + length] = 0.0
+    return loads
+
+
+def dense_to_sparse(start, loads):
+    days = [start + timedelta(days=int(i)) for i in np.flatnonzero(loads)]
+    return days, loads[loads > 0]
+
+
+@pytest.mark.parametrize("days, density, gaps", [
+    (1, 1.0, ()),
+    (42, 0.5, ()),
+    (365, 0.6, ()),
+    (3 * 365, 0.4, [(200, 120)]),           # injury break
+    (8 * 365, 0.3, [(400, 180), (1500, 400)]),  # off-seasons
+    (5000, 0.02, ()),                        # very sparse
+])
+def test_sparse_matches_dense(days, density, gaps):
+    start = date(2018, 1, 1)
+    loads = sparse_history(days, days, density, gaps)
+    loads[0] = max(loads[0], 50.0)  # history starts with a workout
+    training_days, training_loads = dense_to_sparse(start, loads)
+
+    dense = compute_pmc_series(loads, initial_ctl=0.0, initial_atl=0.0)
+    sparse = compute_pmc_sparse(training_days, training_loads)
+
+    index = [(day - start).days for day in training_days]
+    for key in ("ctl", "atl", "tsb"):
+        np.testing.assert_allclose(sparse[key], dense[key][index], rtol=1e-9, atol=1e-9)
+
+
+def test_sparse_with_initial_state_and_long_gap():
+    initial_date = date(2020, 1, 1)
+    training_days = [date(2020, 1, 5), date(2020, 1, 6), date(2031, 6, 1), date(2031, 6, 3)]
+    training_loads = [100.0, 80.0, 120.0, 60.0]
+
+    sparse = compute_pmc_sparse(training_days, training_loads, initial_ctl=70.0, initial_atl=90.0,
+                                initial_date=initial_date)
+
+    loads = np.zeros((training_days[-1] - initial_date).days)
+    for day, load in zip(training_days, training_loads):
+        loads[(day - initial_date).days - 1] = load
+    dense = compute_pmc_series(loads, initial_ctl=70.0, initial_atl=90.0)
+    index = [(day - initial_date).days - 1 for day in training_days]
+    np.testing.assert_allclose(sparse["ctl"], dense["ctl"][index], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(sparse["atl"], dense["atl"][index], rtol=1e-9, atol=1e-12)
+
+
+def test_sparse_decay_matches_dense_rest_days():
+    ctl, atl = decay_state(80.0, 95.0, 30)
+    dense = compute_pmc_series(np.zeros(30), initial_ctl=80.0, initial_atl=95.0)
+
+    assert ctl == pytest.approx(dense["ctl"][-1])
+    assert atl == pytest.approx(dense["atl"][-1])
+
+
+def test_sparse_empty_history():
+    sparse = compute_pmc_sparse([], [])
+    assert all(len(sparse[key]) == 0 for key in ("ctl", "atl", "tsb"))
@@ -0,0 +1,58 @@
+"""
+Tests for TrainingSnapshot / get_training_metrics (app/services/training_engine.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.sleep_log import SleepLog
+from app.models.workout import Workout
+from app.services.daily_summary import upsert_daily_totals, workout_totals
+from app.services.training_engine import (
+    TrainingSnapshot,
+    get_training_metrics,
+    get_training_loads,
+)
+from app.services.training_state import apply_workout_load, get_training_state
+
+
+@pytest.fixture
+def history(db, athlete):
+    today = date.today()
+    for offset, load in [(40, 90), (20, 120), (9, 60), (6, 80), (3, 150), (3, 40), (0, 70)]:
+        day = today - timedelta(days=offset)
+        workout = Workout(user_id=athlete.id, date=day, duration=load, workout_type="easy", training_load_score=load)
+        db.add(workout)
+        upsert_daily_totals(db, athlete.id, [(day, workout_totals(workout))])
+        apply_workout_load(db, athlete.id, day, load)
+    for offset, hours, quality in [(0, 7.5, 8), (1, 6.0, 5), (2, 8.5, 9), (5, 4.0, 2)]:
+        db.add(SleepLog(user_id=athlete.id, date=today - timedelta(days=offset), hours=hours, quality_score=quality))
+    db.commit()
+    return athlete.id
+
+
+def test_get_training_metrics_uses_two_queries(db, history, count_queries):
+    get_training_metrics(db, history)
+
+    selects = [statement for statement in count_queries if statement.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+    assert len(count_queries) == 2
+
+
+def test_snapshot_matches_per_metric_queries(db, history):
+    metrics = TrainingSnapshot.load(db, history).metrics()
+    state = get_training_state(db, history)
+
+    assert metrics["fitness"]["ctl"] == state["ctl"]
+    assert metrics["fatigue"]["atl"] == state["atl"]
+    assert metrics["form"]["tsb"] == state["tsb"]
+    assert metrics["weekly_training_load"] == round(sum(get_training_loads(db, history, days=7)), 2)
+    assert metrics["recovery"]["sleep_quality"] == round(((7.5 + 6.0 + 8.5) / 3 / 8 * 100 + (8 + 5 + 9) / 3 * 10) / 2, 1)
+
+
+def test_snapshot_without_history(db, athlete):
+    metrics = get_training_metrics(db, athlete.id)
+
+    assert metrics["fitness"]["ctl"] == 0.0
+    assert metrics["weekly_training_load"] == 0.0
+    assert metrics["recovery"]["recovery_score"] == 62.5
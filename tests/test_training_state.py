@@ -0,0 +1,144 @@
+"""
+Tests for the materialized daily training state (app/services/training_state.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.training_state import DailyTrainingState
+from app.models.workout import Workout
+from app.services.training_engine import (
+    ATL_ALPHA,
+    CTL_ALPHA,
+    MAX_HISTORY_POINTS,
+    calculate_full_history_pmc,
+    decay_state,
+)
+from app.services.training_state import (
+    apply_workout_load,
+    get_training_state,
+    get_metrics_history,
+    rebuild_training_state,
+)
+
+
+def log(db, user_id, day, load):
+    db.add(Workout(user_id=user_id, date=day, duration=load, workout_type="easy", training_load_score=load))
+    apply_workout_load(db, user_id, day, load)
+    db.commit()
+
+
+def snapshot(db, user_id):
+    rows = db.query(DailyTrainingState).filter(
+        DailyTrainingState.user_id == user_id
+    ).order_by(DailyTrainingState.date).all()
+    return [(row.date, row.daily_load, row.ctl, row.atl, row.tsb) for row in rows]
+
+
+@pytest.mark.parametrize("offsets", [
+    # Pure appends on later days: consecutive and after rest days
+    [(0, 60), (1, 80), (4, 100), (30, 50)],
+    # Appended, same-day and gapped inserts only
+    [(0, 60), (1, 80), (1, 40), (10, 120), (45, 90), (119, 100)],
+    # Mixed with back-dated inserts
+    [(0, 60), (1, 80), (1, 40), (10, 120), (45, 90), (5, 70), (0, 30), (119, 100), (60, 50)],
+])
+def test_incremental_updates_match_full_rebuild(db, athlete, offsets):
+    start = date.today() - timedelta(days=120)
+    for offset, load in offsets:
+        log(db, athlete.id, start + timedelta(days=offset), load)
+
+    incremental = snapshot(db, athlete.id)
+    rebuild_training_state(db, athlete.id)
+    db.commit()
+    rebuilt = snapshot(db, athlete.id)
+
+    assert [row[:2] for row in incremental] == [row[:2] for row in rebuilt]
+    for inc, full in zip(incremental, rebuilt):
+        assert inc[2:] == pytest.approx(full[2:], abs=1e-9)
+
+
+def test_append_after_rest_days_decays_each_rest_day_once(db, athlete):
+    start = date.today() - timedelta(days=10)
+    log(db, athlete.id, start, 100)
+    log(db, athlete.id, start + timedelta(days=3), 50)
+    appended = snapshot(db, athlete.id)[-1]
+
+    rebuild_training_state(db, athlete.id)
+    db.commit()
+    assert appended[2:] == pytest.approx(snapshot(db, athlete.id)[-1][2:], abs=1e-9)
+
+    # Two rest days between the workouts, then the second day's load
+    ctl, atl = decay_state(CTL_ALPHA * 100, ATL_ALPHA * 100, 2)
+    assert appended[2] == pytest.approx(ctl + CTL_ALPHA * (50 - ctl))
+    assert appended[3] == pytest.approx(atl + ATL_ALPHA * (50 - atl))
+
+
+def test_state_decays_across_rest_days(db, athlete):
+    log(db, athlete.id, date.today() - timedelta(days=10), 100)
+
+    state = get_training_state(db, athlete.id)
+    on_workout_day = get_training_state(db, athlete.id, as_of=date.today() - timedelta(days=10))
+
+    assert 0 < state["ctl"] < on_workout_day["ctl"]
+    assert 0 < state["atl"] < on_workout_day["atl"]
+    assert state["tsb"] == pytest.approx(state["ctl"] - state["atl"], abs=0.01)
+
+
+def test_no_workouts_returns_zero_state(db, athlete):
+    assert get_training_state(db, athlete.id) == {"ctl": 0.0, "atl": 0.0, "tsb": 0.0}
+
+
+def test_metrics_history_matches_point_reads(db, athlete):
+    today = date.today()
+    for offset, load in [(400, 80), (200, 120), (95, 60), (30, 90), (29, 40), (3, 150)]:
+        log(db, athlete.id, today - timedelta(days=offset), load)
+
+    start = today - timedelta(days=60)
+    history = get_metrics_history(db, athlete.id, start, today, "day")
+
+    assert history["resolution"] == "day"
+    assert len(history["points"]) == 61
+    for offset in (0, 31, 57, 60):
+        point = history["points"][offset]
+        state = get_training_state(db, athlete.id, as_of=start + timedelta(days=offset))
+        assert point["date"] == (start + timedelta(days=offset)).isoformat()
+        assert point["ctl"] == pytest.approx(state["ctl"], abs=0.011)
+        assert point["atl"] == pytest.approx(state["atl"], abs=0.011)
+
+
+def test_metrics_history_downsamples_long_ranges(db, athlete):
+    today = date.today()
+    for offset in range(3 * 365 - 1, -1, -2):
+        log(db, athlete.id, today - timedelta(days=offset), 50)
+
+    start = today - timedelta(days=3 * 365)
+    weekly = get_metrics_history(db, athlete.id, start, today)
+    monthly = get_metrics_history(db, athlete.id, start, today, "month")
+
+    assert weekly["resolution"] == "week"
+    assert all(date.fromisoformat(point["date"]).weekday() == 0 for point in weekly["points"])
+    assert sum(point["training_load"] for point in weekly["points"]) == pytest.approx(50 * len(range(3 * 365 - 1, -1, -2)))
+    assert all(date.fromisoformat(point["date"]).day == 1 for point in monthly["points"])
+    assert monthly["points"][-1]["ctl"] == pytest.approx(get_training_state(db, athlete.id)["ctl"], abs=0.011)
+
+    with pytest.raises(ValueError):
+        get_metrics_history(db, athlete.id, start, today, "day")
+
+
+def test_metrics_history_rejects_ranges_too_long_for_any_resolution(db, athlete):
+    today = date.today()
+    start = today - timedelta(days=30 * MAX_HISTORY_POINTS + 30)
+
+    for resolution in ("auto", "month"):
+        with pytest.raises(ValueError, match="'month'"):
+            get_metrics_history(db, athlete.id, start, today, resolution)
+    assert get_metrics_history(db, athlete.id, today - timedelta(days=30 * MAX_HISTORY_POINTS - 1), today)["resolution"] == "month"
+
+
+def test_materialized_state_matches_full_history_recompute(db, athlete):
+    today = date.today()
+    for offset, load in [(900, 80), (500, 120), (45, 60), (30, 90), (31, 40), (3, 150), (3, 20)]:
+        log(db, athlete.id, today - timedelta(days=offset), load)
+
+    assert get_training_state(db, athlete.id) == calculate_full_history_pmc(db, athlete.id)